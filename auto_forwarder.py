@@ -35,6 +35,24 @@ import re
 import os
 import threading
 import queue
+import asyncio
+import concurrent.futures
+import bisect
+import array
+import unicodedata
+import sqlite3
+import csv
+import io
+try:
+    import re._parser as sre_parse  # Python 3.11+
+except ImportError:
+    import sre_parse
+
+# Optional: the third-party `regex` module supports per-match timeouts.
+try:
+    import regex as regex_engine
+except ImportError:
+    regex_engine = None
 
 # --- Chaquopy Import for Java Interoperability ---
 from java.chaquopy import dynamic_proxy
@@ -56,7 +74,7 @@ from java.util import ArrayList, HashSet, Scanner
 from android.content.res import ColorStateList
 from android.content import ClipData, ClipboardManager, Context
 from android.os import Handler, Looper
-from java.lang import Runnable, String as JavaString, Integer
+from java.lang import Runnable, Integer, Long
 from android.content import Intent
 from android.net import Uri
 from android.graphics import Typeface
@@ -64,15 +82,14 @@ from java.net import URL, HttpURLConnection
 from java.io import File, FileOutputStream
 
 # --- Telegram & Client Utilities ---
-from org.telegram.messenger import NotificationCenter, MessageObject, R, Utilities
-from org.telegram.tgnet import TLRPC
+from org.telegram.messenger import NotificationCenter, MessageObject, R, Utilities, ChatObject, MessagesController, UserConfig, AccountInstance
+from org.telegram.tgnet import TLRPC, ConnectionsManager
 from org.telegram.ui.ActionBar import Theme
 from com.exteragram.messenger.plugins.ui import PluginSettingsActivity
 from com.exteragram.messenger.plugins import PluginsController
 from client_utils import (
     get_messages_controller,
     get_last_fragment,
-    get_account_instance,
     send_request,
     RequestCallback,
     get_user_config
@@ -93,14 +110,89 @@ LAST_SEEN_IDS_KEY = "last_seen_inbox_ids_v1337"
 GLOBAL_KEYWORD_PATTERN = "global_keyword_pattern_v1337"
 MIN_HISTORICAL_DAYS = 1
 MAX_HISTORICAL_DAYS = 30
+RPC_TIMEOUT_SECONDS = 15
+# Background jobs (backfills, dry runs, update checks) that may run at once; the rest wait their turn.
+MAX_BACKGROUND_JOBS = 2
+# Threads for blocking calls (HTTP downloads, file reference refreshes) made on behalf of jobs.
+MAX_BLOCKING_WORKERS = 2
+PRIORITY_LIVE = 0
+PRIORITY_UNREAD = 1
+PRIORITY_HISTORICAL = 2
+PRIORITY_WEIGHTS = (8, 2, 1)
+DRY_RUN_LIVE_KEY = "dry_run_live"
+SPILL_FILE_NAME = "auto_forwarder_spill.jsonl"
+SPILL_OFFSET_FILE_NAME = "auto_forwarder_spill.offset"
+TRACE_FILE_NAME = "auto_forwarder_trace.jsonl"
+TRACE_MAX_BYTES = 20 * 1024 * 1024
+ID_MAP_FILE_NAME = "auto_forwarder_ids.db"
+ID_MAP_FLUSH_SIZE = 64
+SYNC_EDITS_KEY = "sync_edits_deletes"
+MAX_DELETE_BATCH_SIZE = 100
+SEND_ERROR_FLOOD = "flood"
+SEND_ERROR_FILE_REFERENCE = "file_reference"
+SEND_ERROR_TRANSIENT = "transient"
+SEND_ERROR_TOPIC = "topic"
+SEND_ERROR_ALREADY_SENT = "already_sent"
+SEND_ERROR_PEER = "peer"
+SEND_ERROR_DESTINATION = "destination"
+SEND_ERROR_PERMANENT = "permanent"
+# Attempts after the first one, per error class; permanent errors are never retried.
+SEND_RETRY_LIMITS = {SEND_ERROR_FLOOD: 5, SEND_ERROR_FILE_REFERENCE: 2, SEND_ERROR_TRANSIENT: 5, SEND_ERROR_TOPIC: 1, SEND_ERROR_PEER: 1}
+# Errors that mean the destination itself is unusable; later sends to it fail without a request until it is checked again.
+DESTINATION_ERRORS = ("CHANNEL_PRIVATE", "CHAT_WRITE_FORBIDDEN", "USER_BANNED_IN_CHANNEL", "CHAT_GUEST_SEND_FORBIDDEN", "INPUT_USER_DEACTIVATED", "USER_IS_BLOCKED")
+# Errors from a stale InputPeer (e.g. an outdated access hash); the peer is resolved again once.
+PEER_ERRORS = ("CHANNEL_INVALID", "PEER_ID_INVALID", "CHAT_ID_INVALID")
+DESTINATION_RECHECK_SECONDS = 300
+RETRY_BASE_DELAY_SECONDS = 2.0
+RETRY_MAX_DELAY_SECONDS = 300.0
+LATENCY_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+LATENCY_STAGES = ("triage", "queue", "process", "dispatch", "ack")
+STAGE_TRIAGE, STAGE_QUEUE, STAGE_PROCESS, STAGE_DISPATCH, STAGE_ACK = range(len(LATENCY_STAGES))
+RULE_COUNTERS = (
+    "forwarded", "deferred", "timeout_released", "send_errors", "spilled",
+    "dropped_duplicate", "dropped_author_type", "dropped_author_filter", "dropped_antispam",
+    "dropped_content_type", "dropped_keyword", "dropped_length", "dropped_content_dedup", "dry_run",
+    "regex_timeouts", "retried", "spill_lost"
+)
+(COUNTER_FORWARDED, COUNTER_DEFERRED, COUNTER_TIMEOUT_RELEASED, COUNTER_SEND_ERRORS, COUNTER_SPILLED,
+ COUNTER_DROPPED_DUPLICATE, COUNTER_DROPPED_AUTHOR_TYPE, COUNTER_DROPPED_AUTHOR_FILTER, COUNTER_DROPPED_ANTISPAM,
+ COUNTER_DROPPED_CONTENT_TYPE, COUNTER_DROPPED_KEYWORD, COUNTER_DROPPED_LENGTH, COUNTER_DROPPED_CONTENT_DEDUP,
+ COUNTER_DRY_RUN, COUNTER_REGEX_TIMEOUTS, COUNTER_RETRIED, COUNTER_SPILL_LOST) = range(len(RULE_COUNTERS))
+REGEX_TIMEOUT_DISABLE_THRESHOLD = 3
+# Raw-message filter result for messages whose content type needs a MessageObject to classify.
+FILTER_NEEDS_MESSAGE_OBJECT = "needs_message_object"
+# Media-kind codes of a MessagePage. Text and photos are settled from the media class; anything
+# else (documents, stickers, GIFs, ...) needs a MessageObject to classify.
+PAGE_KIND_TEXT, PAGE_KIND_PHOTO, PAGE_KIND_OTHER = 1, 2, 4
+PAGE_KIND_FILTERS = (("text", PAGE_KIND_TEXT), ("photos", PAGE_KIND_PHOTO))
+# MessageObject(account, message, ...) flag sets, tried in order until one works on this client.
+MESSAGE_OBJECT_ARGS = ((True, True), (False, False), (True,))
+GLOBAL_PATTERN_DISABLED_KEY = "global_keyword_pattern_disabled"
+LISTENED_NOTIFICATIONS = (NotificationCenter.didReceiveNewMessages, NotificationCenter.replaceMessagesObjects, NotificationCenter.messagesDeleted)
+KEYWORD_LIST_PREFIX = "kw:"
+MAX_LITERAL_ALTERNATIVES = 5000
+TEXT_NORMALIZATION_KEY = "text_normalization"
+TEXT_NORMALIZATION_MODES = collections.OrderedDict([
+    ("case", "Ignore case"),
+    ("nfkc", "Ignore case, width & spacing"),
+    ("loose", "Ignore case, width, spacing & accents"),
+])
+DEFAULT_TEXT_NORMALIZATION = "case"
 DEFAULT_SETTINGS = {
     "deferral_timeout_ms": 5000,
+    "regex_timeout_ms": 50,
     "min_msg_length": 1,
     "max_msg_length": 4096,
     "deduplication_window_seconds": 10.0,
     "album_timeout_ms": 800,
     "sequential_delay_seconds": 1.5,
-    "antispam_delay_seconds": 1.0
+    "antispam_delay_seconds": 1.0,
+    "content_dedup_window_seconds": 0,
+    "forward_batch_window_ms": 500,
+    "destination_interval_seconds": 0,
+    "send_budget_per_minute": 60,
+    "queue_high_water_mark": 500,
+    "id_map_max_entries": 100000
 }
 FILTER_TYPES = collections.OrderedDict([
     ("text", "Text Messages"),
@@ -114,6 +206,18 @@ FILTER_TYPES = collections.OrderedDict([
     ("stickers", "Stickers"),
     ("gifs", "GIFs & Animations")
 ])
+# Rule import/export. Options not given in an imported rule take these defaults, as in the rule dialog.
+RULES_EXPORT_FORMAT = "auto_forwarder_rules"
+RULES_EXPORT_VERSION = 1
+RULE_OPTION_DEFAULTS = collections.OrderedDict([
+    ("enabled", True), ("drop_author", True), ("quote_replies", True), ("native_forward", False),
+    ("keyword_pattern", ""), ("use_global_regex", False), ("author_filter", ""),
+    ("forward_users", True), ("forward_bots", True), ("forward_outgoing", True),
+])
+RULES_CSV_COLUMNS = ("source", "destinations") + tuple(RULE_OPTION_DEFAULTS) + ("blocked_content",)
+IMPORT_BATCH_SIZE = 100
+IMPORT_RESOLVE_CONCURRENCY = 3
+IMPORT_RESOLVE_INTERVAL_SECONDS = 0.5
 FAQ_TEXT = """--- **Disclaimer and Responsible Usage** ---
 Please be aware that using a plugin like this automates actions on your personal Telegram account. This practice is often referred to as 'self-botting'.
 This kind of automation may be considered a violation of [Telegram's Terms of Service](https://telegram.org/tos), which can prohibit bot-like activity from user accounts.
@@ -131,7 +235,8 @@ Go to a chat where a rule is active and open the "Auto Forward..." menu item aga
 * **What's the difference between "Copy" and "Forward" mode?**
 When setting up a rule, you have a checkbox for "Remove Original Author".
 - **Checked (Copy Mode):** Sends a brand new message to the destination. It looks like you sent it yourself. All text formatting is preserved.
-- **Unchecked (Forward Mode):** This option is not implemented in Copy mode. The plugin primarily operates by copying messages.
+- **Unchecked (Header Mode):** Copies the message and adds a clickable "Forwarded from..." header.
+- **Native Forward:** A separate checkbox that uses Telegram's own forwarding instead of copying. Messages are collected for a short window (see "Native Forward Batch Window") and sent in one request, which keeps albums and order intact. "Remove Original Author" hides the sender, and unchecking "Media Captions" drops captions. Quote and header options are not used in this mode.
 * **Can I control which messages get forwarded?**
 Yes. When creating or modifying a rule, you can choose to forward messages from regular users, bots, and your own outgoing messages independently. You can also filter incoming messages to only forward from specific users or bots.
 
@@ -146,6 +251,8 @@ When creating or modifying a rule, you'll see checkboxes for different message t
 You can specify keywords or regex patterns that messages must contain to be forwarded. This works for text messages, media captions, and **document filenames**:
 - **Keywords:** Simple text matching (case-insensitive). Example: `"bitcoin"` will match messages containing "Bitcoin", "BITCOIN", etc.
 - **Regex Patterns:** Advanced pattern matching. Example: `"\\\\b(btc|bitcoin|₿)\\\\b"` will match whole words containing btc, bitcoin, or the bitcoin symbol.
+- **Keyword Lists:** Start the pattern with `kw:` and separate keywords with commas, e.g. `kw: bitcoin, ethereum, airdrop`. A message matches if it contains any of them (case-insensitive). Lists with hundreds of keywords stay fast. Plain alternations like `cat|dog|bird` are matched the same way automatically.
+- **Keyword Matching:** The *Keyword Matching* setting sets how loosely text is compared. It can ignore case only (the default), also full-width letters and extra spaces, or also accents (so `cafe` matches `café`). This applies to keywords and plain text; regexes always match the original text, ignoring case.
 - **Leave the field empty** to disable keyword filtering (forward all messages that pass other filters).
 - If a regex pattern fails to compile, it will fall back to simple case-insensitive text matching.
 * **Does the plugin support text formatting (Markdown)?**
@@ -165,10 +272,437 @@ Yes, completely. The plugin perfectly preserves all text formatting from the ori
 - **Sequential Delay:** The core setting for ordered forwarding. It's the pause between each sent message to enforce a strict sequence. Set to 0 to disable and restore high-speed parallel forwarding (which may break order).
 - **Deduplication Window:** Prevents double-forwards from client notification glitches. If Telegram sends a duplicate notification for the same message within this time window (in seconds), the plugin will ignore it.
 - **Anti-Spam Delay:** The secondary rate-limiter. Set to `0` unless you need to slow down forwards from a specific user.
+- **Content Dedup Window:** Useful when several source chats forward into one destination. If the same photo, file or text was already sent to that destination within this window (in seconds), it is skipped. Set to `0` to disable.
+- **Sync Edits & Deletions:** When this is on, edits and deletions in the source chat are applied to the forwarded copies. Edits apply to copied messages only, not native forwards. *Sync Memory* sets how many recent messages stay linked.
 * **Why do large files I send myself sometimes fail to forward?**
 This is a known limitation. If your file takes longer to upload than the "Media Deferral Timeout", the plugin may not be able to forward it. The feature is most reliable for forwarding messages you receive or for your own small files that upload instantly.
 """
 
+# --- UTF-16 Text Helpers ---
+# Telegram entity offsets and lengths count UTF-16 code units, while Python indexes by
+# code point. Characters outside the BMP (most emoji) take two code units.
+
+def utf16_len(text):
+    """Length of a string in UTF-16 code units, as Java's String.length() reports it."""
+    if not text:
+        return 0
+    if text.isascii():
+        return len(text)
+    return len(text.encode("utf-16-le")) // 2
+
+def utf16_offset(text, index):
+    """Converts a Python string index into a UTF-16 offset within the same string."""
+    if index <= 0 or text.isascii():
+        return index
+    return utf16_len(text[:index])
+
+def utf16_find(text, sub, start=0):
+    """Like str.find, but returns the position as a UTF-16 offset (-1 if not found)."""
+    index = text.find(sub, start)
+    return -1 if index == -1 else utf16_offset(text, index)
+
+def utf16_rfind(text, sub):
+    """Like str.rfind, but returns the position as a UTF-16 offset (-1 if not found)."""
+    index = text.rfind(sub)
+    return -1 if index == -1 else utf16_offset(text, index)
+
+# --- Regex Safety ---
+
+def find_regex_risk(pattern):
+    """
+    Returns a short description if the pattern nests an unbounded quantifier inside
+    another one (e.g. `(a+)+`, `(\\w*\\s?)*`), the shape behind catastrophic backtracking.
+    Returns None for safe or invalid patterns.
+    """
+    try:
+        parsed = sre_parse.parse(pattern)
+    except Exception:
+        return None
+    return _find_nested_repeat(parsed, False)
+
+def _find_nested_repeat(subpattern, inside_unbounded_repeat):
+    repeat_ops = (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT, getattr(sre_parse, "POSSESSIVE_REPEAT", None))
+    for op, av in subpattern:
+        children = []
+        is_unbounded = False
+        if op in repeat_ops:
+            _, max_count, item = av
+            is_unbounded = max_count == sre_parse.MAXREPEAT
+            if is_unbounded and inside_unbounded_repeat:
+                return "nested quantifier"
+            children = [item]
+        elif op == sre_parse.SUBPATTERN:
+            children = [av[-1]]
+        elif op == sre_parse.BRANCH:
+            children = av[1]
+        elif op in (sre_parse.ASSERT, sre_parse.ASSERT_NOT):
+            children = [av[1]]
+        elif op == getattr(sre_parse, "ATOMIC_GROUP", None):
+            children = [av]
+        for child in children:
+            risk = _find_nested_repeat(child, inside_unbounded_repeat or is_unbounded)
+            if risk:
+                return risk
+    return None
+
+# --- Keyword Matching ---
+
+def extract_literal_keywords(pattern):
+    """
+    Returns the keyword list a pattern stands for, or None if it needs the regex engine.
+    Handles the "kw: word1, word2" list syntax and regexes made only of literal
+    alternatives such as `cat|dog|bird` (including forms re factors like `ca(?:t|r)`).
+    Keywords are case-folded.
+    """
+    if pattern[:len(KEYWORD_LIST_PREFIX)].lower() == KEYWORD_LIST_PREFIX:
+        return [keyword.strip().casefold() for keyword in pattern[len(KEYWORD_LIST_PREFIX):].split(',') if keyword.strip()]
+    try:
+        alternatives = _expand_literal_sequence(sre_parse.parse(pattern))
+    except Exception:
+        return None
+    if not alternatives or any(not alternative for alternative in alternatives):
+        return None
+    return [alternative.casefold() for alternative in alternatives]
+
+def _expand_literal_sequence(items):
+    results = [""]
+    for op, av in items:
+        if op == sre_parse.LITERAL:
+            options = [chr(av)]
+        elif op == sre_parse.IN:
+            if any(item_op != sre_parse.LITERAL for item_op, _ in av): return None
+            options = [chr(value) for _, value in av]
+        elif op == sre_parse.BRANCH:
+            options = []
+            for branch in av[1]:
+                expanded = _expand_literal_sequence(branch)
+                if expanded is None: return None
+                options.extend(expanded)
+        elif op == sre_parse.SUBPATTERN:
+            if av[1] or av[2]: return None  # inline flags change matching
+            options = _expand_literal_sequence(av[-1])
+            if options is None: return None
+        else:
+            return None
+        results = [prefix + option for prefix in results for option in options]
+        if len(results) > MAX_LITERAL_ALTERNATIVES: return None
+    return results
+
+
+class KeywordAutomaton:
+    """
+    An Aho-Corasick automaton over the keywords of many patterns. One pass over a
+    text reports every pattern with at least one keyword in it, in time linear in
+    the text length regardless of how many keywords there are.
+    """
+    def __init__(self, keywords_by_pattern, mode=None):
+        self.patterns = frozenset(keywords_by_pattern)
+        self.mode = mode  # the text normalization the keywords were built with
+        goto, outputs = [{}], [set()]
+        for pattern, keywords in keywords_by_pattern.items():
+            for keyword in keywords:
+                state = 0
+                for char in keyword:
+                    next_state = goto[state].get(char)
+                    if next_state is None:
+                        next_state = goto[state][char] = len(goto)
+                        goto.append({})
+                        outputs.append(set())
+                    state = next_state
+                outputs[state].add(pattern)
+
+        # Breadth-first failure links; each state's outputs include those of its failure state.
+        fail = [0] * len(goto)
+        pending = collections.deque(goto[0].values())
+        while pending:
+            state = pending.popleft()
+            for char, next_state in goto[state].items():
+                pending.append(next_state)
+                fallback = fail[state]
+                while fallback and char not in goto[fallback]:
+                    fallback = fail[fallback]
+                fail[next_state] = goto[fallback].get(char, 0)
+                outputs[next_state] |= outputs[fail[next_state]]
+        self.goto, self.fail = goto, fail
+        self.outputs = [frozenset(output) for output in outputs]
+
+    def find_patterns(self, text):
+        """Returns the set of patterns with a keyword in the (already case-folded) text."""
+        goto, fail, outputs = self.goto, self.fail, self.outputs
+        hits, state = set(), 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if outputs[state]:
+                hits |= outputs[state]
+        return hits
+
+# --- Text Normalization ---
+# Keyword and plain-text filters compare against one normalized view of a message, built once
+# per message or album. "nfkc" folds compatibility forms (full-width letters, ligatures) and
+# collapses whitespace runs; "loose" also drops accents. Keywords go through the same function
+# as the text. Regexes always run on the raw text, since their patterns cannot be normalized.
+WHITESPACE_RUN = re.compile(r"\s+")
+
+def normalize_text(text, mode):
+    """Applies a TEXT_NORMALIZATION_MODES mode to a string and case-folds it."""
+    if mode != "case":
+        if not text.isascii():
+            if mode == "loose":
+                text = "".join(char for char in unicodedata.normalize("NFKD", text) if not unicodedata.combining(char))
+            text = unicodedata.normalize("NFKC", text)
+        text = WHITESPACE_RUN.sub(" ", text)
+    return text.casefold()
+
+
+class MessageText:
+    """
+    The searchable text of a message or album: message texts and document filenames joined
+    by spaces. The normalized form is computed on first use and then shared by every matcher.
+    `length` is the length of the message text alone, as the length filter counts it.
+    """
+    __slots__ = ("raw", "mode", "length", "_folded")
+
+    def __init__(self, parts, mode, length=0):
+        self.raw = " ".join(part for part in parts if part).strip()
+        self.mode = mode
+        self.length = length
+        self._folded = None
+
+    def __bool__(self):
+        return bool(self.raw)
+
+    @property
+    def folded(self):
+        """Normalized and case-folded, for keyword lists and plain-text matching."""
+        if self._folded is None:
+            self._folded = normalize_text(self.raw, self.mode)
+        return self._folded
+
+
+# --- Memo Caches ---
+class MemoCache:
+    """A bounded, thread-safe LRU map for values that are costly to rebuild per message."""
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.entries = collections.OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def get(self, key):
+        with self.lock:
+            value = self.entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def __len__(self):
+        return len(self.entries)
+
+
+def copy_entity(entity, offset_shift=0):
+    """A fresh copy of a message entity, so cached or source entities are never shifted in place."""
+    copy = type(entity)()
+    copy.offset, copy.length = entity.offset + offset_shift, entity.length
+    if hasattr(entity, 'url'): copy.url = entity.url
+    if hasattr(entity, 'user_id'): copy.user_id = entity.user_id
+    return copy
+
+
+def copy_entities(entities):
+    """Copies an entity list; returns None for None."""
+    if entities is None:
+        return None
+    copies = ArrayList()
+    for i in range(entities.size()):
+        copies.add(copy_entity(entities.get(i)))
+    return copies
+
+
+# --- Backfill Pages ---
+def get_page_kind(media):
+    """The MessagePage kind code of a message's media."""
+    if not media or isinstance(media, (TLRPC.TL_messageMediaEmpty, TLRPC.TL_messageMediaWebPage)):
+        return PAGE_KIND_TEXT
+    if isinstance(media, TLRPC.TL_messageMediaPhoto) and getattr(media, 'photo', None):
+        return PAGE_KIND_PHOTO
+    return PAGE_KIND_OTHER
+
+
+class MessagePage:
+    """
+    A page of raw history messages, read through the Java bridge once into parallel columns:
+    ids, dates, author ids, outgoing flags, kind codes, grouped ids, text lengths and texts.
+    Filters run as masks (lists of bools, one per row) over the columns; select() keeps the
+    rows of a mask. `messages` keeps the TLRPC objects for the rows that get hydrated.
+    """
+    __slots__ = ("messages", "ids", "dates", "authors", "outgoing", "kinds", "grouped_ids", "text_lengths", "texts")
+
+    def __init__(self, messages=(), peer_id=None):
+        self.messages = []
+        self.ids, self.dates, self.authors = array.array('q'), array.array('q'), array.array('q')
+        self.outgoing, self.kinds = bytearray(), bytearray()
+        self.grouped_ids, self.text_lengths = array.array('q'), array.array('q')
+        self.texts = []
+        for message in messages:
+            if message is None or isinstance(message, TLRPC.TL_messageEmpty):
+                continue
+            text = message.message or ""
+            self.messages.append(message)
+            self.ids.append(message.id)
+            self.dates.append(message.date)
+            self.authors.append(peer_id(message.from_id) if peer_id else 0)
+            self.outgoing.append(1 if message.out else 0)
+            self.kinds.append(get_page_kind(message.media))
+            self.grouped_ids.append(message.grouped_id or 0)
+            self.text_lengths.append(len(text))
+            self.texts.append(text)
+
+    @classmethod
+    def from_response(cls, response, peer_id):
+        messages = getattr(response, 'messages', None)
+        return cls([messages.get(i) for i in range(messages.size())] if messages else (), peer_id)
+
+    @classmethod
+    def concat(cls, pages):
+        combined = cls()
+        for page in pages:
+            for name in cls.__slots__:
+                getattr(combined, name).extend(getattr(page, name))
+        return combined
+
+    def __len__(self):
+        return len(self.ids)
+
+    def select(self, mask):
+        """A new page with the rows where mask is true."""
+        page = MessagePage()
+        for name in self.__slots__:
+            column = getattr(self, name)
+            target = getattr(page, name)
+            target.extend(value for value, keep in zip(column, mask) if keep)
+        return page
+
+    def oldest_first(self):
+        """Row indexes ordered by message id."""
+        return sorted(range(len(self.ids)), key=self.ids.__getitem__)
+
+    def mask_newer_than(self, boundary_id):
+        return [message_id > boundary_id for message_id in self.ids]
+
+    def mask_since(self, cutoff_timestamp):
+        return [date >= cutoff_timestamp for date in self.dates]
+
+    def mask_kinds(self, blocked_kinds):
+        """False for rows whose kind code is in the blocked bitmask."""
+        return [not (kind & blocked_kinds) for kind in self.kinds]
+
+    def mask_text_length(self, min_length, max_length):
+        """The length filter: only text rows are checked, like live processing."""
+        return [kind != PAGE_KIND_TEXT or min_length <= length <= max_length for kind, length in zip(self.kinds, self.text_lengths)]
+
+
+# --- Message ID Map ---
+class MessageIdMap:
+    """
+    A persistent map from copied source messages to their copies, so edits and deletions
+    can follow a message across restarts. Rows are keyed by (source chat, source message,
+    destination chat); writes are buffered and committed in batches, and only the newest
+    `max_entries` rows are kept. `src_channel` marks channel sources, whose message ids are
+    per chat; deletions elsewhere arrive without a chat and are matched on the id alone.
+    """
+    def __init__(self, path, max_entries):
+        self.lock = threading.Lock()
+        self.max_entries = max_entries
+        self.pending = []
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS id_map (src_chat INTEGER NOT NULL, src_id INTEGER NOT NULL,"
+            " src_channel INTEGER NOT NULL, dst_chat INTEGER NOT NULL, dst_id INTEGER NOT NULL,"
+            " edit_date INTEGER NOT NULL DEFAULT 0, PRIMARY KEY (src_chat, src_id, dst_chat))")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS id_map_src_id ON id_map (src_id)")
+        self.connection.commit()
+
+    def add(self, src_chat, src_id, src_channel, dst_chat, dst_id):
+        with self.lock:
+            self.pending.append((src_chat, src_id, int(src_channel), dst_chat, dst_id))
+            if len(self.pending) >= ID_MAP_FLUSH_SIZE:
+                self._flush_locked()
+
+    def flush(self):
+        with self.lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if not self.pending:
+            return
+        rows, self.pending = self.pending, []
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO id_map (src_chat, src_id, src_channel, dst_chat, dst_id) VALUES (?, ?, ?, ?, ?)", rows)
+        if self.max_entries > 0:
+            self.connection.execute("DELETE FROM id_map WHERE rowid <= (SELECT MAX(rowid) FROM id_map) - ?", (self.max_entries,))
+        self.connection.commit()
+
+    def lookup(self, src_ids, src_chat=None):
+        """
+        Returns (src_chat, src_id, dst_chat, dst_id, edit_date) rows for the given source ids,
+        either in one chat or, with src_chat None, in any non-channel chat.
+        """
+        rows = []
+        with self.lock:
+            self._flush_locked()
+            for chunk in self._chunks(src_ids):
+                marks = ",".join("?" * len(chunk))
+                if src_chat is None:
+                    query, params = f"SELECT src_chat, src_id, dst_chat, dst_id, edit_date FROM id_map WHERE src_channel = 0 AND src_id IN ({marks})", chunk
+                else:
+                    query, params = f"SELECT src_chat, src_id, dst_chat, dst_id, edit_date FROM id_map WHERE src_chat = ? AND src_id IN ({marks})", [src_chat] + chunk
+                rows.extend(self.connection.execute(query, params).fetchall())
+        return rows
+
+    def set_edit_date(self, src_chat, src_id, edit_date):
+        with self.lock:
+            self.connection.execute("UPDATE id_map SET edit_date = ? WHERE src_chat = ? AND src_id = ?", (edit_date, src_chat, src_id))
+            self.connection.commit()
+
+    def remove(self, rows):
+        """Forgets the rows returned by lookup()."""
+        with self.lock:
+            self.connection.executemany("DELETE FROM id_map WHERE src_chat = ? AND src_id = ? AND dst_chat = ?",
+                                        [(row[0], row[1], row[2]) for row in rows])
+            self.connection.commit()
+
+    def count(self):
+        with self.lock:
+            return self.connection.execute("SELECT COUNT(*) FROM id_map").fetchone()[0] + len(self.pending)
+
+    def close(self):
+        with self.lock:
+            self._flush_locked()
+            self.connection.close()
+
+    @staticmethod
+    def _chunks(values, size=500):
+        values = list(values)
+        for start in range(0, len(values), size):
+            yield values[start:start + size]
+
+
 # --- Asynchronous Tasks & Proxies ---
 
 class DeferredTask(dynamic_proxy(Runnable)):
@@ -192,7 +726,527 @@ class AlbumTask(dynamic_proxy(Runnable)):
     def run(self):
         # Instead of processing, just put a reference to the complete album on the queue.
         # The worker will pick it up and process it in the correct sequential order.
-        self.plugin.processing_queue.put(("album", self.grouped_id))
+        self.plugin._enqueue_album(self.grouped_id)
+
+
+class SyncFlushTask(dynamic_proxy(Runnable)):
+    """A proxy class to flush collected edits and deletions after their collection window."""
+    def __init__(self, plugin):
+        super().__init__()
+        self.plugin = plugin
+
+    def run(self):
+        # Edits and deletions stay collected in memory while the queue is full; the flush is tried again later.
+        if not self.plugin._enqueue("sync", None):
+            self.plugin.handler.postDelayed(self, self.plugin.forward_batch_window_ms)
+
+
+class ForwardBatchTask(dynamic_proxy(Runnable)):
+    """A proxy class to flush a native forward batch after its collection window."""
+    def __init__(self, plugin, batch_key):
+        super().__init__()
+        self.plugin = plugin
+        self.batch_key = batch_key
+
+    def run(self):
+        # Like albums, the flush is queued so it stays in order with other sends.
+        if not self.plugin._enqueue("forward_batch", self.batch_key):
+            self.plugin.handler.postDelayed(self, self.plugin.forward_batch_window_ms)
+
+
+class DelayedSendTask(dynamic_proxy(Runnable)):
+    """A proxy class to hand a prepared send to its account's dispatcher once its destination's rate limit allows."""
+    def __init__(self, dispatcher, priority, send_job):
+        super().__init__()
+        self.dispatcher = dispatcher
+        self.priority = priority
+        self.send_job = send_job
+
+    def run(self):
+        self.dispatcher.submit(self.priority, self.send_job)
+
+# --- Async Core ---
+def send_request_on(account, req, callback):
+    """send_request through a given account's connection; None means the current account."""
+    if account is None:
+        return send_request(req, callback)
+    return ConnectionsManager.getInstance(account).sendRequest(req, callback)
+
+
+class RequestError(Exception):
+    """A request answered with an error; `error` keeps the TL_error."""
+    def __init__(self, error):
+        super().__init__(getattr(error, 'text', None) or "No response")
+        self.error = error
+
+
+class BackgroundJob:
+    """A named job in the AsyncCore registry. The job's coroutine updates done/total/note as it goes."""
+    def __init__(self, kind, chat_id, label):
+        self.kind = kind
+        self.chat_id = chat_id
+        self.label = label
+        self.state = "queued"
+        self.done = 0
+        self.total = 0
+        self.note = ""
+        self.started_at = time.time()
+        self.future = None
+
+    @property
+    def key(self):
+        return (self.kind, self.chat_id)
+
+    def describe(self):
+        """One status line, e.g. "Historical backfill – running 40/120 (12s)"."""
+        parts = [self.state]
+        if self.total:
+            parts.append(f"{self.done}/{self.total}")
+        elif self.done:
+            parts.append(str(self.done))
+        if self.note:
+            parts.append(self.note)
+        return f"{self.label} – {' '.join(parts)} ({int(time.time() - self.started_at)}s)"
+
+
+class AsyncCore:
+    """
+    One event loop on a daemon thread for network-bound background work: backfills,
+    history fetches and destination resolvers run on it as coroutines, so many requests
+    can be in flight on a single thread. request() is the one await point for the
+    network; it raises RequestError, asyncio.TimeoutError or CancelledError, and cancels
+    the request with the connection manager when the caller stops waiting.
+
+    Longer work is started with start_job(), which keeps a registry of named jobs keyed
+    by (kind, chat_id). A second request for a job that is already queued or running is
+    coalesced into the first one, and at most max_jobs run at a time. Blocking calls go
+    to one small thread pool, so the thread count stays fixed however the UI is used.
+    """
+    def __init__(self, max_jobs=MAX_BACKGROUND_JOBS, max_blocking=MAX_BLOCKING_WORKERS):
+        self.loop = None
+        self.thread = None
+        self.executor = None
+        self.max_jobs = max_jobs
+        self.max_blocking = max_blocking
+        self.job_slots = None
+        self.jobs = collections.OrderedDict()
+        self.jobs_lock = threading.Lock()
+
+    def start(self):
+        # A stopped loop's thread may still be winding down; a quick reload gets a new loop regardless.
+        if self.loop is not None:
+            return
+        self.loop = asyncio.new_event_loop()
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.max_blocking, thread_name_prefix="auto_forwarder")
+        self.loop.set_default_executor(self.executor)
+        self.job_slots = asyncio.Semaphore(self.max_jobs)
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        loop, self.loop = self.loop, None
+        if loop is None:
+            return
+        with self.jobs_lock:
+            self.jobs.clear()
+
+        def shutdown():
+            for task in asyncio.all_tasks(loop):
+                task.cancel()
+            loop.call_soon(loop.stop)
+        loop.call_soon_threadsafe(shutdown)
+        self.executor.shutdown(wait=False)
+
+    def submit(self, coro):
+        """Schedules a coroutine from any thread and returns a concurrent.futures.Future."""
+        if self.loop is None:
+            self.start()
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro, timeout=None):
+        """Runs a coroutine to completion from a thread other than the loop's and returns its result."""
+        return self.submit(coro).result(timeout)
+
+    def run_blocking(self, fn, *args):
+        """Runs a blocking call on the shared thread pool and returns a concurrent.futures.Future."""
+        if self.loop is None:
+            self.start()
+        return self.executor.submit(fn, *args)
+
+    def start_job(self, kind, chat_id, label, job_factory):
+        """
+        Starts job_factory(job), a coroutine function, as a named job. Returns (job, True),
+        or (existing_job, False) if the same kind of job is already queued or running for
+        this chat or for all chats (chat_id None).
+        """
+        with self.jobs_lock:
+            existing = self.find_job(kind, chat_id)
+            if existing:
+                return existing, False
+            job = BackgroundJob(kind, chat_id, label)
+            self.jobs[job.key] = job
+        job.future = self.submit(self._run_job(job, job_factory))
+        return job, True
+
+    def start_blocking_job(self, kind, chat_id, label, fn, *args):
+        """start_job() for a plain blocking callable, which runs on the shared thread pool."""
+        return self.start_job(kind, chat_id, label, lambda job: asyncio.get_running_loop().run_in_executor(None, fn, *args))
+
+    def find_job(self, kind, chat_id=None, exact=False):
+        """Returns the queued or running job covering (kind, chat_id). Unless exact, an all-chats job of that kind also counts."""
+        job = self.jobs.get((kind, chat_id))
+        if job is None and not exact and chat_id is not None:
+            job = self.jobs.get((kind, None))
+        return job
+
+    def list_jobs(self):
+        with self.jobs_lock:
+            return list(self.jobs.values())
+
+    def cancel_jobs(self):
+        """Cancels every queued and running job; returns how many there were."""
+        jobs = self.list_jobs()
+        for job in jobs:
+            if job.future:
+                job.future.cancel()
+        return len(jobs)
+
+    async def _run_job(self, job, job_factory):
+        try:
+            async with self.job_slots:
+                job.state = "running"
+                job.started_at = time.time()
+                return await job_factory(job)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            log(f"[{__id__}] ERROR in background job '{job.label}': {traceback.format_exc()}")
+        finally:
+            with self.jobs_lock:
+                if self.jobs.get(job.key) is job:
+                    del self.jobs[job.key]
+
+    async def request(self, req, timeout=RPC_TIMEOUT_SECONDS, account=None):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def settle(response, error):
+            if future.done():
+                return
+            if error or not response:
+                future.set_exception(RequestError(error))
+            else:
+                future.set_result(response)
+
+        token = send_request_on(account, req, RequestCallback(lambda response, error: loop.call_soon_threadsafe(settle, response, error)))
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            try:
+                ConnectionsManager.getInstance(get_user_config().getCurrentAccount() if account is None else account).cancelRequest(token, True)
+            except Exception:
+                pass
+            raise
+
+
+# --- Pipeline Metrics ---
+
+class PipelineMetrics:
+    """
+    Fixed-bucket latency histograms per pipeline stage and per-rule outcome counters.
+    All storage is preallocated lists of ints, so recording is an index increment.
+    Updates are not locked; an occasional lost increment is acceptable for statistics.
+    """
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.started_at = time.time()
+        bucket_count = len(LATENCY_BUCKETS_MS) + 1
+        self.histograms = [[0] * bucket_count for _ in LATENCY_STAGES]
+        self.stage_totals_ms = [0.0] * len(LATENCY_STAGES)
+        self.stage_counts = [0] * len(LATENCY_STAGES)
+        self.rule_counters = {}
+        self.last_forwarded = {}
+        self.max_queue_depth = 0
+
+    def observe(self, stage, seconds):
+        """Records a stage latency."""
+        elapsed_ms = seconds * 1000.0
+        self.histograms[stage][bisect.bisect_left(LATENCY_BUCKETS_MS, elapsed_ms)] += 1
+        self.stage_totals_ms[stage] += elapsed_ms
+        self.stage_counts[stage] += 1
+
+    def count(self, rule_key, counter, amount=1):
+        """Increments a per-rule counter."""
+        counters = self.rule_counters.get(rule_key)
+        if counters is None:
+            counters = self.rule_counters.setdefault(rule_key, [0] * len(RULE_COUNTERS))
+        counters[counter] += amount
+        if counter == COUNTER_FORWARDED:
+            self.last_forwarded[rule_key] = time.time()
+
+    def observe_queue_depth(self, depth):
+        if depth > self.max_queue_depth:
+            self.max_queue_depth = depth
+
+    def percentile_ms(self, stage, fraction):
+        """Returns the upper bound of the bucket holding the given percentile, or None."""
+        total = self.stage_counts[stage]
+        if not total:
+            return None
+        threshold, running = fraction * total, 0
+        for index, bucket_count in enumerate(self.histograms[stage]):
+            running += bucket_count
+            if running >= threshold:
+                return LATENCY_BUCKETS_MS[index] if index < len(LATENCY_BUCKETS_MS) else float("inf")
+        return float("inf")
+
+    def totals(self):
+        """Sums every rule's counters."""
+        totals = [0] * len(RULE_COUNTERS)
+        for counters in list(self.rule_counters.values()):
+            for index, value in enumerate(counters):
+                totals[index] += value
+        return dict(zip(RULE_COUNTERS, totals))
+
+    def snapshot(self, queue_depth=0):
+        """Returns all metrics as a JSON-serialisable dict."""
+        return {
+            "since": int(self.started_at),
+            "queue_depth": queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "bucket_bounds_ms": list(LATENCY_BUCKETS_MS),
+            "latency": {
+                name: {
+                    "count": self.stage_counts[stage],
+                    "avg_ms": round(self.stage_totals_ms[stage] / self.stage_counts[stage], 2) if self.stage_counts[stage] else None,
+                    "p50_ms": self.percentile_ms(stage, 0.5),
+                    "p99_ms": self.percentile_ms(stage, 0.99),
+                    "buckets": list(self.histograms[stage])
+                } for stage, name in enumerate(LATENCY_STAGES)
+            },
+            "totals": self.totals(),
+            "rules": {str(rule_key): dict(zip(RULE_COUNTERS, counters)) for rule_key, counters in list(self.rule_counters.items())},
+            "last_forwarded": {str(rule_key): int(timestamp) for rule_key, timestamp in list(self.last_forwarded.items())}
+        }
+
+# --- Notification Tracing ---
+
+class NotificationTraceRecorder:
+    """
+    Writes one JSON line per didReceiveNewMessages batch for offline replay
+    (see benchmarks/replay_trace.py). Peer and author ids are replaced with
+    per-recording pseudonyms and no message text is stored, only its length.
+    Recording stops by itself once the file reaches TRACE_MAX_BYTES.
+    """
+    def __init__(self, path, max_bytes=TRACE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.trace_file = open(path, "w")
+        self.started_at = time.monotonic()
+        self.bytes_written = 0
+        self.batches_written = 0
+        self.peer_aliases = {}
+        self.author_aliases = {}
+
+    def _alias(self, aliases, real_id):
+        alias = aliases.get(real_id)
+        if alias is None:
+            alias = aliases[real_id] = len(aliases) + 1
+        return alias
+
+    def record(self, account, entries):
+        """
+        Appends a batch. `entries` holds (peer_id, author_id, message_id, grouped_id, media_kind,
+        media_complete, text_length, reply_state, is_outgoing, has_rule) tuples, where reply_state is
+        0 (no reply), 1 (reply, object missing) or 2 (reply, object loaded).
+        """
+        with self.lock:
+            if self.trace_file is None:
+                return False
+            messages = [{
+                "p": self._alias(self.peer_aliases, peer_id), "a": self._alias(self.author_aliases, author_id),
+                "id": message_id, "g": grouped_id, "k": media_kind, "c": int(media_complete), "n": text_length,
+                "r": reply_state, "o": int(is_outgoing), "rule": int(has_rule)
+            } for peer_id, author_id, message_id, grouped_id, media_kind, media_complete, text_length, reply_state, is_outgoing, has_rule in entries]
+            line = json.dumps({"t": round(time.monotonic() - self.started_at, 4), "acc": account, "m": messages}, separators=(",", ":"))
+            self.trace_file.write(line + "\n")
+            self.bytes_written += len(line) + 1
+            self.batches_written += 1
+            if self.bytes_written >= self.max_bytes:
+                self._close()
+                return False
+            return True
+
+    def _close(self):
+        if self.trace_file is not None:
+            self.trace_file.close()
+            self.trace_file = None
+
+    def close(self):
+        with self.lock:
+            self._close()
+
+# --- Send Scheduling ---
+TRANSIENT_ERROR_MARKERS = ("TIMEOUT", "INTERNAL", "RPC_CALL_FAIL", "RPC_MCGET_FAIL", "WORKER_BUSY", "MSG_WAIT_FAILED")
+
+def classify_send_error(error):
+    """Sorts a failed send into one of the SEND_ERROR_* classes. Unknown errors are permanent."""
+    if error is None:
+        return SEND_ERROR_TRANSIENT  # no response and no error: the request was lost
+    text = (getattr(error, 'text', None) or "").upper()
+    code = getattr(error, 'code', 0) or 0
+    if "FLOOD" in text or text.startswith("SLOWMODE_WAIT"):
+        return SEND_ERROR_FLOOD
+    if text.startswith("FILE_REFERENCE"):
+        return SEND_ERROR_FILE_REFERENCE
+    if text == "RANDOM_ID_DUPLICATE":
+        return SEND_ERROR_ALREADY_SENT
+    if text in ("MSG_ID_INVALID", "REPLY_MESSAGE_ID_INVALID"):
+        return SEND_ERROR_TOPIC  # the topic root is sometimes not known to the server yet
+    if text in PEER_ERRORS:
+        return SEND_ERROR_PEER
+    if text in DESTINATION_ERRORS:
+        return SEND_ERROR_DESTINATION
+    if code < 0 or code >= 500 or any(marker in text for marker in TRANSIENT_ERROR_MARKERS):
+        return SEND_ERROR_TRANSIENT
+    return SEND_ERROR_PERMANENT
+
+
+class SendContext:
+    """
+    The parts of a send request that only depend on its destination: the resolved InputPeer
+    and one reply header per topic, shared by every request to it. `error` holds the server
+    error of a destination found unusable, until `recheck_at` (monotonic time).
+    """
+    __slots__ = ("peer", "reply_headers", "error", "recheck_at")
+
+    def __init__(self, peer):
+        self.peer = peer
+        self.reply_headers = {}
+        self.error = None
+        self.recheck_at = 0.0
+
+    def stamp(self, req, topic_id):
+        """Sets the peer and, for a topic, the reply header on a send request."""
+        req.peer = self.peer
+        if topic_id > 0:
+            reply_to = self.reply_headers.get(topic_id)
+            if reply_to is None:
+                reply_to = self.reply_headers[topic_id] = TLRPC.TL_inputReplyToMessage()
+                reply_to.reply_to_msg_id = topic_id
+            req.reply_to = reply_to
+            req.flags |= 1
+
+    def fail(self, error):
+        self.error = error
+        self.recheck_at = time.monotonic() + DESTINATION_RECHECK_SECONDS
+
+
+class SendDispatcher:
+    """
+    The single send lane shared by live forwarding and backfills. Pending sends are
+    picked by weighted round robin across priority classes (live > unread > historical),
+    and every send draws on one shared budget. A FLOOD_WAIT pauses the whole lane.
+    """
+    MAX_PENDING_BACKFILL = 5
+
+    def __init__(self, weights=PRIORITY_WEIGHTS):
+        self.weights = weights
+        self.queues = [collections.deque() for _ in weights]
+        self.credits = list(weights)
+        self.condition = threading.Condition()
+        self.sends_per_minute = 0
+        self.tokens = 0.0
+        self.last_refill = time.monotonic()
+        self.paused_until = 0.0
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def start(self):
+        self.stopped.clear()
+        if self.thread is None or not self.thread.is_alive():
+            self.thread = threading.Thread(target=self._run, daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        with self.condition:
+            self.condition.notify_all()
+
+    def set_budget(self, sends_per_minute):
+        """Sets the shared send budget. 0 means unlimited."""
+        with self.condition:
+            self.sends_per_minute = max(0, sends_per_minute)
+            self.tokens = self._burst_size()
+
+    def submit(self, priority, job):
+        """Queues a send job (a callable) in the given priority class."""
+        with self.condition:
+            self.queues[priority].append(job)
+            self.condition.notify_all()
+
+    def pending(self, priority):
+        with self.condition:
+            return len(self.queues[priority])
+
+    def pause(self, seconds):
+        """Stops all sends for the given time, e.g. after a FLOOD_WAIT."""
+        with self.condition:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    async def wait_for_capacity(self, priority):
+        """Suspends a backfill coroutine while its class already has enough queued sends."""
+        while not self.stopped.is_set() and self.pending(priority) >= self.MAX_PENDING_BACKFILL:
+            await asyncio.sleep(0.1)
+        return not self.stopped.is_set()
+
+    def _burst_size(self):
+        return max(1.0, self.sends_per_minute / 12.0)
+
+    def _get_send_delay(self):
+        """Returns how long to wait before the next send may go out. Caller holds the condition."""
+        now = time.monotonic()
+        if now < self.paused_until:
+            return self.paused_until - now
+        if self.sends_per_minute <= 0:
+            return 0
+        rate = self.sends_per_minute / 60.0
+        self.tokens = min(self._burst_size(), self.tokens + (now - self.last_refill) * rate)
+        self.last_refill = now
+        return 0 if self.tokens >= 1 else (1 - self.tokens) / rate
+
+    def _next_job(self):
+        """Weighted round robin: each class spends its credits in priority order. Caller holds the condition."""
+        waiting = [priority for priority, jobs in enumerate(self.queues) if jobs]
+        if all(self.credits[priority] <= 0 for priority in waiting):
+            self.credits = list(self.weights)
+        for priority in waiting:
+            if self.credits[priority] > 0:
+                self.credits[priority] -= 1
+                return self.queues[priority].popleft()
+        return None
+
+    def _run(self):
+        while not self.stopped.is_set():
+            with self.condition:
+                if not any(self.queues):
+                    self.condition.wait(1)
+                    continue
+                delay = self._get_send_delay()
+                if delay > 0:
+                    self.condition.wait(min(delay, 1))
+                    continue
+                job = self._next_job()
+                if self.sends_per_minute > 0:
+                    self.tokens -= 1
+                self.condition.notify_all()
+            try:
+                job()
+            except Exception:
+                log(f"[{__id__}] ERROR in send dispatcher: {traceback.format_exc()}")
 
 # --- Main Plugin Class ---
 
@@ -206,6 +1260,15 @@ class AutoForwarderPlugin(BasePlugin):
     USDT_ADDRESS = "TXLJNebRRAhwBRKtELMHJPNMtTZYHeoYBo"
     USER_TIMESTAMP_CACHE_SIZE = 500
     PROCESSED_FILES_CACHE_SIZE = 200
+    MAX_FORWARD_BATCH_SIZE = 100
+    MAX_BUFFERED_ALBUMS = 50
+    MAX_DEFERRED_MESSAGES = 200
+    MAX_DEAD_LETTERS = 50
+    QUOTE_CACHE_SIZE = 256
+    HEADER_CACHE_SIZE = 128
+    CHAT_NAME_CACHE_SIZE = 2000
+    RULES_PAGE_SIZE = 20
+    SPILL_REHYDRATE_BATCH_SIZE = 50
     GITHUB_OWNER = "0x11DFE"
     GITHUB_REPO = "Auto-Forwarder-Plugin"
     UPDATE_INTERVAL_SECONDS = 6 * 60 * 60
@@ -242,27 +1305,64 @@ class AutoForwarderPlugin(BasePlugin):
         self.id = __id__
         self.lock = threading.Lock()
         self.forwarding_rules = {}
+        self.enabled_sources = {}
         self.last_seen_inbox_ids = {}
         self.error_message = None
         self.deferred_messages = {}
         self.album_buffer = {}
+        self.forward_batches = {}
+        self.destination_next_send_time = {}
+        self.send_dispatchers = {}
+        self.send_contexts = {}
+        self.async_core = AsyncCore()
+        self.metrics = PipelineMetrics()
         self.processed_keys = collections.deque(maxlen=200)
         self.handler = Handler(Looper.getMainLooper())
         self.user_last_message_time = collections.OrderedDict()
         self.processed_files_cache = collections.OrderedDict()
+        self.pending_content = collections.OrderedDict()
+        self.quote_cache = MemoCache(self.QUOTE_CACHE_SIZE)
+        self.header_cache = MemoCache(self.HEADER_CACHE_SIZE)
+        self.chat_name_cache = MemoCache(self.CHAT_NAME_CACHE_SIZE)
+        self.rule_index = None
+        self.loaded_rules_json = None
+        self.send_targets = set()
+        self.rule_search = ""
+        self.rule_search_matches = None
+        self.rule_page = 0
         
         self.processing_queue = queue.Queue()
+        self.spill_lock = threading.Lock()
+        self.trace_recorder = None
+        self.compiled_patterns = {}
+        self.regex_timeouts = {}
+        self.keyword_automaton = KeywordAutomaton({})
+        self.last_keyword_hits = (None, None, None)
+        self.message_object_args = None
+        self.id_map = None
+        self.pending_edits = {}
+        self.pending_deletes = {}
+        self.sync_flush_task = None
+        self.dead_letters = collections.deque(maxlen=self.MAX_DEAD_LETTERS)
+        self.spill_pending_count = 0
+        self.spill_offset = 0
+        self.spill_rehydrating = False
+        self.spill_failures = 0
+        self.spill_retry_at = 0.0
+        self.spilled_total = 0
+        self.rehydrated_total = 0
+        self.spill_lost_total = 0
         self.worker_thread = None
         self.stop_worker_thread = threading.Event()
         
-        self.updater_thread = None
-        self.stop_updater_thread = threading.Event()
+        self.updater_task = None
         
         self.is_listening_for_reply = False
         self.reply_listener_context = {}
         self.reply_listener_timeout_task = None
         
         self.message_listener = None
+        self.observed_accounts = []
 
         self._load_configurable_settings()
         self._load_last_seen_ids()
@@ -278,14 +1378,25 @@ class AutoForwarderPlugin(BasePlugin):
             self.plugin = plugin_instance
 
         def didReceivedNotification(self, id, account, args):
-            """The main entry point for all new message notifications."""
+            """The main entry point for all new message notifications, on every observed account."""
+            if id == NotificationCenter.replaceMessagesObjects:
+                if self.plugin.id_map and self.plugin.enabled_sources.get(int(args[0])) == account:
+                    self.plugin._queue_source_edits(args[1])
+                return
+            if id == NotificationCenter.messagesDeleted:
+                if self.plugin.id_map and not args[2]:
+                    self.plugin._queue_source_deletes(args[0], int(args[1]), account)
+                return
             if id != NotificationCenter.didReceiveNewMessages:
                 return
             
             messages_list = args[1]
+
+            if self.plugin.trace_recorder:
+                self.plugin._record_notification_trace(account, messages_list)
             
             # --- "SET BY REPLYING" LISTENER ---
-            if self.plugin.is_listening_for_reply:
+            if self.plugin.is_listening_for_reply and account == self.plugin._get_current_account_safely():
                 for i in range(messages_list.size()):
                     msg_obj = messages_list.get(i)
                     msg = msg_obj.messageOwner
@@ -302,14 +1413,17 @@ class AutoForwarderPlugin(BasePlugin):
             
             # --- REGULAR MESSAGE FORWARDING LOGIC ---
             try:
-                if not self.plugin.forwarding_rules:
+                # Fast path: a batch belongs to a single dialog, so chats without an enabled rule
+                # on this account are dropped here before any per-message access.
+                if self.plugin.enabled_sources.get(int(args[0])) != account:
                     return
+                received_at = time.monotonic()
                 for i in range(messages_list.size()):
                     message_object = messages_list.get(i)
                     if not (hasattr(message_object, 'messageOwner') and message_object.messageOwner):
                         continue
                     # The triage center decides what to do with the message
-                    self.plugin.handle_message_event(message_object)
+                    self.plugin.handle_message_event(message_object, received_at)
             except Exception:
                 log(f"[{self.plugin.id}] ERROR in notification handler: {traceback.format_exc()}")
 
@@ -320,26 +1434,31 @@ class AutoForwarderPlugin(BasePlugin):
         self._load_configurable_settings()
         self._load_forwarding_rules()
         self._add_chat_menu_item()
+        self._load_spill_state()
+        self._open_id_map()
 
         self.stop_worker_thread.clear()
         if self.worker_thread is None or not self.worker_thread.is_alive():
             self.worker_thread = threading.Thread(target=self._worker_loop)
             self.worker_thread.daemon = True
             self.worker_thread.start()
+        for dispatcher in self.send_dispatchers.values():
+            dispatcher.start()
+        self.async_core.start()
             
-        self.stop_updater_thread.clear()
-        if self.updater_thread is None or not self.updater_thread.is_alive():
-            self.updater_thread = threading.Thread(target=self._updater_loop)
-            self.updater_thread.daemon = True
-            self.updater_thread.start()
-            log(f"[{self.id}] Auto-updater thread started.")
+        if self.updater_task is None or self.updater_task.done():
+            self.updater_task = self.async_core.submit(self._updater_loop())
+            log(f"[{self.id}] Auto-updater started.")
 
         def register_observer():
-            account_instance = get_account_instance()
-            if account_instance:
-                self.message_listener = self.MessageListener(self)
-                account_instance.getNotificationCenter().addObserver(self.message_listener, NotificationCenter.didReceiveNewMessages)
-                log(f"[{self.id}] Message observer successfully registered.")
+            # One listener serves every logged-in account; notifications carry their account.
+            self.message_listener = self.MessageListener(self)
+            for account in self._get_active_accounts():
+                notification_center = AccountInstance.getInstance(account).getNotificationCenter()
+                for notification_id in LISTENED_NOTIFICATIONS:
+                    notification_center.addObserver(self.message_listener, notification_id)
+                self.observed_accounts.append(account)
+            log(f"[{self.id}] Message observer registered on accounts {self.observed_accounts}.")
 
         run_on_ui_thread(register_observer)
 
@@ -347,19 +1466,27 @@ class AutoForwarderPlugin(BasePlugin):
         """Called when the plugin is unloaded."""
         self.stop_worker_thread.set()
         self.processing_queue.put(None) # Unblock the worker's get() call
-        
-        self.stop_updater_thread.set()
-        log(f"[{self.id}] Auto-updater thread stopped.")
+        for dispatcher in self.send_dispatchers.values():
+            dispatcher.stop()
+        # Also cancels the updater and every background job.
+        self.async_core.stop()
+        self.updater_task = None
+        log(f"[{self.id}] Auto-updater stopped.")
 
         def unregister_observer():
-            account_instance = get_account_instance()
-            if account_instance and self.message_listener:
-                account_instance.getNotificationCenter().removeObserver(self.message_listener, NotificationCenter.didReceiveNewMessages)
+            if self.message_listener:
+                for account in self.observed_accounts:
+                    notification_center = AccountInstance.getInstance(account).getNotificationCenter()
+                    for notification_id in LISTENED_NOTIFICATIONS:
+                        notification_center.removeObserver(self.message_listener, notification_id)
+                self.observed_accounts = []
                 self.message_listener = None
                 log(f"[{self.id}] Message observer successfully removed.")
 
         run_on_ui_thread(unregister_observer)
         self.handler.removeCallbacksAndMessages(None)
+        self._stop_trace_recording()
+        self._close_id_map()
 
     # --- Settings and Configuration ---
     def _load_configurable_settings(self):
@@ -372,20 +1499,105 @@ class AutoForwarderPlugin(BasePlugin):
         self.deduplication_window_seconds = float(self.get_setting("deduplication_window_seconds", str(DEFAULT_SETTINGS["deduplication_window_seconds"])))
         self.sequential_delay_seconds = float(self.get_setting("sequential_delay_seconds", str(DEFAULT_SETTINGS["sequential_delay_seconds"])))
         self.antispam_delay_seconds = float(self.get_setting("antispam_delay_seconds", str(DEFAULT_SETTINGS["antispam_delay_seconds"])))
+        self.content_dedup_window_seconds = float(self.get_setting("content_dedup_window_seconds", str(DEFAULT_SETTINGS["content_dedup_window_seconds"])))
+        self.forward_batch_window_ms = int(self.get_setting("forward_batch_window_ms", str(DEFAULT_SETTINGS["forward_batch_window_ms"])))
+        self.destination_interval_seconds = float(self.get_setting("destination_interval_seconds", str(DEFAULT_SETTINGS["destination_interval_seconds"])))
+        self.send_budget_per_minute = int(self.get_setting("send_budget_per_minute", str(DEFAULT_SETTINGS["send_budget_per_minute"])))
+        for dispatcher in self.send_dispatchers.values():
+            dispatcher.set_budget(self.send_budget_per_minute)
+        self.queue_high_water_mark = max(1, int(self.get_setting("queue_high_water_mark", str(DEFAULT_SETTINGS["queue_high_water_mark"]))))
+        self.dry_run_live = self.get_setting(DRY_RUN_LIVE_KEY, "0") == "1"
+        self.regex_timeout_seconds = max(0, int(self.get_setting("regex_timeout_ms", str(DEFAULT_SETTINGS["regex_timeout_ms"])))) / 1000.0
+        self.sync_edits_deletes = self.get_setting(SYNC_EDITS_KEY, "0") == "1"
+        self.id_map_max_entries = max(0, int(self.get_setting("id_map_max_entries", str(DEFAULT_SETTINGS["id_map_max_entries"]))))
+        if self.id_map: self.id_map.max_entries = self.id_map_max_entries
+        self.text_normalization = self.get_setting(TEXT_NORMALIZATION_KEY, DEFAULT_TEXT_NORMALIZATION)
+        if self.text_normalization not in TEXT_NORMALIZATION_MODES:
+            self.text_normalization = DEFAULT_TEXT_NORMALIZATION
+        # Also catches a global pattern saved before it was checked on entry.
+        self._validate_global_pattern(self.get_setting(GLOBAL_KEYWORD_PATTERN, ""), notify=False)
+
+    def _validate_global_pattern(self, pattern, notify=True):
+        """
+        Applies the rule dialog's regex check to the global filter: without the regex module a
+        pattern like (a+)+ cannot be interrupted, so it is cleared. Returns True if it was kept.
+        """
+        regex_risk = find_regex_risk((pattern or "").strip())
+        if regex_risk and not regex_engine:
+            self.set_setting(GLOBAL_KEYWORD_PATTERN, "")
+            log(f"[{self.id}] Cleared global keyword regex {pattern!r} ({regex_risk}).")
+            if notify:
+                BulletinHelper.show_error(f"Global regex rejected ({regex_risk}): patterns like (a+)+ can freeze forwarding. It has been cleared.", get_last_fragment())
+                self._refresh_settings_ui()
+            return False
+        if regex_risk and notify:
+            BulletinHelper.show_info(f"Global regex has a {regex_risk}; it will be switched off if it gets too slow.", get_last_fragment())
+        return True
 
     def _load_forwarding_rules(self):
         """Loads all forwarding rules from JSON storage."""
+        rules_str = self.get_setting(FORWARDING_RULES_KEY, "{}")
         try:
-            rules_str = self.get_setting(FORWARDING_RULES_KEY, "{}")
             self.forwarding_rules = {int(k): v for k, v in json.loads(rules_str).items()}
         except Exception: 
             self.forwarding_rules = {}
+        self._rebuild_source_index()
+        if rules_str != self.loaded_rules_json:
+            # The settings screen reloads the rules on every rebuild; the rule browser index and
+            # send contexts only follow real changes. A destination that was removed or added
+            # (including re-added) is resolved again; the others keep their failure state.
+            self.loaded_rules_json = rules_str
+            self.rule_index = self.rule_search_matches = None
+            # Rules are edited in place before saving, so the targets to compare with are kept from the last load.
+            send_targets = {(self._get_rule_account(rule), to_peer_id)
+                            for rule in self.forwarding_rules.values()
+                            for to_peer_id, _ in self._get_rule_destinations(rule)}
+            for account, to_peer_id in self.send_targets ^ send_targets:
+                self._invalidate_send_contexts(to_peer_id, account)
+            self.send_targets = send_targets
 
     def _save_forwarding_rules(self):
         """Saves all forwarding rules to JSON storage."""
         self.set_setting(FORWARDING_RULES_KEY, json.dumps({str(k): v for k, v in self.forwarding_rules.items()}))
         self._load_forwarding_rules()
 
+    def _rebuild_source_index(self):
+        """Recomputes the map of source chats with an enabled rule to their account, used by the listener's fast path."""
+        self.enabled_sources = {chat_id: self._get_rule_account(rule) for chat_id, rule in self.forwarding_rules.items() if rule.get("enabled", False)}
+
+    # --- Accounts ---
+    def _get_active_accounts(self):
+        """Returns the account slots with a logged-in user."""
+        accounts = []
+        for account in range(UserConfig.MAX_ACCOUNT_COUNT):
+            try:
+                if UserConfig.getInstance(account).isClientActivated():
+                    accounts.append(account)
+            except Exception:
+                pass
+        return accounts or [self._get_current_account_safely()]
+
+    def _get_rule_account(self, rule):
+        """The account a rule forwards with. Rules saved before accounts were tracked use the current one."""
+        account = rule.get("account") if rule else None
+        return self._get_current_account_safely() if account is None else account
+
+    def _get_source_account(self, source_chat_id):
+        return self._get_rule_account(self.forwarding_rules.get(source_chat_id))
+
+    def _get_messages_controller(self, account=None):
+        return get_messages_controller() if account is None else MessagesController.getInstance(account)
+
+    def _get_send_dispatcher(self, account):
+        """Each account has its own send queues, budget and FLOOD_WAIT pause, so accounts send in parallel."""
+        with self.lock:
+            dispatcher = self.send_dispatchers.get(account)
+            if dispatcher is None:
+                dispatcher = self.send_dispatchers[account] = SendDispatcher()
+                dispatcher.set_budget(self.send_budget_per_minute)
+                dispatcher.start()
+            return dispatcher
+
     def _load_last_seen_ids(self):
         """Loads per-chat last seen inbox IDs from JSON storage."""
         try:
@@ -405,14 +1617,15 @@ class AutoForwarderPlugin(BasePlugin):
             self._save_last_seen_ids()
 
     def _get_dialog(self, chat_id):
-        """Get dialog information for a chat."""
+        """Get dialog information for a chat, from the account of its rule."""
         try:
-            dialogs = get_messages_controller().dialogs_dict
+            controller = self._get_messages_controller(self._get_source_account(chat_id))
+            dialogs = controller.dialogs_dict
             if dialogs and chat_id in dialogs:
                 return dialogs[chat_id]
             
             # Fallback: try getting from all dialogs
-            all_dialogs = get_messages_controller().getAllDialogs()
+            all_dialogs = controller.getAllDialogs()
             if all_dialogs:
                 for i in range(all_dialogs.size()):
                     dialog = all_dialogs.get(i)
@@ -435,6 +1648,15 @@ class AutoForwarderPlugin(BasePlugin):
         """Clamps the number of days to valid range."""
         return max(MIN_HISTORICAL_DAYS, min(MAX_HISTORICAL_DAYS, days))
 
+    def _get_rule_destinations(self, rule):
+        """Returns a rule's destinations as (chat_id, topic_id) pairs, supporting single-destination rules."""
+        destinations = rule.get("destinations")
+        if destinations:
+            return [(d["id"], d.get("topic_id", 0)) for d in destinations if d.get("id")]
+        if rule.get("destination"):
+            return [(rule["destination"], rule.get("destination_topic_id", 0))]
+        return []
+
     # --- Core Logic: Sequential Processing ---
     def _worker_loop(self):
         """
@@ -449,12 +1671,18 @@ class AutoForwarderPlugin(BasePlugin):
                 if item is None:
                     break
 
-                if isinstance(item, tuple) and item[0] == "album":
-                    _, grouped_id = item
-                    self._process_album(grouped_id)
+                item_kind, payload, enqueued_at = item
+                dequeued_at = time.monotonic()
+                self.metrics.observe(STAGE_QUEUE, dequeued_at - enqueued_at)
+                if item_kind == "album":
+                    self._process_album(payload)
+                elif item_kind == "forward_batch":
+                    self._flush_forward_batch(payload)
+                elif item_kind == "sync":
+                    self._flush_sync_queue()
                 else:
-                    message_object = item
-                    self.super_handle_message_event(message_object)
+                    self.super_handle_message_event(payload)
+                self.metrics.observe(STAGE_PROCESS, time.monotonic() - dequeued_at)
                 
                 # If sequential delay is enabled, pause between each processed item.
                 if self.sequential_delay_seconds > 0:
@@ -463,16 +1691,19 @@ class AutoForwarderPlugin(BasePlugin):
                 self.processing_queue.task_done()
 
             except queue.Empty:
-                continue
+                pass
             except Exception:
                 log(f"[{self.id}] ERROR in worker thread: {traceback.format_exc()}")
+
+            self._schedule_spill_rehydration()
                 
         log(f"[{self.id}] Sequential worker thread stopped.")
 
-    def handle_message_event(self, message_object):
+    def handle_message_event(self, message_object, received_at=None, from_spill=False):
         """
         This function is the triage center. It groups albums together BEFORE
-        putting them on the sequential processing queue.
+        putting them on the sequential processing queue. While spilled messages
+        are still on disk, new ones are spilled behind them to keep their order.
         """
         source_chat_id = self._get_id_from_peer(message_object.messageOwner.peer_id)
         rule = self.forwarding_rules.get(source_chat_id)
@@ -482,18 +1713,48 @@ class AutoForwarderPlugin(BasePlugin):
         message = message_object.messageOwner
         grouped_id = getattr(message, 'grouped_id', 0)
 
-        if grouped_id != 0:
+        if not from_spill and self.spill_pending_count > 0:
+            self._spill_message(source_chat_id, message.id)
+        elif grouped_id != 0:
             with self.lock:
-                if grouped_id not in self.album_buffer:
-                    log(f"[{self.id}] Triage: Detected start of new album: {grouped_id}")
-                    album_task = AlbumTask(self, grouped_id)
-                    self.album_buffer[grouped_id] = {'messages': [], 'task': album_task}
-                    self.handler.postDelayed(album_task, self.album_timeout_ms)
-                
-                self.album_buffer[grouped_id]['messages'].append(message_object)
-        else:
-            self.processing_queue.put(message_object)
+                is_buffer_full = grouped_id not in self.album_buffer and len(self.album_buffer) >= self.MAX_BUFFERED_ALBUMS
+                if not is_buffer_full:
+                    if grouped_id not in self.album_buffer:
+                        log(f"[{self.id}] Triage: Detected start of new album: {grouped_id}")
+                        album_task = AlbumTask(self, grouped_id)
+                        self.album_buffer[grouped_id] = {'messages': [], 'task': album_task}
+                        self.handler.postDelayed(album_task, self.album_timeout_ms)
+                    
+                    self.album_buffer[grouped_id]['messages'].append(message_object)
+            if is_buffer_full:
+                self._spill_message(source_chat_id, message.id)
+        elif not self._enqueue("message", message_object):
+            self._spill_message(source_chat_id, message.id)
+        if received_at is not None:
+            self.metrics.observe(STAGE_TRIAGE, time.monotonic() - received_at)
             
+    def _enqueue(self, item_kind, payload):
+        """
+        Puts an item on the processing queue unless the queue is at the high-water mark.
+        Every put goes through here; returns False if the caller has to park the item.
+        """
+        queue_depth = self.processing_queue.qsize()
+        self.metrics.observe_queue_depth(queue_depth)
+        if queue_depth >= self.queue_high_water_mark:
+            return False
+        self.processing_queue.put((item_kind, payload, time.monotonic()))
+        return True
+
+    def _enqueue_album(self, grouped_id):
+        """Queues a buffered album; if the queue is full, its items are spilled and regrouped when restored."""
+        if self._enqueue("album", grouped_id):
+            return
+        with self.lock:
+            album_data = self.album_buffer.pop(grouped_id, None)
+        for message_object in sorted(album_data['messages'] if album_data else [], key=lambda m: m.messageOwner.id):
+            message = message_object.messageOwner
+            self._spill_message(self._get_id_from_peer(message.peer_id), message.id)
+
     def super_handle_message_event(self, message_object):
         """
         The main handler for processing a single incoming message object.
@@ -516,21 +1777,23 @@ class AutoForwarderPlugin(BasePlugin):
 
             if any(key == event_key for key, ts in self.processed_keys):
                 log(f"[{self.id}] Deduplicating event via lock, ignoring: {event_key}")
+                self.metrics.count(source_chat_id, COUNTER_DROPPED_DUPLICATE)
                 return
 
             self.processed_keys.append((event_key, current_time))
 
         # Filter by author type
-        author_type = self._get_author_type(message)
-        if author_type == "outgoing" and not rule.get("forward_outgoing", True): return
-        if author_type == "user" and not rule.get("forward_users", True): return
-        if author_type == "bot" and not rule.get("forward_bots", True): return
+        account = message_object.currentAccount
+        author_type = self._get_author_type(message, account)
+        if not self._is_author_type_allowed(author_type, rule):
+            self.metrics.count(source_chat_id, COUNTER_DROPPED_AUTHOR_TYPE)
+            return
 
         # Filter by specific author
         author_filter = rule.get("author_filter", "").strip()
         if author_filter and (author_type == "user" or author_type == "bot"):
             author_id = self._get_id_from_peer(message.from_id)
-            author_entity = self._get_chat_entity(author_id)
+            author_entity = self._get_chat_entity(author_id, account)
             allowed_authors = [t.strip().lower().lstrip('@') for t in author_filter.split(',') if t.strip()]
             match_found = False
             if str(author_id) in allowed_authors:
@@ -540,33 +1803,44 @@ class AutoForwarderPlugin(BasePlugin):
                     match_found = True
             if not match_found:
                 log(f"[{self.id}] Dropping message from '{self._get_entity_name(author_entity)}' due to author filter.")
+                self.metrics.count(source_chat_id, COUNTER_DROPPED_AUTHOR_FILTER)
                 return
 
         # Apply anti-spam rate limit
         if self.antispam_delay_seconds > 0:
-            author_id = get_user_config().getClientUserId() if message.out else self._get_id_from_peer(message.from_id)
+            author_id = UserConfig.getInstance(account).getClientUserId() if message.out else self._get_id_from_peer(message.from_id)
             if author_id:
                 current_time = time.time()
                 last_time = self.user_last_message_time.get(author_id)
                 if last_time and (current_time - last_time) < self.antispam_delay_seconds:
                     log(f"[{self.id}] Dropping message from user {author_id} due to anti-spam rate limit.")
+                    self.metrics.count(source_chat_id, COUNTER_DROPPED_ANTISPAM)
                     return
                 self.user_last_message_time[author_id] = current_time
                 if len(self.user_last_message_time) > self.USER_TIMESTAMP_CACHE_SIZE:
                     self.user_last_message_time.popitem(last=False)
 
-        # Defer forwarding if media is incomplete or reply object is missing
+        # Defer forwarding if media is incomplete or reply object is missing.
+        # Native forwards are resolved server-side and never need to wait.
+        is_native = rule.get("native_forward", False)
         is_media = hasattr(message, 'media') and message.media and not isinstance(message.media, TLRPC.TL_messageMediaEmpty)
         is_incomplete_media = is_media and not self._is_media_complete(message)
         is_reply = hasattr(message, 'reply_to') and message.reply_to is not None
         is_reply_object_missing = is_reply and not (hasattr(message_object, 'replyMessageObject') and message_object.replyMessageObject)
-        if is_incomplete_media or is_reply_object_missing:
+        if not is_native and (is_incomplete_media or is_reply_object_missing):
+            if event_key not in self.deferred_messages and len(self.deferred_messages) >= self.MAX_DEFERRED_MESSAGES:
+                # Too many messages already waiting; release the oldest one early to stay bounded.
+                oldest_key = next(iter(self.deferred_messages))
+                _, oldest_task = self.deferred_messages[oldest_key]
+                self.handler.removeCallbacks(oldest_task)
+                self._process_timed_out_message(oldest_key)
             if event_key not in self.deferred_messages:
                 reason = "incomplete media" if is_incomplete_media else "missing reply object"
                 log(f"[{self.id}] Deferring message due to {reason}. Key: {event_key}")
                 deferred_task = DeferredTask(self, event_key)
                 self.deferred_messages[event_key] = (message_object, deferred_task)
                 self.handler.postDelayed(deferred_task, self.deferral_timeout_ms)
+                self.metrics.count(source_chat_id, COUNTER_DEFERRED)
             return
 
         if event_key in self.deferred_messages:
@@ -579,9 +1853,11 @@ class AutoForwarderPlugin(BasePlugin):
     def _process_and_send(self, message_object, rule):
         """Performs final content checks and sends the message."""
         message = message_object.messageOwner
+        source_chat_id = self._get_id_from_peer(message.peer_id)
         
         # Filter by content type (text, photo, etc.)
         if not self._is_message_allowed_by_filters(message_object, rule):
+            self.metrics.count(source_chat_id, COUNTER_DROPPED_CONTENT_TYPE)
             return
 
         # Filter by keywords/regex (local and global)
@@ -589,34 +1865,35 @@ class AutoForwarderPlugin(BasePlugin):
         use_global_regex = rule.get("use_global_regex", False)
         global_pattern = self.get_setting(GLOBAL_KEYWORD_PATTERN, "").strip()
         
+        message_text = self._get_message_text([message_object])
         if keyword_pattern or (use_global_regex and global_pattern):
-            text_to_check = message.message or ""
-            if message_object.isDocument():
-                doc = getattr(message.media, 'document', None)
-                filename = self._get_document_filename(doc)
-                if filename:
-                    text_to_check = f"{text_to_check} {filename}".strip()
-            if not self._passes_combined_keyword_filter(text_to_check, keyword_pattern, use_global_regex, global_pattern):
+            if not self._passes_combined_keyword_filter(message_text, keyword_pattern, use_global_regex, global_pattern, source_chat_id):
+                self.metrics.count(source_chat_id, COUNTER_DROPPED_KEYWORD)
                 return
         
         # Filter by message length
         is_text_based = not message.media or isinstance(message.media, (TLRPC.TL_messageMediaEmpty, TLRPC.TL_messageMediaWebPage))
         if is_text_based:
-            if not (self.min_msg_length <= len(message.message or "") <= self.max_msg_length):
+            if not (self.min_msg_length <= message_text.length <= self.max_msg_length):
+                self.metrics.count(source_chat_id, COUNTER_DROPPED_LENGTH)
                 return
 
+        if rule.get("native_forward", False):
+            self._queue_native_forward(message, rule)
+            return
         self._send_forwarded_message(message_object, rule)
     
     def _process_timed_out_message(self, event_key):
         """Processes a message that was deferred after the timeout has passed."""
-        if event_key in self.deferred_messages:
+        deferred_entry = self.deferred_messages.pop(event_key, None)
+        if deferred_entry:
             log(f"[{self.id}] Processing deferred message after timeout. Key: {event_key}")
-            message_object, _ = self.deferred_messages[event_key]
+            message_object, _ = deferred_entry
             source_chat_id = self._get_id_from_peer(message_object.messageOwner.peer_id)
+            self.metrics.count(source_chat_id, COUNTER_TIMEOUT_RELEASED)
             rule = self.forwarding_rules.get(source_chat_id)
             if rule:
                 self._process_and_send(message_object, rule)
-            del self.deferred_messages[event_key]
 
     def _process_album(self, grouped_id):
         """Processes a collection of messages as a single album."""
@@ -636,116 +1913,725 @@ class AutoForwarderPlugin(BasePlugin):
 
         self._send_album(album_data['messages'], rule)
 
+    # --- Queue Overflow (Spill to Disk) ---
+    def _get_spill_file_path(self):
+        """Returns the path of the on-disk overflow file, or None if storage is unavailable."""
+        return self._get_cache_file_path(SPILL_FILE_NAME)
+
+    def _get_cache_file_path(self, file_name):
+        """Returns the path of a file in the plugin's cache folder, or None if storage is unavailable."""
+        try:
+            cache_dir = File(PluginsController.getInstance().pluginsDir, ".cache")
+            cache_dir.mkdirs()
+            return File(cache_dir, file_name).getAbsolutePath()
+        except Exception:
+            log(f"[{self.id}] Could not resolve cache file path: {traceback.format_exc()}")
+            return None
+
+    def _load_spill_state(self):
+        """
+        Counts messages left in the spill file by a previous session so they get rehydrated.
+        The file is append-only; records before the saved read offset were already restored.
+        """
+        path = self._get_spill_file_path()
+        with self.spill_lock:
+            self.spill_offset = self._read_spill_offset()
+            try:
+                with open(path, "rb") as spill_file:
+                    spill_file.seek(self.spill_offset)
+                    self.spill_pending_count = sum(1 for line in spill_file if line.strip())
+            except (OSError, TypeError):
+                self.spill_offset = self.spill_pending_count = 0
+
+    def _read_spill_offset(self):
+        try:
+            with open(self._get_cache_file_path(SPILL_OFFSET_FILE_NAME), "r") as offset_file:
+                return max(0, int(offset_file.read().strip() or 0))
+        except (OSError, TypeError, ValueError):
+            return 0
+
+    def _write_spill_offset(self):
+        path = self._get_cache_file_path(SPILL_OFFSET_FILE_NAME)
+        if not path:
+            return
+        try:
+            with open(path, "w") as offset_file:
+                offset_file.write(str(self.spill_offset))
+        except OSError:
+            log(f"[{self.id}] ERROR writing spill offset: {traceback.format_exc()}")
+
+    def _spill_message(self, chat_id, message_id):
+        """Appends a compact (chat id, msg id, rule key) record to the spill file instead of holding the message in memory."""
+        path = self._get_spill_file_path()
+        if not path:
+            log(f"[{self.id}] Queue full and no spill storage. Dropping message {message_id} from {chat_id}.")
+            return
+        with self.spill_lock:
+            try:
+                with open(path, "a") as spill_file:
+                    spill_file.write(json.dumps([chat_id, message_id, chat_id]) + "\n")
+                self.spill_pending_count += 1
+                self.spilled_total += 1
+                self.metrics.count(chat_id, COUNTER_SPILLED)
+            except OSError:
+                log(f"[{self.id}] ERROR writing spill file: {traceback.format_exc()}")
+
+    def _schedule_spill_rehydration(self):
+        """
+        Starts a rehydration batch on the async core once the queue has drained below half
+        the high-water mark. Called by the worker after every item, so it only checks counters;
+        one batch runs at a time, and a failed fetch is retried with backoff.
+        """
+        if self.spill_pending_count <= 0 or self.spill_rehydrating or time.monotonic() < self.spill_retry_at:
+            return
+        capacity = self.queue_high_water_mark // 2 - self.processing_queue.qsize()
+        if capacity <= 0:
+            return
+        self.spill_rehydrating = True
+        try:
+            self.async_core.submit(self._rehydrate_spilled_messages(min(capacity, self.SPILL_REHYDRATE_BATCH_SIZE)))
+        except Exception:
+            self.spill_rehydrating = False
+            log(f"[{self.id}] ERROR scheduling spill rehydration: {traceback.format_exc()}")
+
+    async def _rehydrate_spilled_messages(self, batch_size):
+        """
+        Moves the next batch of spilled messages back into the pipeline: they are fetched again
+        by id and re-triaged in the order they were spilled. The read offset only moves past a
+        batch once it is queued; records of chats whose fetch failed stay at the front of the file.
+        """
+        try:
+            path = self._get_spill_file_path()
+            if not path:
+                return
+            records, consumed = [], 0
+            with self.spill_lock:
+                try:
+                    with open(path, "rb") as spill_file:
+                        spill_file.seek(self.spill_offset)
+                        while consumed < batch_size:
+                            line = spill_file.readline()
+                            if not line:
+                                break
+                            if not line.strip():
+                                continue
+                            consumed += 1
+                            try:
+                                records.append(json.loads(line))
+                            except ValueError:
+                                log(f"[{self.id}] Skipping unreadable spill record: {line[:80]!r}")
+                        batch_end = spill_file.tell()
+                except OSError:
+                    log(f"[{self.id}] ERROR reading spill file: {traceback.format_exc()}")
+                    self._reset_spill_file(path)
+                    return
+
+            message_ids_by_chat = collections.OrderedDict()
+            for chat_id, message_id, rule_key in records:
+                if rule_key in self.forwarding_rules:
+                    message_ids_by_chat.setdefault(chat_id, []).append(message_id)
+            messages, failed_chats = {}, set()
+            for chat_id, message_ids in message_ids_by_chat.items():
+                try:
+                    for message in await self._fetch_messages_by_ids_async(chat_id, message_ids):
+                        messages[(chat_id, message.id)] = message
+                except (RequestError, asyncio.TimeoutError) as e:
+                    log(f"[{self.id}] Could not fetch spilled messages of {chat_id}: {getattr(getattr(e, 'error', None), 'text', None) or 'timed out'}")
+                    failed_chats.add(chat_id)
+
+            restored, lost = 0, []
+            for chat_id, message_id, rule_key in records:
+                if chat_id in failed_chats or rule_key not in self.forwarding_rules:
+                    continue
+                message = messages.get((chat_id, message_id))
+                message_obj = self._create_message_object_safely(message, self._get_source_account(chat_id)) if message else None
+                if message_obj:
+                    restored += 1
+                    self.handle_message_event(message_obj, from_spill=True)
+                else:
+                    lost.append((chat_id, message_id, rule_key))
+            failed = [record for record in records if record[0] in failed_chats]
+            with self.spill_lock:
+                if failed and not self._requeue_spill_records(path, failed, batch_end):
+                    lost.extend(failed)
+                    failed = []
+                if not failed:
+                    self.spill_offset = batch_end
+                self.spill_pending_count -= consumed - len(failed)
+                if self.spill_pending_count <= 0:
+                    self._reset_spill_file(path)
+                else:
+                    self._write_spill_offset()
+            self.rehydrated_total += restored
+            if lost:
+                # Deleted since they were spilled, or no longer readable; either way they cannot be forwarded.
+                self.spill_lost_total += len(lost)
+                for chat_id, message_id, rule_key in lost:
+                    self.metrics.count(rule_key, COUNTER_SPILL_LOST)
+                log(f"[{self.id}] Could not restore {len(lost)} spilled message(s): {', '.join(f'{chat_id}/{message_id}' for chat_id, message_id, _ in lost[:10])}")
+            if failed:
+                self.spill_failures += 1
+                self.spill_retry_at = time.monotonic() + self._get_retry_delay(self.spill_failures)
+            else:
+                self.spill_failures = 0
+            log(f"[{self.id}] Rehydrated {restored} spilled message(s); {self.spill_pending_count} still on disk.")
+        except Exception:
+            log(f"[{self.id}] ERROR rehydrating spilled messages: {traceback.format_exc()}")
+        finally:
+            self.spill_rehydrating = False
+
+    def _requeue_spill_records(self, path, records, batch_end):
+        """
+        Rewrites the spill file as the given records followed by everything after the batch.
+        Returns False if that failed, and the records are dropped. Caller holds spill_lock.
+        """
+        try:
+            with open(path, "rb") as spill_file:
+                spill_file.seek(batch_end)
+                rest = spill_file.read()
+            with open(path + ".tmp", "wb") as spill_file:
+                spill_file.write("".join(json.dumps(record) + "\n" for record in records).encode())
+                spill_file.write(rest)
+            os.replace(path + ".tmp", path)
+            self.spill_offset = 0
+            return True
+        except OSError:
+            log(f"[{self.id}] ERROR rewriting spill file, dropping {len(records)} spilled message(s): {traceback.format_exc()}")
+            return False
+
+    def _reset_spill_file(self, path):
+        """Empties a fully restored spill file. Caller holds spill_lock."""
+        try:
+            open(path, "w").close()
+        except OSError:
+            log(f"[{self.id}] ERROR truncating spill file: {traceback.format_exc()}")
+        self.spill_offset = self.spill_pending_count = 0
+        self._write_spill_offset()
+
+    def _get_queue_status_text(self):
+        """Summarises queue depth and spill counters for the settings screen."""
+        return (f"Queue: {self.processing_queue.qsize()} / {self.queue_high_water_mark}  •  "
+                f"Albums: {len(self.album_buffer)}  •  Deferred: {len(self.deferred_messages)}\n"
+                f"Spilled: {self.spill_pending_count} waiting, {self.spilled_total} total, {self.rehydrated_total} restored, {self.spill_lost_total} lost")
+
+    def _record_notification_trace(self, account, messages_list):
+        """Summarises a notification batch for the trace recorder."""
+        try:
+            entries = []
+            for i in range(messages_list.size()):
+                message_object = messages_list.get(i)
+                message = getattr(message_object, 'messageOwner', None)
+                if not message: continue
+                peer_id = self._get_id_from_peer(message.peer_id)
+                is_reply = message.reply_to is not None
+                reply_state = (2 if getattr(message_object, 'replyMessageObject', None) else 1) if is_reply else 0
+                has_media = message.media and not isinstance(message.media, TLRPC.TL_messageMediaEmpty)
+                entries.append((
+                    peer_id, self._get_id_from_peer(message.from_id), message.id, message.grouped_id or 0,
+                    self._get_media_kind(message_object), not has_media or self._is_media_complete(message),
+                    len(message.message or ""), reply_state, bool(message.out), peer_id in self.forwarding_rules
+                ))
+            if not self.trace_recorder.record(account, entries):
+                log(f"[{self.id}] Trace recording stopped (size limit reached).")
+                self.trace_recorder = None
+        except Exception:
+            log(f"[{self.id}] ERROR recording notification trace: {traceback.format_exc()}")
+
+    def _toggle_trace_recording(self):
+        """Starts or stops the notification trace recorder."""
+        if self.trace_recorder:
+            batches = self.trace_recorder.batches_written
+            self._stop_trace_recording()
+            BulletinHelper.show_success(f"Trace saved ({batches} batches).", get_last_fragment())
+        else:
+            path = self._get_cache_file_path(TRACE_FILE_NAME)
+            if not path:
+                BulletinHelper.show_error("Trace file could not be created.", get_last_fragment())
+                return
+            try:
+                self.trace_recorder = NotificationTraceRecorder(path)
+            except Exception:
+                log(f"[{self.id}] ERROR starting trace recording: {traceback.format_exc()}")
+                BulletinHelper.show_error("Trace file could not be created.", get_last_fragment())
+                return
+            BulletinHelper.show_info("Recording notification trace...", get_last_fragment())
+        self._refresh_settings_ui()
+
+    def _stop_trace_recording(self):
+        recorder, self.trace_recorder = self.trace_recorder, None
+        if recorder:
+            recorder.close()
+
+    def _get_latency_summary_text(self):
+        """Summarises p50/p99 latency per pipeline stage for the settings screen."""
+        def format_ms(value):
+            if value is None: return "–"
+            if value == float("inf"): return f">{LATENCY_BUCKETS_MS[-1] // 1000}s"
+            return f"{value}ms" if value < 1000 else f"{value // 1000}s"
+        lines = []
+        for stage, name in enumerate(LATENCY_STAGES):
+            p50, p99 = self.metrics.percentile_ms(stage, 0.5), self.metrics.percentile_ms(stage, 0.99)
+            lines.append(f"{name.capitalize()}: p50 ≤ {format_ms(p50)}, p99 ≤ {format_ms(p99)}")
+        return "\n".join(lines)
+
+    def _get_counter_summary_text(self):
+        """Summarises forwarded/dropped totals across all rules."""
+        totals = self.metrics.totals()
+        dropped = sum(value for name, value in totals.items() if name.startswith("dropped_"))
+        summary = (f"Forwarded: {totals['forwarded']}  •  Dropped: {dropped}  •  Errors: {totals['send_errors']}  •  Retries: {totals['retried']}\n"
+                   f"Deferred: {totals['deferred']}  •  Released on timeout: {totals['timeout_released']}  •  Peak queue: {self.metrics.max_queue_depth}")
+        if totals["dry_run"]:
+            summary += f"\nDry run: {totals['dry_run']} would have been sent"
+        return summary
+
+    def _export_statistics(self):
+        """Copies the full metrics snapshot to the clipboard as JSON."""
+        snapshot = self.metrics.snapshot(self.processing_queue.qsize())
+        self._copy_to_clipboard(json.dumps(snapshot, indent=2), "Statistics", toast_text="Statistics copied to clipboard!")
+
+    def _reset_statistics(self):
+        """Clears all latency histograms and rule counters."""
+        self.metrics.reset()
+        BulletinHelper.show_success("Statistics have been reset.", get_last_fragment())
+        self._refresh_settings_ui()
+
+    def _show_dead_letters(self):
+        """Lists sends that gave up after their retries, with options to copy them or send them again."""
+        activity = get_last_fragment().getParentActivity()
+        if not activity: return
+        entries = list(self.dead_letters)
+        if not entries:
+            BulletinHelper.show_info("No failed sends.", get_last_fragment())
+            return
+        lines = []
+        for entry in reversed(entries):
+            when = time.strftime("%H:%M:%S", time.localtime(entry["time"]))
+            source = self._get_chat_name(entry["source"]) if entry["source"] is not None else "–"
+            lines.append(f"• {when} {source} → {self._get_chat_name(entry['destination'])}: {entry['error']} ({entry['attempts']} attempts)")
+        report = [{key: value for key, value in entry.items() if key != "retry"} for entry in entries]
+
+        builder = AlertDialogBuilder(activity)
+        builder.set_title(f"Failed Sends ({len(entries)})")
+        builder.set_message("\n".join(lines))
+        builder.set_positive_button("Close", lambda b, w: b.dismiss())
+        builder.set_negative_button("Retry All", lambda b, w: self._retry_dead_letters())
+        builder.set_neutral_button("Copy", lambda b, w: self._copy_to_clipboard(json.dumps(report, indent=2), "Failed sends", toast_text="Failed sends copied to clipboard!"))
+        builder.show()
+
+    def _retry_dead_letters(self):
+        """Sends every dead-lettered request again, with a fresh retry budget and freshly resolved destinations."""
+        entries = list(self.dead_letters)
+        self.dead_letters.clear()
+        self._invalidate_send_contexts()
+        for entry in entries:
+            entry["retry"]()
+        BulletinHelper.show_info(f"Retrying {len(entries)} failed send(s).", get_last_fragment())
+        self._refresh_settings_ui()
+
+    def _show_background_jobs(self):
+        """Lists queued and running background jobs with their progress, with an option to cancel them."""
+        activity = get_last_fragment().getParentActivity()
+        if not activity: return
+        jobs = self.async_core.list_jobs()
+        if not jobs:
+            BulletinHelper.show_info("No background jobs running.", get_last_fragment())
+            return
+        builder = AlertDialogBuilder(activity)
+        builder.set_title(f"Background Jobs ({len(jobs)})")
+        builder.set_message("\n".join(f"• {job.describe()}" for job in jobs))
+        builder.set_positive_button("Close", lambda b, w: b.dismiss())
+        builder.set_negative_button("Cancel All", lambda b, w: self._cancel_background_jobs())
+        builder.show()
+
+    def _cancel_background_jobs(self):
+        """Cancels all background jobs. Sends they already queued still go out."""
+        cancelled = self.async_core.cancel_jobs()
+        BulletinHelper.show_info(f"Cancelled {cancelled} background job(s).", get_last_fragment())
+        self._refresh_settings_ui()
+
+    def _get_content_key(self, message):
+        """Builds a content fingerprint from the media id and the normalized text."""
+        media = getattr(message, 'media', None)
+        media_key = None
+        if media:
+            photo = getattr(media, 'photo', None)
+            document = getattr(media, 'document', None)
+            if photo and getattr(photo, 'id', 0):
+                media_key = ("photo", photo.id)
+            elif document and getattr(document, 'id', 0):
+                media_key = ("document", document.id)
+        normalized_text = " ".join((message.message or "").split()).lower()
+        if not media_key and not normalized_text:
+            return None
+        return (media_key, hash(normalized_text) if normalized_text else 0)
+
+    def _is_duplicate_content(self, message, destination_id, account=None):
+        """
+        Checks whether the same content was already sent to this destination by this account
+        within the content dedup window, or is on its way there. If not, the content is reserved
+        until its send settles (see _settle_sent_content): only a successful send records it,
+        so a failed or dry-run send does not block a later one.
+        """
+        if self.content_dedup_window_seconds <= 0:
+            return False
+        content_key = self._get_content_key(message)
+        if content_key is None:
+            return False
+        cache_key = (account, destination_id, content_key)
+        current_time = time.time()
+        with self.lock:
+            for cache in (self.processed_files_cache, self.pending_content):
+                last_time = cache.get(cache_key)
+                if last_time is not None and current_time - last_time < self.content_dedup_window_seconds:
+                    cache.move_to_end(cache_key)
+                    return True
+            if not self.dry_run_live:
+                self.pending_content[cache_key] = current_time
+                self.pending_content.move_to_end(cache_key)
+                while len(self.pending_content) > self.PROCESSED_FILES_CACHE_SIZE:
+                    self.pending_content.popitem(last=False)
+        return False
+
+    def _settle_sent_content(self, messages, destination_id, account=None, sent=True):
+        """Releases the reserved content of messages sent to a destination, recording it if the send succeeded."""
+        if self.content_dedup_window_seconds <= 0:
+            return
+        current_time = time.time()
+        with self.lock:
+            for message in messages:
+                content_key = self._get_content_key(message)
+                if content_key is None:
+                    continue
+                cache_key = (account, destination_id, content_key)
+                self.pending_content.pop(cache_key, None)
+                if sent:
+                    self.processed_files_cache[cache_key] = current_time
+                    self.processed_files_cache.move_to_end(cache_key)
+            while len(self.processed_files_cache) > self.PROCESSED_FILES_CACHE_SIZE:
+                self.processed_files_cache.popitem(last=False)
+
     # --- Message Sending and Formatting ---
-    def _send_forwarded_message(self, message_object, rule):
-        """Constructs and sends a single forwarded/copied message."""
+    def _send_forwarded_message(self, message_object, rule, priority=PRIORITY_LIVE):
+        """Constructs a single forwarded/copied message once and sends it to every destination."""
         message = message_object.messageOwner
         if not message: return
         
-        to_peer_id = rule["destination"]
-        drop_author = rule.get("drop_author", True)
-        quote_replies = rule.get("quote_replies", True)
-        topic_id = rule.get("destination_topic_id", 0)
+        source_chat_id = self._get_id_from_peer(message.peer_id)
+        account = self._get_rule_account(rule)
+        destinations = []
+        for to_peer_id, topic_id in self._get_rule_destinations(rule):
+            if self._is_duplicate_content(message, to_peer_id, account):
+                log(f"[{self.id}] Skipping destination {to_peer_id} for message {message.id} – same content already sent.")
+                self.metrics.count(source_chat_id, COUNTER_DROPPED_CONTENT_DEDUP)
+                continue
+            destinations.append((to_peer_id, topic_id))
+        if not destinations:
+            return
         
         try:
-            input_media = self._get_input_media(message_object)
-            has_media = bool(input_media)
-            has_text = bool(message.message)
-
-            original_text = ""
-            if has_text:
-                filters = rule.get("filters", {})
-                if has_media and filters.get("media_captions", True):
-                    original_text = message.message
-                elif not has_media and filters.get("text", True):
-                    original_text = message.message
-            original_entities = message.entities if original_text else None
-
-            prefix_text, prefix_entities = "", ArrayList()
-            if not drop_author:
-                source_entity = self._get_chat_entity(self._get_id_from_peer(message.peer_id))
-                author_entity = self._get_chat_entity(self._get_id_from_peer(message.from_id))
-                if source_entity:
-                    header_text, header_entities = self._build_forward_header(message, source_entity, author_entity)
-                    if header_text: prefix_text += header_text
-                    if header_entities: prefix_entities.addAll(header_entities)
-            
-            if quote_replies:
-                quote_text, quote_entities = self._build_reply_quote(message_object)
-                if quote_text:
-                    if prefix_text: prefix_text += "\n\n"
-                    if quote_entities:
-                        for i in range(quote_entities.size()):
-                            entity = quote_entities.get(i)
-                            entity.offset += self._get_java_len(prefix_text)
-                        prefix_entities.addAll(quote_entities)
-                    prefix_text += quote_text
+            input_media, message_text, entities = self._build_message_payload(message_object, rule)
+            if not input_media and not message_text.strip():
+                return
             
-            message_text = f"{prefix_text}\n\n{original_text}".strip()
-            entities = self._prepare_final_entities(prefix_text, prefix_entities, original_entities)
-
-            req = None
-            if input_media:
-                req = TLRPC.TL_messages_sendMedia()
-                req.media, req.message = input_media, message_text
-            elif message_text.strip():
-                req = TLRPC.TL_messages_sendMessage()
-                req.message = message_text
+            def make_result_handler(to_peer_id):
+                def handle_send_result(response, error):
+                    sent = not error and bool(response)
+                    self._settle_sent_content((message,), to_peer_id, account, sent)
+                    if sent:
+                        self._update_last_seen_id(source_chat_id, message.id)
+                return handle_send_result
             
-            if req:
-                req.peer = get_messages_controller().getInputPeer(to_peer_id)
-                req.random_id = random.getrandbits(63)
-                if topic_id > 0:
-                    req.reply_to = TLRPC.TL_inputReplyToMessage()
-                    req.reply_to.reply_to_msg_id = topic_id
-                    req.flags |= 1
+            for to_peer_id, topic_id in destinations:
+                if input_media:
+                    req = TLRPC.TL_messages_sendMedia()
+                    req.media, req.message = input_media, message_text
+                else:
+                    req = TLRPC.TL_messages_sendMessage()
+                    req.message = message_text
                 if entities and not entities.isEmpty():
                     req.entities = entities
                     req.flags |= 8
-                
-                source_chat_id = self._get_id_from_peer(message.peer_id)
-                def handle_send_result(response, error):
-                    if not error and response:
-                        self._update_last_seen_id(source_chat_id, message.id)
-                
-                send_request(req, RequestCallback(handle_send_result))
+                self._stamp_destination(req, to_peer_id, topic_id, account)
+                req.random_id = random.getrandbits(63)
+                self._dispatch_request(req, to_peer_id, make_result_handler(to_peer_id), priority, source_chat_id, id_links=[(req.random_id, message.id)], account=account)
         except Exception:
             log(f"[{self.id}] ERROR in _send_forwarded_message: {traceback.format_exc()}")
-            
+
+    def _build_message_payload(self, message_object, rule):
+        """Builds the destination-independent parts of a copied message: media, text and entities."""
+        message = message_object.messageOwner
+        drop_author = rule.get("drop_author", True)
+        quote_replies = rule.get("quote_replies", True)
+        
+        input_media = self._get_input_media(message_object)
+        has_media = bool(input_media)
+        has_text = bool(message.message)
+
+        original_text = ""
+        if has_text:
+            filters = rule.get("filters", {})
+            if has_media and filters.get("media_captions", True):
+                original_text = message.message
+            elif not has_media and filters.get("text", True):
+                original_text = message.message
+        original_entities = message.entities if original_text else None
+
+        prefix_text, prefix_entities = self._build_prefix(message_object, drop_author, quote_replies)
+        
+        message_text = f"{prefix_text}\n\n{original_text}".strip()
+        entities = self._prepare_final_entities(prefix_text, prefix_entities, original_entities)
+        return input_media, message_text, entities
+
+    def _build_prefix(self, message_object, drop_author, quote_replies):
+        """Builds the optional forward header and reply quote that precede the copied text."""
+        message = message_object.messageOwner
+        prefix_text, prefix_entities = "", ArrayList()
+        if not drop_author:
+            account = message_object.currentAccount
+            source_entity = self._get_chat_entity(self._get_id_from_peer(message.peer_id), account)
+            author_entity = self._get_chat_entity(self._get_id_from_peer(message.from_id), account)
+            if source_entity:
+                header_text, header_entities = self._build_forward_header(message, source_entity, author_entity, account)
+                if header_text: prefix_text += header_text
+                if header_entities: prefix_entities.addAll(header_entities)
+        
+        if quote_replies:
+            quote_text, quote_entities = self._build_reply_quote(message_object)
+            if quote_text:
+                if prefix_text: prefix_text += "\n\n"
+                if quote_entities:
+                    for i in range(quote_entities.size()):
+                        entity = quote_entities.get(i)
+                        entity.offset += utf16_len(prefix_text)
+                    prefix_entities.addAll(quote_entities)
+                prefix_text += quote_text
+        return prefix_text, prefix_entities
+
+    def _stamp_destination(self, req, to_peer_id, topic_id, account=None):
+        """Sets the per-destination fields (peer and topic) on a send request, with the sending account's access hash."""
+        self._get_send_context(to_peer_id, account).stamp(req, topic_id)
+
+    def _get_send_context(self, to_peer_id, account=None):
+        """
+        Returns the cached SendContext of a destination, resolving its InputPeer on first use or
+        once a failed destination is due to be checked again. A peer resolved without an access
+        hash (the chat was not loaded yet) is not cached.
+        """
+        key = (account, to_peer_id)
+        with self.lock:
+            context = self.send_contexts.get(key)
+        if context and (not context.error or time.monotonic() < context.recheck_at):
+            return context
+        context = SendContext(self._get_messages_controller(account).getInputPeer(to_peer_id))
+        if getattr(context.peer, 'access_hash', None) != 0:
+            with self.lock:
+                self.send_contexts[key] = context
+        return context
+
+    def _invalidate_send_contexts(self, to_peer_id=None, account=None):
+        """Drops cached send contexts (all, or one destination's), so peers are resolved again."""
+        with self.lock:
+            if to_peer_id is None:
+                self.send_contexts.clear()
+            else:
+                self.send_contexts.pop((account, to_peer_id), None)
+
+    def _dispatch_request(self, req, to_peer_id, on_result=None, priority=PRIORITY_LIVE, rule_key=None, message_count=1, id_links=None, account=None):
+        """
+        Hands a request to the sending account's dispatcher, honouring the per-destination minimum
+        interval. The account defaults to that of the rule_key's rule. Requests for different destinations go out in parallel; a destination
+        that is still cooling down gets its request queued after the remaining delay.
+        `id_links` pairs each random_id of the request with the source message id it copies,
+        so the copies can be recorded in the ID map once the server assigns their ids.
+
+        Failed sends are retried by error class (see classify_send_error) with jittered
+        exponential backoff; expired file references are refreshed from the source first, and
+        a stale peer is resolved again. on_result only sees the final outcome; a retry rejected
+        because an earlier attempt got through counts as a success. Sends that give up
+        go to the dead-letter list; a destination that turned out unusable fails later sends
+        right away until its send context is checked again.
+        """
+        if self.dry_run_live:
+            # Everything up to here ran for real; only the request itself is withheld.
+            if rule_key is not None:
+                self.metrics.count(rule_key, COUNTER_DRY_RUN, message_count)
+            return
+
+        if account is None:
+            account = self._get_source_account(rule_key)
+        dispatcher = self._get_send_dispatcher(account)
+        submitted_at = [time.monotonic()]
+        sent_at = [submitted_at[0]]
+        retries = [0]
+
+        def send():
+            sent_at[0] = time.monotonic()
+            self.metrics.observe(STAGE_DISPATCH, sent_at[0] - submitted_at[0])
+            send_request_on(account, req, callback)
+
+        def resend(delay_seconds):
+            # The random_id stays the same, so retrying a send that did get through is rejected, not duplicated.
+            retries[0] += 1
+            submitted_at[0] = time.monotonic() + delay_seconds
+            if rule_key is not None:
+                self.metrics.count(rule_key, COUNTER_RETRIED)
+            if delay_seconds <= 0:
+                dispatcher.submit(priority, send)
+            else:
+                self.handler.postDelayed(DelayedSendTask(dispatcher, priority, send), int(delay_seconds * 1000))
+
+        def give_up(response, error, error_class):
+            if error_class in (SEND_ERROR_DESTINATION, SEND_ERROR_PEER):
+                context = self._get_send_context(to_peer_id, account)
+                if context.error is None:
+                    context.fail(error)
+            if rule_key is not None:
+                self.metrics.count(rule_key, COUNTER_SEND_ERRORS)
+            self._add_dead_letter(req, to_peer_id, rule_key, id_links, error, error_class, retries[0] + 1,
+                                  lambda: self._dispatch_request(req, to_peer_id, on_result, priority, rule_key, message_count, id_links, account))
+            if on_result:
+                on_result(response, error)
+
+        def refresh_and_resend(response, error):
+            if self._refresh_file_references(req, rule_key, id_links, account):
+                resend(0)
+            else:
+                give_up(response, error, SEND_ERROR_FILE_REFERENCE)
+
+        def on_response(response, error):
+            self.metrics.observe(STAGE_ACK, time.monotonic() - sent_at[0])
+            if not error and response:
+                if rule_key is not None:
+                    self.metrics.count(rule_key, COUNTER_FORWARDED, message_count)
+                    if id_links and self.id_map:
+                        self._record_message_ids(response, rule_key, to_peer_id, id_links)
+                if on_result:
+                    on_result(response, error)
+                return
+
+            error_class = classify_send_error(error)
+            flood_wait_seconds = self._get_flood_wait_seconds(error)
+            if flood_wait_seconds:
+                log(f"[{self.id}] FLOOD_WAIT of {flood_wait_seconds}s. Pausing all sends of account {account}.")
+                dispatcher.pause(flood_wait_seconds)
+            if error_class == SEND_ERROR_ALREADY_SENT:
+                # An earlier attempt got through even though its response was lost. The copies'
+                # ids were in the lost response, so they cannot be added to the ID map.
+                if rule_key is not None:
+                    self.metrics.count(rule_key, COUNTER_FORWARDED, message_count)
+                if on_result:
+                    on_result(TLRPC.TL_boolTrue(), None)
+                return
+            if retries[0] >= SEND_RETRY_LIMITS.get(error_class, 0):
+                give_up(response, error, error_class)
+                return
+            log(f"[{self.id}] Send to {to_peer_id} failed ({getattr(error, 'text', error)}), retry {retries[0] + 1} as {error_class}.")
+            if error_class == SEND_ERROR_FILE_REFERENCE:
+                # Refetching the source blocks on the network, so it runs off the callback thread.
+                self.async_core.run_blocking(refresh_and_resend, response, error)
+            elif error_class == SEND_ERROR_PEER:
+                self._invalidate_send_contexts(to_peer_id, account)
+                peer = self._get_send_context(to_peer_id, account).peer
+                if isinstance(req, TLRPC.TL_messages_forwardMessages): req.to_peer = peer
+                else: req.peer = peer
+                resend(0)
+            elif error_class == SEND_ERROR_FLOOD:
+                # A FLOOD_WAIT has paused the whole lane already; slow mode only concerns this chat.
+                resend(0 if flood_wait_seconds else self._get_wait_seconds(error) or self._get_retry_delay(retries[0]))
+            else:
+                resend(self._get_retry_delay(retries[0]))
+
+        failed_error = self._get_send_context(to_peer_id, account).error
+        if failed_error is not None:
+            # An earlier send found this destination unusable; no need to ask the server again.
+            give_up(None, failed_error, SEND_ERROR_DESTINATION)
+            return
+
+        callback = RequestCallback(on_response)
+        delay_ms = 0
+        if self.destination_interval_seconds > 0:
+            with self.lock:
+                current_time = time.time()
+                send_at = max(current_time, self.destination_next_send_time.get((account, to_peer_id), 0))
+                self.destination_next_send_time[(account, to_peer_id)] = send_at + self.destination_interval_seconds
+            delay_ms = int((send_at - current_time) * 1000)
+        if delay_ms <= 0:
+            dispatcher.submit(priority, send)
+        else:
+            self.handler.postDelayed(DelayedSendTask(dispatcher, priority, send), delay_ms)
+
+    def _get_flood_wait_seconds(self, error):
+        """Extracts the wait time from a FLOOD_WAIT_X error, or returns 0."""
+        match = re.search(r'FLOOD_WAIT_(\d+)', getattr(error, 'text', None) or "") if error else None
+        return int(match.group(1)) if match else 0
+
+    def _get_wait_seconds(self, error):
+        """Extracts the wait time from any *_WAIT_X error (e.g. SLOWMODE_WAIT_X), or returns 0."""
+        match = re.search(r'_WAIT_(\d+)', getattr(error, 'text', None) or "") if error else None
+        return int(match.group(1)) if match else 0
+
+    def _get_retry_delay(self, retry_index):
+        """Exponential backoff with jitter, so failed sends to one destination do not retry in lockstep."""
+        return min(RETRY_MAX_DELAY_SECONDS, RETRY_BASE_DELAY_SECONDS * (2 ** retry_index)) * random.uniform(0.5, 1.0)
+
+    def _refresh_file_references(self, req, source_chat_id, id_links, account=None):
+        """
+        Refetches the source messages of a media send and rebuilds their InputMedia with fresh
+        file references. Returns False if the request has no media or a source message is gone.
+        """
+        if not id_links or source_chat_id is None:
+            return False
+        if isinstance(req, TLRPC.TL_messages_sendMedia):
+            items = [req]
+        elif isinstance(req, TLRPC.TL_messages_sendMultiMedia):
+            items = [req.multi_media.get(i) for i in range(req.multi_media.size())]
+        else:
+            return False
+        try:
+            source_ids = dict(id_links)
+            messages = {message.id: message for message in self._fetch_messages_by_ids(source_chat_id, list(source_ids.values()))}
+            for item in items:
+                message_object = self._create_message_object_safely(messages.get(source_ids.get(item.random_id)), account)
+                input_media = self._get_input_media(message_object) if message_object else None
+                if not input_media:
+                    return False
+                item.media = input_media
+            return True
+        except Exception:
+            log(f"[{self.id}] ERROR in _refresh_file_references: {traceback.format_exc()}")
+            return False
+
+    def _add_dead_letter(self, req, to_peer_id, source_chat_id, id_links, error, error_class, attempts, retry):
+        """Keeps a send that gave up, with enough context to inspect it and send it again."""
+        error_text = getattr(error, 'text', None) or "No response"
+        log(f"[{self.id}] Giving up on {type(req).__name__} to {to_peer_id} after {attempts} attempt(s): {error_text}")
+        self.dead_letters.append({
+            "time": int(time.time()), "source": source_chat_id, "destination": to_peer_id,
+            "request": type(req).__name__.replace("TL_", ""), "messages": [message_id for _, message_id in id_links or []],
+            "error": error_text, "error_class": error_class, "attempts": attempts, "retry": retry,
+        })
+
     def _send_album(self, message_objects, rule):
-        """Constructs and sends a multi-media message (album)."""
+        """Constructs a multi-media message (album) once and sends it to every destination."""
         if not message_objects: return
         
-        to_peer_id = rule["destination"]
-        drop_author = rule.get("drop_author", True)
-        quote_replies = rule.get("quote_replies", True)
         filters = rule.get("filters", {})
         keyword_pattern = rule.get("keyword_pattern", "").strip()
         use_global_regex = rule.get("use_global_regex", False)
         global_pattern = self.get_setting(GLOBAL_KEYWORD_PATTERN, "").strip()
-        topic_id = rule.get("destination_topic_id", 0)
 
         try:
             if keyword_pattern or (use_global_regex and global_pattern):
-                full_text_to_check = ""
+                album_chat_id = self._get_id_from_peer(message_objects[0].messageOwner.peer_id)
+                album_text = self._get_message_text(message_objects)
+                if not self._passes_combined_keyword_filter(album_text, keyword_pattern, use_global_regex, global_pattern, album_chat_id): return
+
+            if rule.get("native_forward", False):
                 for msg_obj in message_objects:
-                    msg = msg_obj.messageOwner
-                    if not msg: continue
-                    if msg.message: full_text_to_check += f" {msg.message}"
-                    if msg_obj.isDocument():
-                        doc = getattr(msg.media, 'document', None)
-                        filename = self._get_document_filename(doc)
-                        if filename: full_text_to_check += f" {filename}"
-                if not self._passes_combined_keyword_filter(full_text_to_check.strip(), keyword_pattern, use_global_regex, global_pattern): return
-
-            req = TLRPC.TL_messages_sendMultiMedia()
-            req.peer = get_messages_controller().getInputPeer(to_peer_id)
-            if topic_id > 0:
-                req.reply_to = TLRPC.TL_inputReplyToMessage()
-                req.reply_to.reply_to_msg_id = topic_id
-                req.flags |= 1
-                
-            multi_media_list = ArrayList()
+                    if msg_obj.messageOwner and self._is_message_allowed_by_filters(msg_obj, rule):
+                        self._queue_native_forward(msg_obj.messageOwner, rule)
+                return
+
             album_caption, album_entities = "", None
             if filters.get("media_captions", True):
                 for msg_obj in message_objects:
@@ -753,68 +2639,150 @@ class AutoForwarderPlugin(BasePlugin):
                         album_caption, album_entities = msg_obj.messageOwner.message, msg_obj.messageOwner.entities
                         break
 
-            first_message_obj, first_message = message_objects[0], message_objects[0].messageOwner
-            
-            prefix_text, prefix_entities = "", ArrayList()
-            if not drop_author:
-                source_entity = self._get_chat_entity(self._get_id_from_peer(first_message.peer_id))
-                author_entity = self._get_chat_entity(self._get_id_from_peer(first_message.from_id))
-                if source_entity:
-                    header_text, header_entities = self._build_forward_header(first_message, source_entity, author_entity)
-                    if header_text: prefix_text += header_text
-                    if header_entities: prefix_entities.addAll(header_entities)
-            
-            if quote_replies:
-                quote_text, quote_entities = self._build_reply_quote(first_message_obj)
-                if quote_text:
-                    if prefix_text: prefix_text += "\n\n"
-                    if quote_entities:
-                        for i in range(quote_entities.size()):
-                            entity = quote_entities.get(i)
-                            entity.offset += self._get_java_len(prefix_text)
-                        prefix_entities.addAll(quote_entities)
-                    prefix_text += quote_text
+            prefix_text, prefix_entities = self._build_prefix(message_objects[0], rule.get("drop_author", True), rule.get("quote_replies", True))
+            final_caption = f"{prefix_text}\n\n{album_caption}".strip()
+            final_entities = self._prepare_final_entities(prefix_text, prefix_entities, album_entities)
             
-            header_attached = False
+            album_items = []
             for original_msg_obj in message_objects:
-                current_msg_obj = original_msg_obj
-                if not self._is_message_allowed_by_filters(current_msg_obj, rule): continue
-                input_media = self._get_input_media(current_msg_obj)
+                if not self._is_message_allowed_by_filters(original_msg_obj, rule): continue
+                input_media = self._get_input_media(original_msg_obj)
                 if not input_media: 
                     log(f"[{self.id}] Album item dropped – failed to build InputMedia for msg {original_msg_obj.messageOwner.id}")
                     continue
+                album_items.append((original_msg_obj.messageOwner, input_media))
+
+            source_chat_id = self._get_id_from_peer(message_objects[0].messageOwner.peer_id)
+            account = self._get_rule_account(rule)
+            def make_result_handler(to_peer_id, sent_messages):
+                def handle_album_result(response, error):
+                    self._settle_sent_content(sent_messages, to_peer_id, account, not error and bool(response))
+                return handle_album_result
+
+            for to_peer_id, topic_id in self._get_rule_destinations(rule):
+                multi_media_list, id_links, sent_messages = ArrayList(), [], []
+                for item_message, input_media in album_items:
+                    if self._is_duplicate_content(item_message, to_peer_id, account):
+                        log(f"[{self.id}] Album item dropped – same content already sent to {to_peer_id}.")
+                        self.metrics.count(source_chat_id, COUNTER_DROPPED_CONTENT_DEDUP)
+                        continue
+                    sent_messages.append(item_message)
+                    single_media = TLRPC.TL_inputSingleMedia()
+                    single_media.media = input_media
+                    single_media.random_id = random.getrandbits(63)
+                    id_links.append((single_media.random_id, item_message.id))
+                    if multi_media_list.isEmpty():
+                        single_media.message = final_caption
+                        if final_entities and not final_entities.isEmpty():
+                            single_media.entities = final_entities
+                            single_media.flags |= 1
+                    else:
+                        single_media.message = ""
+                    multi_media_list.add(single_media)
+
+                if not multi_media_list.isEmpty():
+                    req = TLRPC.TL_messages_sendMultiMedia()
+                    self._stamp_destination(req, to_peer_id, topic_id, account)
+                    req.multi_media = multi_media_list
+                    self._dispatch_request(req, to_peer_id, make_result_handler(to_peer_id, sent_messages), rule_key=source_chat_id, message_count=multi_media_list.size(), id_links=id_links, account=account)
+        except Exception:
+            log(f"[{self.id}] ERROR in _send_album: {traceback.format_exc()}")
 
-                single_media = TLRPC.TL_inputSingleMedia()
-                single_media.media = input_media
-                single_media.random_id = random.getrandbits(63)
-
-                if not header_attached:
-                    final_caption = f"{prefix_text}\n\n{album_caption}".strip()
-                    final_entities = self._prepare_final_entities(prefix_text, prefix_entities, album_entities)
-                    single_media.message = final_caption
-                    if final_entities and not final_entities.isEmpty():
-                        single_media.entities = final_entities
-                        single_media.flags |= 1
-                    header_attached = True
+    def _queue_native_forward(self, message, rule):
+        """Adds a message to the native forward batch of every destination of its rule."""
+        source_chat_id = self._get_id_from_peer(message.peer_id)
+        account = self._get_rule_account(rule)
+        for to_peer_id, _ in self._get_rule_destinations(rule):
+            if self._is_duplicate_content(message, to_peer_id, account):
+                log(f"[{self.id}] Skipping destination {to_peer_id} for message {message.id} – same content already sent.")
+                self.metrics.count(source_chat_id, COUNTER_DROPPED_CONTENT_DEDUP)
+                continue
+            batch_key = (source_chat_id, to_peer_id)
+            with self.lock:
+                batch = self.forward_batches.get(batch_key)
+                if batch is None:
+                    batch_task = ForwardBatchTask(self, batch_key)
+                    batch = {'ids': [], 'messages': [], 'task': batch_task}
+                    self.forward_batches[batch_key] = batch
+                    self.handler.postDelayed(batch_task, self.forward_batch_window_ms)
+                batch['ids'].append(message.id)
+                batch['messages'].append(message)
+                is_full = len(batch['ids']) >= self.MAX_FORWARD_BATCH_SIZE
+            if is_full:
+                self.handler.removeCallbacks(batch['task'])
+                self._flush_forward_batch(batch_key)
+
+    def _flush_forward_batch(self, batch_key):
+        """Sends a collected batch as one messages.forwardMessages request."""
+        with self.lock:
+            batch = self.forward_batches.pop(batch_key, None)
+        if not batch or not batch['ids']:
+            return
+        source_chat_id, to_peer_id = batch_key
+        rule = self.forwarding_rules.get(source_chat_id)
+        if not rule:
+            return
+        topic_id = dict(self._get_rule_destinations(rule)).get(to_peer_id)
+        if topic_id is None:
+            return
+        message_ids = sorted(set(batch['ids']))
+        log(f"[{self.id}] Native forward of {len(message_ids)} message(s) from {source_chat_id} to {to_peer_id}.")
+        try:
+            req = TLRPC.TL_messages_forwardMessages()
+            account = self._get_rule_account(rule)
+            controller = self._get_messages_controller(account)
+            req.from_peer = controller.getInputPeer(source_chat_id)
+            req.to_peer = self._get_send_context(to_peer_id, account).peer
+            req.drop_author = rule.get("drop_author", True)
+            req.drop_media_captions = not rule.get("filters", {}).get("media_captions", True)
+            id_list, random_id_list, id_links = ArrayList(), ArrayList(), []
+            for message_id in message_ids:
+                random_id = random.getrandbits(63)
+                id_list.add(Integer(message_id))
+                random_id_list.add(Long(random_id))
+                id_links.append((random_id, message_id))
+            req.id, req.random_id = id_list, random_id_list
+            if topic_id > 0:
+                req.top_msg_id = topic_id
+                req.flags |= 512
+
+            def handle_forward_result(response, error):
+                sent = not error and bool(response)
+                self._settle_sent_content(batch['messages'], to_peer_id, account, sent)
+                if sent:
+                    self._update_last_seen_id(source_chat_id, message_ids[-1])
                 else:
-                    single_media.message = ""
-                multi_media_list.add(single_media)
+                    log(f"[{self.id}] Native forward to {to_peer_id} failed: {getattr(error, 'text', error)}")
 
-            if not multi_media_list.isEmpty():
-                req.multi_media = multi_media_list
-                send_request(req, RequestCallback(lambda r, e: None))
+            self._dispatch_request(req, to_peer_id, handle_forward_result, rule_key=source_chat_id, message_count=len(message_ids), id_links=id_links, account=account)
         except Exception:
-            log(f"[{self.id}] ERROR in _send_album: {traceback.format_exc()}")
-            
+            log(f"[{self.id}] ERROR in _flush_forward_batch: {traceback.format_exc()}")
+
     def _build_reply_quote(self, message_object):
-        """Builds a formatted blockquote string for a replied-to message."""
+        """
+        Builds a formatted blockquote string for a replied-to message. Quotes are memoized per
+        replied message (and its edit date), since busy groups reply to the same parent many
+        times; callers get their own copy of the entities.
+        """
         replied_message_obj = message_object.replyMessageObject
         if not replied_message_obj or not replied_message_obj.messageOwner:
             return None, None
         
+        replied_message = replied_message_obj.messageOwner
+        account = message_object.currentAccount
+        key = (account, self._get_id_from_peer(replied_message.peer_id), replied_message.id, replied_message.edit_date)
+        quote = self.quote_cache.get(key)
+        if quote is None:
+            quote = self._build_quote_block(replied_message_obj, account)
+            self.quote_cache.put(key, quote)
+        quote_text, entities = quote
+        return quote_text, copy_entities(entities)
+
+    def _build_quote_block(self, replied_message_obj, account):
+        """The quote text and entities for a replied-to message."""
         replied_message = replied_message_obj.messageOwner
         author_id = self._get_id_from_peer(replied_message.from_id)
-        author_entity = self._get_chat_entity(author_id)
+        author_entity = self._get_chat_entity(author_id, account)
         author_name = self._get_entity_name(author_entity)
         original_fwd_tag, _ = self._get_original_author_details(replied_message.fwd_from)
 
@@ -827,7 +2795,7 @@ class AutoForwarderPlugin(BasePlugin):
             raw_text = replied_message.message
             quote_snippet = re.sub(r'[\s\r\n]+', ' ', raw_text).strip()
 
-        if self._get_java_len(quote_snippet) > 44:
+        if utf16_len(quote_snippet) > 44:
             quote_snippet = quote_snippet[:44].strip() + "..."
                 
         if original_fwd_tag:
@@ -840,164 +2808,388 @@ class AutoForwarderPlugin(BasePlugin):
             self._add_user_entities(entities, quote_text, author_entity, author_name)
         else:
             bold_entity = TLRPC.TL_messageEntityBold()
-            bold_entity.offset, bold_entity.length = 0, self._get_java_len(author_name)
+            bold_entity.offset, bold_entity.length = 0, utf16_len(author_name)
             entities.add(bold_entity)
 
         quote_entity = TLRPC.TL_messageEntityBlockquote()
-        quote_entity.offset, quote_entity.length = 0, self._get_java_len(quote_text)
+        quote_entity.offset, quote_entity.length = 0, utf16_len(quote_text)
         entities.add(quote_entity)
 
         return quote_text, entities
 
-    def _build_forward_header(self, message, source_entity, author_entity):
-        """Builds a formatted header string (e.g., "Forwarded from...") for copied messages."""
+    def _build_forward_header(self, message, source_entity, author_entity, account=None):
+        """
+        Builds a formatted header string (e.g., "Forwarded from...") for copied messages. Header
+        templates are memoized per (source, author, forward origin); only the message link of
+        channel and supergroup headers is filled in per message.
+        """
         is_channel = isinstance(source_entity, TLRPC.TL_channel) and not getattr(source_entity, 'megagroup', False)
         is_group = isinstance(source_entity, TLRPC.TL_chat) or (isinstance(source_entity, TLRPC.TL_channel) and getattr(source_entity, 'megagroup', True))
-        if is_channel: return self._build_channel_header(message, source_entity)
-        if is_group: return self._build_group_header(message, source_entity, author_entity)
-        me = get_user_config().getCurrentUser()
-        sender, receiver = (author_entity, source_entity) if message.out else (author_entity, me)
-        return self._build_private_header(message, sender, receiver)
-
-    def _build_channel_header(self, message, channel):
-        """Builds a header for messages from a channel."""
+        fwd_from = message.fwd_from
+        origin = (self._get_id_from_peer(getattr(fwd_from, 'from_id', None)), getattr(fwd_from, 'from_name', None)) if fwd_from else None
+        key = (account, self._get_id_for_storage(source_entity), self._get_id_for_storage(author_entity), bool(message.out), origin)
+        template = self.header_cache.get(key)
+        if template is None:
+            if is_channel: template = self._build_channel_header(fwd_from, source_entity)
+            elif is_group: template = self._build_group_header(fwd_from, source_entity, author_entity)
+            else:
+                me = (get_user_config() if account is None else UserConfig.getInstance(account)).getCurrentUser()
+                sender, receiver = (author_entity, source_entity) if message.out else (author_entity, me)
+                template = self._build_private_header(fwd_from, sender, receiver)
+            self.header_cache.put(key, template)
+
+        text, entities, link_index = template
+        entities = copy_entities(entities)
+        if link_index is not None:
+            msg_id = fwd_from.channel_post if is_channel and fwd_from and fwd_from.channel_post else message.id
+            link = entities.get(link_index)
+            link.url = f"{link.url}{msg_id}"
+        return text, entities
+
+    def _get_chat_link_prefix(self, chat):
+        """The t.me link of a channel or supergroup, without the message id."""
+        return f"https://t.me/{chat.username}/" if chat.username else f"https://t.me/c/{chat.id}/"
+
+    def _build_channel_header(self, fwd_from, channel):
+        """Builds a header template for messages from a channel: (text, entities, index of the message link)."""
         name, entities = self._get_entity_name(channel), ArrayList()
-        original_author_name, _ = self._get_original_author_details(message.fwd_from)
+        original_author_name, _ = self._get_original_author_details(fwd_from)
         text = f"Forwarded from {name}"
         if original_author_name: text += f" (fwd_from {original_author_name})"
         link = TLRPC.TL_messageEntityTextUrl()
-        link.offset, link.length = text.find(name), self._get_java_len(name)
-        msg_id = message.fwd_from.channel_post if message.fwd_from and message.fwd_from.channel_post else message.id
-        link.url = f"https://t.me/{channel.username}/{msg_id}" if channel.username else f"https://t.me/c/{channel.id}/{msg_id}"
+        link.offset, link.length = utf16_find(text, name), utf16_len(name)
+        link.url = self._get_chat_link_prefix(channel)
         entities.add(link)
-        return text, entities
+        return text, entities, 0
 
-    def _build_group_header(self, message, group, author):
-        """Builds a header for messages from a group."""
+    def _build_group_header(self, fwd_from, group, author):
+        """Builds a header template for messages from a group: (text, entities, index of the message link or None)."""
         group_name, author_name, entities = self._get_entity_name(group), self._get_entity_name(author), ArrayList()
-        original_author_name, original_author_entity = self._get_original_author_details(message.fwd_from)
+        original_author_name, original_author_entity = self._get_original_author_details(fwd_from)
         text = f"Forwarded from {group_name} (by {author_name})"
         if original_author_name: text += f" fwd_from {original_author_name}"
+        link_index = None
         if isinstance(group, TLRPC.TL_channel):
-            msg_id = message.id
-            group_link = f"https://t.me/{group.username}/{msg_id}" if group.username else f"https://t.me/c/{group.id}/{msg_id}"
-            link_entity = TLRPC.TL_messageEntityTextUrl(); link_entity.offset, link_entity.length, link_entity.url = text.find(group_name), self._get_java_len(group_name), group_link
+            link_entity = TLRPC.TL_messageEntityTextUrl(); link_entity.offset, link_entity.length, link_entity.url = utf16_find(text, group_name), utf16_len(group_name), self._get_chat_link_prefix(group)
             entities.add(link_entity)
+            link_index = 0
         else:
-            bold = TLRPC.TL_messageEntityBold(); bold.offset, bold.length = text.find(group_name), self._get_java_len(group_name)
+            bold = TLRPC.TL_messageEntityBold(); bold.offset, bold.length = utf16_find(text, group_name), utf16_len(group_name)
             entities.add(bold)
         if author and isinstance(author, TLRPC.TL_user): self._add_user_entities(entities, text, author, author_name)
         if original_author_entity and isinstance(original_author_entity, TLRPC.TL_user): self._add_user_entities(entities, text, original_author_entity, original_author_name)
-        return text, entities
+        return text, entities, link_index
 
-    def _build_private_header(self, message, sender, receiver):
-        """Builds a header for messages from a private chat."""
+    def _build_private_header(self, fwd_from, sender, receiver):
+        """Builds a header template for messages from a private chat; it has no message link."""
         sender_name, receiver_name, entities = self._get_entity_name(sender), self._get_entity_name(receiver), ArrayList()
-        original_author_name, original_author_entity = self._get_original_author_details(message.fwd_from)
+        original_author_name, original_author_entity = self._get_original_author_details(fwd_from)
         text = f"Forwarded from {sender_name} to {receiver_name}"
         if original_author_name: text += f" (original fwd_from {original_author_name})"
         for entity, name in [(sender, sender_name), (receiver, receiver_name), (original_author_entity, original_author_name)]:
             if entity and isinstance(entity, TLRPC.TL_user): self._add_user_entities(entities, text, entity, name)
-        return text, entities
+        return text, entities, None
 
-    # --- Unread and Historical Processing ---
-    def _get_unread_messages_after_boundary(self, chat_id, boundary, limit=500):
-        """Fetches unread messages after the boundary for a chat."""
-        import threading
-        messages = []
-        response_received = threading.Event()
-        
-        def on_response(response, error):
-            nonlocal messages
-            if not error and response and hasattr(response, 'messages'):
-                all_messages = [response.messages.get(i) for i in range(response.messages.size())]
-                # Filter to only messages newer than boundary
-                messages = [msg for msg in all_messages if msg and msg.id > boundary]
-                log(f"[{self.id}] Retrieved {len(all_messages)} total messages, {len(messages)} unread after boundary {boundary}")
+    # --- Edit and Delete Sync ---
+    def _open_id_map(self):
+        """Opens the message ID map when edit/delete sync is on."""
+        if self.id_map or not self.sync_edits_deletes:
+            return
+        path = self._get_cache_file_path(ID_MAP_FILE_NAME)
+        if not path:
+            return
+        try:
+            self.id_map = MessageIdMap(path, self.id_map_max_entries)
+        except Exception:
+            log(f"[{self.id}] Could not open message ID map: {traceback.format_exc()}")
+
+    def _close_id_map(self):
+        id_map, self.id_map = self.id_map, None
+        if id_map:
+            try:
+                id_map.close()
+            except Exception:
+                log(f"[{self.id}] ERROR closing message ID map: {traceback.format_exc()}")
+
+    def _toggle_edit_sync(self):
+        """Switches edit/delete sync. Only messages copied while it is on can be followed."""
+        self.sync_edits_deletes = not self.sync_edits_deletes
+        self.set_setting(SYNC_EDITS_KEY, "1" if self.sync_edits_deletes else "0")
+        if self.sync_edits_deletes:
+            self._open_id_map()
+            BulletinHelper.show_info("Edits and deletions will follow messages forwarded from now on.", get_last_fragment())
+        else:
+            self._close_id_map()
+            BulletinHelper.show_info("Edit and deletion sync off.", get_last_fragment())
+        self._refresh_settings_ui()
+
+    def _record_message_ids(self, response, source_chat_id, to_peer_id, id_links):
+        """Maps the source ids in id_links to the destination ids the server assigned."""
+        try:
+            sent_ids = {}
+            if isinstance(response, TLRPC.TL_updateShortSentMessage):
+                if len(id_links) == 1:
+                    sent_ids[id_links[0][0]] = response.id
             else:
-                log(f"[{self.id}] Error getting unread messages: {error}")
-            response_received.set()
-        
+                updates = getattr(response, 'updates', None)
+                for i in range(updates.size() if updates else 0):
+                    update = updates.get(i)
+                    if isinstance(update, TLRPC.TL_updateMessageID):
+                        sent_ids[update.random_id] = update.id
+            is_channel = self._is_channel_dialog(source_chat_id, self._get_source_account(source_chat_id))
+            for random_id, source_message_id in id_links:
+                dest_message_id = sent_ids.get(random_id)
+                if dest_message_id:
+                    self.id_map.add(source_chat_id, source_message_id, is_channel, to_peer_id, dest_message_id)
+        except Exception:
+            log(f"[{self.id}] ERROR in _record_message_ids: {traceback.format_exc()}")
+
+    def _queue_source_edits(self, message_objects):
+        """Collects edited source messages; repeated edits of a message within the window collapse to the last one."""
+        with self.lock:
+            for i in range(message_objects.size()):
+                message_object = message_objects.get(i)
+                message = getattr(message_object, 'messageOwner', None)
+                if not message or not message.edit_date or getattr(message, 'edit_hide', False):
+                    continue
+                self.pending_edits[(self._get_id_from_peer(message.peer_id), message.id)] = message_object
+            self._schedule_sync_flush_locked()
+
+    def _queue_source_deletes(self, message_ids, channel_id, account):
+        """Collects deleted source message ids; ids outside channels are account-wide and carry no chat."""
+        source_chat_id = -channel_id if channel_id else None
+        if source_chat_id is not None and self.enabled_sources.get(source_chat_id) != account:
+            return
+        with self.lock:
+            pending = self.pending_deletes.setdefault((account, source_chat_id), set())
+            for i in range(message_ids.size()):
+                pending.add(int(message_ids.get(i)))
+            self._schedule_sync_flush_locked()
+
+    def _schedule_sync_flush_locked(self):
+        if self.sync_flush_task is None and (self.pending_edits or self.pending_deletes):
+            self.sync_flush_task = SyncFlushTask(self)
+            self.handler.postDelayed(self.sync_flush_task, self.forward_batch_window_ms)
+
+    def _flush_sync_queue(self):
+        """Pushes collected deletions and edits to the copies of the affected messages."""
+        with self.lock:
+            edits, self.pending_edits = self.pending_edits, {}
+            deletes, self.pending_deletes = self.pending_deletes, {}
+            self.sync_flush_task = None
+        if not self.id_map:
+            return
+        try:
+            self._propagate_deletes(deletes)
+            self._propagate_edits(edits)
+        except Exception:
+            log(f"[{self.id}] ERROR in _flush_sync_queue: {traceback.format_exc()}")
+
+    def _propagate_deletes(self, deletes):
+        dest_ids = collections.defaultdict(list)
+        for (account, source_chat_id), message_ids in deletes.items():
+            rows = self.id_map.lookup(message_ids, source_chat_id)
+            if source_chat_id is None:
+                # Ids outside channels only identify a message within the account that saw them.
+                rows = [row for row in rows if self._get_source_account(row[0]) == account]
+            for rule_key, _, dest_chat_id, dest_message_id, _ in rows:
+                if self.dry_run_live:
+                    # The mapping goes either way; only the deletion itself is withheld.
+                    self.metrics.count(rule_key, COUNTER_DRY_RUN)
+                    continue
+                dest_ids[(account, dest_chat_id)].append(dest_message_id)
+            if rows:
+                self.id_map.remove(rows)
+        for (account, dest_chat_id), message_ids in dest_ids.items():
+            log(f"[{self.id}] Deleting {len(message_ids)} copied message(s) in {dest_chat_id}.")
+            self._delete_messages(dest_chat_id, message_ids, account)
+
+    def _propagate_edits(self, edits):
+        edits_by_chat = collections.defaultdict(dict)
+        for (source_chat_id, message_id), message_object in edits.items():
+            edits_by_chat[source_chat_id][message_id] = message_object
+        for source_chat_id, message_objects in edits_by_chat.items():
+            rule = self.forwarding_rules.get(source_chat_id)
+            # Natively forwarded messages cannot be edited; their ids are kept for deletions only.
+            if not rule or rule.get("native_forward", False):
+                continue
+            for _, message_id, dest_chat_id, dest_message_id, edit_date in self.id_map.lookup(list(message_objects), source_chat_id):
+                message_object = message_objects[message_id]
+                new_edit_date = message_object.messageOwner.edit_date
+                if edit_date >= new_edit_date:
+                    continue
+                self._send_edit(message_object, rule, dest_chat_id, dest_message_id)
+                self.id_map.set_edit_date(source_chat_id, message_id, new_edit_date)
+
+    def _send_edit(self, message_object, rule, dest_chat_id, dest_message_id):
+        """Rewrites a copy with the edited text, rebuilt exactly like the original send."""
+        input_media, message_text, entities = self._build_message_payload(message_object, rule)
+        if not input_media and not message_text.strip():
+            return
+        account = self._get_rule_account(rule)
+        req = TLRPC.TL_messages_editMessage()
+        req.peer = self._get_messages_controller(account).getInputPeer(dest_chat_id)
+        req.id = dest_message_id
+        req.message = message_text
+        req.flags |= 2048
+        if entities and not entities.isEmpty():
+            req.entities = entities
+            req.flags |= 8
+
+        def handle_edit_result(response, error):
+            if error and getattr(error, 'text', None) != "MESSAGE_NOT_MODIFIED":
+                log(f"[{self.id}] Edit of message {dest_message_id} in {dest_chat_id} failed: {getattr(error, 'text', error)}")
+
+        self._dispatch_request(req, dest_chat_id, handle_edit_result, account=account)
+
+    def _delete_messages(self, chat_id, message_ids, account=None):
+        """Deletes messages for everyone through the given account, in batches of up to MAX_DELETE_BATCH_SIZE ids."""
+        if self.dry_run_live:
+            return
+        channel_id = -chat_id if self._is_channel_dialog(chat_id, account) else 0
+        for start in range(0, len(message_ids), MAX_DELETE_BATCH_SIZE):
+            id_list = ArrayList()
+            for message_id in message_ids[start:start + MAX_DELETE_BATCH_SIZE]:
+                id_list.add(Integer(message_id))
+            try:
+                self._get_messages_controller(account).deleteMessages(id_list, None, None, chat_id, 0, True, channel_id)
+            except Exception:
+                log(f"[{self.id}] ERROR in _delete_messages: {traceback.format_exc()}")
+
+    def _is_channel_dialog(self, dialog_id, account=None):
+        """True if a dialog id belongs to a channel or supergroup, whose message ids are per chat."""
+        if dialog_id >= 0:
+            return False
+        chat = self._get_messages_controller(account).getChat(-dialog_id)
+        return bool(chat) and ChatObject.isChannel(chat)
+
+    # --- Unread and Historical Processing ---
+    async def _get_unread_messages_after_boundary(self, chat_id, boundary, limit=500):
+        """Fetches unread messages after the boundary for a chat as a MessagePage. Raises RequestError or asyncio.TimeoutError."""
+        account = self._get_source_account(chat_id)
         req = TLRPC.TL_messages_getHistory()
-        req.peer = get_messages_controller().getInputPeer(chat_id)
+        req.peer = self._get_messages_controller(account).getInputPeer(chat_id)
         req.offset_id = 0  # Start from most recent
         req.limit = limit
         req.offset_date = req.add_offset = req.max_id = req.min_id = req.hash = 0
         
-        send_request(req, RequestCallback(on_response))
-        
-        if not response_received.wait(15):
-            log(f"[{self.id}] TIMEOUT getting unread messages for chat {chat_id}")
-        
-        return messages
+        response = await self.async_core.request(req, account=account)
+        page = MessagePage.from_response(response, self._get_id_from_peer)
+        # Filter to only messages newer than boundary
+        unread = page.select(page.mask_newer_than(boundary))
+        log(f"[{self.id}] Retrieved {len(page)} total messages, {len(unread)} unread after boundary {boundary}")
+        return unread
+
+    def _get_page_outcomes(self, page, chat_id, rule, account=None):
+        """
+        First filter phase, over a whole MessagePage: author type, author filter, content type,
+        keyword and length, run as masks in the same order as the live chain. Returns one outcome
+        per row: the dropping filter, None if the row passes, or FILTER_NEEDS_MESSAGE_OBJECT where
+        the content type needs a MessageObject (see _hydrate_page_row).
+        """
+        outcomes = [None] * len(page)
+
+        def drop(mask, outcome):
+            for i, keep in enumerate(mask):
+                if not keep and outcomes[i] is None:
+                    outcomes[i] = outcome
 
-    def _would_message_pass_filters(self, message_obj, chat_id):
-        """Checks if a message would pass all filters without sending it."""
         try:
-            rule = self.forwarding_rules.get(chat_id)
-            if not rule:
-                return False
-            
-            message = message_obj.messageOwner
-            
-            # Check author type
-            author_type = self._get_author_type(message)
-            if author_type == "outgoing" and not rule.get("forward_outgoing", True):
-                return False
-            if author_type == "user" and not rule.get("forward_users", True):
-                return False
-            if author_type == "bot" and not rule.get("forward_bots", True):
-                return False
-            
-            # Check author filter
+            # Author type and author filter, with one entity lookup per distinct author
+            authors = {author_id for author_id, out in zip(page.authors, page.outgoing) if not out}
+            bots = {author_id for author_id in authors if getattr(self._get_chat_entity(author_id, account), 'bot', False)}
+            allow_outgoing, allow_bots, allow_users = rule.get("forward_outgoing", True), rule.get("forward_bots", True), rule.get("forward_users", True)
+            drop([allow_outgoing if out else (allow_bots if author_id in bots else allow_users) for out, author_id in zip(page.outgoing, page.authors)],
+                 RULE_COUNTERS[COUNTER_DROPPED_AUTHOR_TYPE])
             author_filter = rule.get("author_filter", "").strip()
-            if author_filter and (author_type == "user" or author_type == "bot"):
-                author_id = self._get_id_from_peer(message.from_id)
-                author_entity = self._get_chat_entity(author_id)
-                allowed_authors = [t.strip().lower().lstrip('@') for t in author_filter.split(',') if t.strip()]
-                match_found = False
-                if str(author_id) in allowed_authors:
-                    match_found = True
-                if not match_found and author_entity and hasattr(author_entity, 'username') and author_entity.username:
-                    if author_entity.username.lower() in allowed_authors:
-                        match_found = True
-                if not match_found:
-                    return False
-            
-            # Check content type filters using MessageObject methods
-            if not self._is_message_allowed_by_filters(message_obj, rule):
-                return False
-            
-            # Check keyword filter
+            if author_filter:
+                allowed_authors = {t.strip().lower().lstrip('@') for t in author_filter.split(',') if t.strip()}
+                matching = set()
+                for author_id in authors:
+                    entity = self._get_chat_entity(author_id, account)
+                    username = getattr(entity, 'username', None) if entity else None
+                    if str(author_id) in allowed_authors or (username and username.lower() in allowed_authors):
+                        matching.add(author_id)
+                drop([out or author_id in matching for out, author_id in zip(page.outgoing, page.authors)], RULE_COUNTERS[COUNTER_DROPPED_AUTHOR_FILTER])
+
+            # Content type for the kinds the columns settle; the rest wait for their MessageObject
+            filters = rule.get("filters", {})
+            blocked_kinds = 0
+            for kind_name, kind_code in PAGE_KIND_FILTERS:
+                if not filters.get(kind_name, True):
+                    blocked_kinds |= kind_code
+            if blocked_kinds:
+                drop(page.mask_kinds(blocked_kinds), RULE_COUNTERS[COUNTER_DROPPED_CONTENT_TYPE])
+            drop(page.mask_kinds(PAGE_KIND_OTHER), FILTER_NEEDS_MESSAGE_OBJECT)
+
+            # Keyword, then length. Text and photo rows carry no document filename, so the text column is the whole MessageText.
             keyword_pattern = rule.get("keyword_pattern", "").strip()
             use_global_regex = rule.get("use_global_regex", False)
             global_pattern = self.get_setting(GLOBAL_KEYWORD_PATTERN, "").strip()
-            
             if keyword_pattern or (use_global_regex and global_pattern):
-                text_to_check = message.message or ""
-                # Include document filename in keyword check (consistent with live processing)
-                if message_obj.isDocument():
-                    doc = getattr(message.media, 'document', None)
-                    if doc:
-                        filename = self._get_document_filename(doc)
-                        if filename:
-                            text_to_check = f"{text_to_check} {filename}".strip()
-                if not self._passes_combined_keyword_filter(text_to_check, keyword_pattern, use_global_regex, global_pattern):
-                    return False
+                for i, text in enumerate(page.texts):
+                    if outcomes[i] is None:
+                        message_text = MessageText([text] if text else [], self.text_normalization, page.text_lengths[i])
+                        if not self._passes_combined_keyword_filter(message_text, keyword_pattern, use_global_regex, global_pattern, chat_id):
+                            outcomes[i] = RULE_COUNTERS[COUNTER_DROPPED_KEYWORD]
+            drop(page.mask_text_length(self.min_msg_length, self.max_msg_length), RULE_COUNTERS[COUNTER_DROPPED_LENGTH])
+        except Exception:
+            log(f"[{self.id}] ERROR in _get_page_outcomes: {traceback.format_exc()}")
+            return ["error"] * len(page)
+        return outcomes
+
+    def _hydrate_page_row(self, page, index, outcome, chat_id, account):
+        """
+        Second filter phase for one row: builds the MessageObject only if the row passed the page
+        filters or needs one to finish them. Returns (outcome, message_object); the message_object
+        is None if it was not built.
+        """
+        if outcome is not None and outcome != FILTER_NEEDS_MESSAGE_OBJECT:
+            return outcome, None
+        message_obj = self._create_message_object_safely(page.messages[index], account)
+        if not message_obj:
+            return "unreadable", None
+        if outcome == FILTER_NEEDS_MESSAGE_OBJECT:
+            outcome = self._get_hydrated_filter_outcome(message_obj, chat_id)
+        return outcome, message_obj
+
+    def _get_hydrated_filter_outcome(self, message_obj, chat_id):
+        """The content type, keyword and length filters for messages the raw phase could not classify."""
+        try:
+            rule = self.forwarding_rules.get(chat_id)
+            if not rule:
+                return "no_rule"
             
-            # Check length
-            is_text_based = not message.media or isinstance(message.media, (TLRPC.TL_messageMediaEmpty, TLRPC.TL_messageMediaWebPage))
-            if is_text_based:
-                if not (self.min_msg_length <= len(message.message or "") <= self.max_msg_length):
-                    return False
+            # Check content type filters using MessageObject methods
+            if not self._is_message_allowed_by_filters(message_obj, rule):
+                return RULE_COUNTERS[COUNTER_DROPPED_CONTENT_TYPE]
             
-            return True
+            # Same normalized text (message plus document filename) as live processing
+            return self._get_text_filter_outcome(message_obj.messageOwner, self._get_message_text([message_obj]), rule, chat_id)
         except Exception:
-            log(f"[{self.id}] ERROR in _would_message_pass_filters: {traceback.format_exc()}")
-            return False
+            log(f"[{self.id}] ERROR in _get_hydrated_filter_outcome: {traceback.format_exc()}")
+            return "error"
 
-    def _process_unread_messages(self, chat_id):
-        """Processes unread messages for a single chat."""
+    def _get_text_filter_outcome(self, message, message_text, rule, chat_id):
+        """Keyword and length checks on a MessageText."""
+        # Check keyword filter
+        keyword_pattern = rule.get("keyword_pattern", "").strip()
+        use_global_regex = rule.get("use_global_regex", False)
+        global_pattern = self.get_setting(GLOBAL_KEYWORD_PATTERN, "").strip()
+        if keyword_pattern or (use_global_regex and global_pattern):
+            if not self._passes_combined_keyword_filter(message_text, keyword_pattern, use_global_regex, global_pattern, chat_id):
+                return RULE_COUNTERS[COUNTER_DROPPED_KEYWORD]
+        
+        # Check length
+        is_text_based = not message.media or isinstance(message.media, (TLRPC.TL_messageMediaEmpty, TLRPC.TL_messageMediaWebPage))
+        if is_text_based:
+            if not (self.min_msg_length <= message_text.length <= self.max_msg_length):
+                return RULE_COUNTERS[COUNTER_DROPPED_LENGTH]
+        
+        return None
+
+    async def _process_unread_messages(self, chat_id, job=None):
+        """Processes unread messages for a single chat. Progress is reported on job, if given."""
         try:
             rule = self.forwarding_rules.get(chat_id)
             if not rule:
@@ -1005,82 +3197,111 @@ class AutoForwarderPlugin(BasePlugin):
                 return {"success": False, "processed": 0, "error": "No rule configured"}
             
             boundary = self._get_unread_boundary(chat_id)
-            messages = self._get_unread_messages_after_boundary(chat_id, boundary, limit=500)
+            messages = await self._get_unread_messages_after_boundary(chat_id, boundary, limit=500)
             
             if not messages:
                 log(f"[{self.id}] No unread messages found for chat {chat_id}")
                 return {"success": True, "processed": 0, "error": None}
             
-            # Sort oldest first
-            messages.sort(key=lambda m: m.id)
+            if job:
+                job.total += len(messages)
             
+            account = self._get_rule_account(rule)
+            # The page filters run over the whole batch; only rows that pass become MessageObjects
+            outcomes = self._get_page_outcomes(messages, chat_id, rule, account)
             processed = 0
-            for msg in messages:
+            for i in messages.oldest_first():
+                if job:
+                    job.done += 1
                 try:
-                    # Create MessageObject for proper processing
-                    msg_obj = self._create_message_object_safely(msg)
-                    if not msg_obj:
-                        continue
-                    
-                    # Check if message would pass all filters
-                    if self._would_message_pass_filters(msg_obj, chat_id):
-                        self._send_forwarded_message(msg_obj, rule)
+                    outcome, msg_obj = self._hydrate_page_row(messages, i, outcomes[i], chat_id, account)
+                    if outcome is None:
+                        # Wait for the dispatcher; live forwards take precedence over backfills.
+                        if not await self._get_send_dispatcher(account).wait_for_capacity(PRIORITY_UNREAD):
+                            break
+                        self._send_forwarded_message(msg_obj, rule, priority=PRIORITY_UNREAD)
                         processed += 1
-                        time.sleep(0.5)  # Small delay to avoid spam
                 except Exception:
-                    log(f"[{self.id}] ERROR processing message {msg.id}: {traceback.format_exc()}")
+                    log(f"[{self.id}] ERROR processing message {messages.ids[i]}: {traceback.format_exc()}")
             
             log(f"[{self.id}] Processed {processed} unread messages for chat {chat_id}")
             return {"success": True, "processed": processed, "error": None}
+        except asyncio.TimeoutError:
+            log(f"[{self.id}] TIMEOUT getting unread messages for chat {chat_id}")
+            return {"success": False, "processed": 0, "error": "Timed out fetching messages"}
         except Exception as e:
             log(f"[{self.id}] ERROR in _process_unread_messages: {traceback.format_exc()}")
             return {"success": False, "processed": 0, "error": str(e)}
 
-    def _get_message_batch(self, chat_id, offset_id, limit=100):
-        """Gets a batch of messages from chat history."""
-        import threading
-        messages = []
-        response_received = threading.Event()
-        
-        def on_response(response, error):
-            nonlocal messages
-            if not error and response and hasattr(response, 'messages'):
-                messages = [response.messages.get(i) for i in range(response.messages.size())]
-                log(f"[{self.id}] Retrieved {len(messages)} messages from batch")
-            else:
-                log(f"[{self.id}] Error getting message batch: {error}")
-            response_received.set()
-        
+    async def _get_message_batch(self, chat_id, offset_id, limit=100):
+        """Gets a batch of messages from chat history as a MessagePage. Raises RequestError or asyncio.TimeoutError."""
+        account = self._get_source_account(chat_id)
         req = TLRPC.TL_messages_getHistory()
-        req.peer = get_messages_controller().getInputPeer(chat_id)
+        req.peer = self._get_messages_controller(account).getInputPeer(chat_id)
         req.offset_id = offset_id
         req.offset_date = req.add_offset = req.max_id = req.min_id = req.hash = 0
         req.limit = limit
         
-        send_request(req, RequestCallback(on_response))
-        
-        if not response_received.wait(15):
-            log(f"[{self.id}] TIMEOUT getting message batch for chat {chat_id}")
-        
-        return messages
+        response = await self.async_core.request(req, account=account)
+        page = MessagePage.from_response(response, self._get_id_from_peer)
+        log(f"[{self.id}] Retrieved {len(page)} messages from batch")
+        return page
+
+    def _fetch_messages_by_ids(self, chat_id, message_ids):
+        """Blocking form of _fetch_messages_by_ids_async for worker threads; returns [] if the fetch fails."""
+        try:
+            return self.async_core.run(self._fetch_messages_by_ids_async(chat_id, message_ids))
+        except asyncio.TimeoutError:
+            log(f"[{self.id}] TIMEOUT fetching messages by id for chat {chat_id}")
+        except Exception as e:
+            log(f"[{self.id}] Error fetching messages by id: {e}")
+        return []
+
+    async def _fetch_messages_by_ids_async(self, chat_id, message_ids):
+        """Fetches specific messages of a chat by id (channels.getMessages or messages.getMessages)."""
+        id_list = ArrayList()
+        for message_id in message_ids:
+            input_message = TLRPC.TL_inputMessageID()
+            input_message.id = message_id
+            id_list.add(input_message)
+        account = self._get_source_account(chat_id)
+        controller = self._get_messages_controller(account)
+        if isinstance(self._get_chat_entity(chat_id, account), TLRPC.TL_channel):
+            req = TLRPC.TL_channels_getMessages()
+            req.channel = controller.getInputChannel(abs(chat_id))
+        else:
+            req = TLRPC.TL_messages_getMessages()
+        req.id = id_list
+
+        response = await self.async_core.request(req, account=account)
+        if not getattr(response, 'messages', None):
+            return []
+        if getattr(response, 'users', None): controller.putUsers(response.users, False)
+        if getattr(response, 'chats', None): controller.putChats(response.chats, False)
+        messages = [response.messages.get(i) for i in range(response.messages.size())]
+        return [msg for msg in messages if msg and not isinstance(msg, TLRPC.TL_messageEmpty)]
 
-    def _scan_chat_history(self, chat_id, cutoff_timestamp):
-        """Scans chat history up to cutoff timestamp."""
-        messages = []
+    async def _scan_chat_history(self, chat_id, cutoff_timestamp):
+        """Scans chat history up to cutoff timestamp into one MessagePage."""
+        return MessagePage.concat([page async for page in self._iter_chat_history(chat_id, cutoff_timestamp)])
+
+    async def _iter_chat_history(self, chat_id, cutoff_timestamp):
+        """Yields chat history newest first as MessagePages, until the cutoff timestamp."""
         offset_id = 0
         
         while True:
-            batch = self._get_message_batch(chat_id, offset_id, limit=100)
+            batch = await self._get_message_batch(chat_id, offset_id, limit=100)
             if not batch:
                 break
             
-            for msg in batch:
-                if msg.date < cutoff_timestamp:
-                    return messages  # Stop when we reach cutoff
-                messages.append(msg)
+            in_range = batch.mask_since(cutoff_timestamp)
+            if not all(in_range):
+                yield batch.select(in_range)
+                return  # Stop when we reach cutoff
+            yield batch
             
             # Update offset for next batch (non-overlapping pagination)
-            new_min_id = min(msg.id for msg in batch)
+            new_min_id = min(batch.ids)
             new_offset_id = new_min_id - 1
             
             # Prevent infinite loop if offset doesn't change or goes backwards
@@ -1089,12 +3310,71 @@ class AutoForwarderPlugin(BasePlugin):
             
             offset_id = new_offset_id
             
-            time.sleep(0.5)  # Rate limiting
-        
-        return messages
+            await asyncio.sleep(0.5)  # Rate limiting
 
-    def _process_historical_messages(self, chat_id, days):
-        """Processes historical messages for a single chat going back X days."""
+    async def _dry_run_backfill(self, chat_id, days=None):
+        """
+        Runs the backfill filter chain over a chat without sending anything. Unread messages
+        are checked when days is None, otherwise the last X days. Returns a report with
+        counts per outcome and the estimated duration of the real run.
+        """
+        rule = self.forwarding_rules.get(chat_id)
+        report = {"chat_id": chat_id, "mode": "unread" if days is None else "historical", "days": days,
+                  "scanned": 0, "would_send": 0, "outcomes": {}, "send_requests": 0, "estimated_seconds": 0.0}
+        if not rule:
+            report["error"] = "No rule configured"
+            return report
+
+        destinations = self._get_rule_destinations(rule)
+        account = self._get_rule_account(rule)
+        outcomes = report["outcomes"]
+        content_seen = {}
+
+        def tally(page):
+            report["scanned"] += len(page)
+            page_outcomes = self._get_page_outcomes(page, chat_id, rule, account)
+            for i, outcome in enumerate(page_outcomes):
+                outcome, _ = self._hydrate_page_row(page, i, outcome, chat_id, account)
+                if outcome is None and self.content_dedup_window_seconds > 0:
+                    # Content seen earlier in this scan would be skipped by the real run's dedup.
+                    content_key = self._get_content_key(page.messages[i])
+                    if content_key is not None:
+                        last_date = content_seen.get(content_key)
+                        if last_date is not None and abs(last_date - page.dates[i]) < self.content_dedup_window_seconds:
+                            outcome = RULE_COUNTERS[COUNTER_DROPPED_CONTENT_DEDUP]
+                        content_seen[content_key] = page.dates[i]
+                outcome = outcome or "would_send"
+                outcomes[outcome] = outcomes.get(outcome, 0) + 1
+
+        if days is None:
+            tally(await self._get_unread_messages_after_boundary(chat_id, self._get_unread_boundary(chat_id), limit=500))
+        else:
+            async for page in self._iter_chat_history(chat_id, int(time.time()) - (days * 24 * 60 * 60)):
+                tally(page)
+
+        report["would_send"] = outcomes.get("would_send", 0)
+        report["send_requests"] = report["would_send"] * len(destinations)
+        report["estimated_seconds"] = round(self._estimate_send_seconds(report["send_requests"], len(destinations)), 1)
+        log(f"[{self.id}] Dry run for chat {chat_id}: {report}")
+        return report
+
+    def _estimate_send_seconds(self, request_count, destination_count):
+        """Estimates how long the dispatcher needs for a backfill of this many send requests."""
+        if not request_count:
+            return 0.0
+        estimate = 0.0
+        if self.send_budget_per_minute > 0:
+            estimate = request_count * 60.0 / self.send_budget_per_minute
+        if self.destination_interval_seconds > 0 and destination_count:
+            estimate = max(estimate, (request_count / destination_count) * self.destination_interval_seconds)
+        if estimate == 0.0 and self.metrics.stage_counts[STAGE_ACK]:
+            # Unlimited: bounded by server round trips with a handful of backfill sends in flight.
+            average_ack_seconds = self.metrics.stage_totals_ms[STAGE_ACK] / self.metrics.stage_counts[STAGE_ACK] / 1000.0
+            estimate = request_count * average_ack_seconds / SendDispatcher.MAX_PENDING_BACKFILL
+        return estimate
+
+    async def _process_historical_messages(self, chat_id, days, job=None):
+        """Processes historical messages for a single chat going back X days. Progress is reported on job, if given."""
         try:
             rule = self.forwarding_rules.get(chat_id)
             if not rule:
@@ -1102,33 +3382,38 @@ class AutoForwarderPlugin(BasePlugin):
                 return {"success": False, "processed": 0, "error": "No rule configured"}
             
             cutoff_timestamp = int(time.time()) - (days * 24 * 60 * 60)
-            messages = self._scan_chat_history(chat_id, cutoff_timestamp)
+            messages = await self._scan_chat_history(chat_id, cutoff_timestamp)
             
             if not messages:
                 log(f"[{self.id}] No historical messages found for chat {chat_id}")
                 return {"success": True, "processed": 0, "error": None}
             
-            # Sort oldest first
-            messages.sort(key=lambda m: m.id)
+            if job:
+                job.total += len(messages)
             
+            account = self._get_rule_account(rule)
+            # The page filters run over the whole batch; only rows that pass become MessageObjects
+            outcomes = self._get_page_outcomes(messages, chat_id, rule, account)
             processed = 0
-            for msg in messages:
+            for i in messages.oldest_first():
+                if job:
+                    job.done += 1
                 try:
-                    # Create MessageObject for proper processing
-                    msg_obj = self._create_message_object_safely(msg)
-                    if not msg_obj:
-                        continue
-                    
-                    # Check if message would pass all filters
-                    if self._would_message_pass_filters(msg_obj, chat_id):
-                        self._send_forwarded_message(msg_obj, rule)
+                    outcome, msg_obj = self._hydrate_page_row(messages, i, outcomes[i], chat_id, account)
+                    if outcome is None:
+                        # Wait for the dispatcher; live forwards take precedence over backfills.
+                        if not await self._get_send_dispatcher(account).wait_for_capacity(PRIORITY_HISTORICAL):
+                            break
+                        self._send_forwarded_message(msg_obj, rule, priority=PRIORITY_HISTORICAL)
                         processed += 1
-                        time.sleep(0.5)  # Small delay to avoid spam
                 except Exception:
-                    log(f"[{self.id}] ERROR processing message {msg.id}: {traceback.format_exc()}")
+                    log(f"[{self.id}] ERROR processing message {messages.ids[i]}: {traceback.format_exc()}")
             
             log(f"[{self.id}] Processed {processed} historical messages for chat {chat_id}")
             return {"success": True, "processed": processed, "error": None}
+        except asyncio.TimeoutError:
+            log(f"[{self.id}] TIMEOUT getting message history for chat {chat_id}")
+            return {"success": False, "processed": 0, "error": "Timed out fetching messages"}
         except Exception as e:
             log(f"[{self.id}] ERROR in _process_historical_messages: {traceback.format_exc()}")
             return {"success": False, "processed": 0, "error": str(e)}
@@ -1145,8 +3430,11 @@ class AutoForwarderPlugin(BasePlugin):
             log(f"[{self.id}] Could not get current account: {traceback.format_exc()}")
         return 0
 
-    def _create_message_object_safely(self, message):
-        """Creates a MessageObject from a TLRPC message."""
+    def _create_message_object_safely(self, message, account=None):
+        """
+        Creates a MessageObject from a TLRPC message, bound to the given account (the current one
+        by default). The constructor flags that worked last time are tried first.
+        """
         try:
             if not message:
                 return None
@@ -1157,42 +3445,41 @@ class AutoForwarderPlugin(BasePlugin):
                 if not hasattr(message, attr) or getattr(message, attr) is None:
                     return None
             
-            current_account = self._get_current_account_safely()
+            current_account = self._get_current_account_safely() if account is None else account
             
             # Try different MessageObject constructor parameters
-            try:
-                message_obj = MessageObject(current_account, message, True, True)
-                return message_obj
-            except Exception:
+            order = [self.message_object_args] if self.message_object_args else []
+            order += [args for args in MESSAGE_OBJECT_ARGS if args != self.message_object_args]
+            for args in order:
                 try:
-                    return MessageObject(current_account, message, False, False)
+                    message_obj = MessageObject(current_account, message, *args)
                 except Exception:
-                    try:
-                        return MessageObject(current_account, message, True)
-                    except Exception:
-                        return None
+                    continue
+                self.message_object_args = args
+                return message_obj
+            return None
         except Exception:
             log(f"[{self.id}] ERROR in _create_message_object_safely: {traceback.format_exc()}")
         
         return None
 
-    def _passes_combined_keyword_filter(self, text_to_check, local_pattern, use_global, global_pattern):
-        """Checks if text passes both local and global regex filters."""
+    def _passes_combined_keyword_filter(self, message_text, local_pattern, use_global, global_pattern, rule_key=None):
+        """Checks if a MessageText passes both local and global regex filters."""
         if not local_pattern and not (use_global and global_pattern):
             return True
         
-        if not text_to_check:
+        if not message_text:
             return False
         
         # Check local pattern
         local_pass = True
         if local_pattern:
-            local_pass = self._passes_keyword_filter(text_to_check, local_pattern)
+            local_pass = self._passes_keyword_filter(message_text, local_pattern, rule_key, rule_key)
         
         # Check global pattern
         global_pass = True
         if use_global and global_pattern:
-            global_pass = self._passes_keyword_filter(text_to_check, global_pattern)
+            global_pass = self._passes_keyword_filter(message_text, global_pattern, rule_key, GLOBAL_KEYWORD_PATTERN)
         
         # Both must pass (logical AND)
         return local_pass and global_pass
@@ -1207,31 +3494,59 @@ class AutoForwarderPlugin(BasePlugin):
             Input(key="deferral_timeout_ms", text="Media Deferral Timeout (ms)", default=str(DEFAULT_SETTINGS["deferral_timeout_ms"]), subtext="Safety net for slow media downloads. Increase if files fail to send."),
             Input(key="album_timeout_ms", text="Album Buffering Timeout (ms)", default=str(DEFAULT_SETTINGS["album_timeout_ms"]), subtext="How long to wait for all media in an album before sending."),
             Input(key="sequential_delay_seconds", text="Sequential Delay (Seconds)", default=str(DEFAULT_SETTINGS["sequential_delay_seconds"]), subtext="Forces sequential order but slows down forwarding. 0 to disable."),
+            Input(key="forward_batch_window_ms", text="Native Forward Batch Window (ms)", default=str(DEFAULT_SETTINGS["forward_batch_window_ms"]), subtext="How long to collect messages for rules using Native Forward before sending them in one request."),
+            Input(key="destination_interval_seconds", text="Per-Destination Interval (Seconds)", default=str(DEFAULT_SETTINGS["destination_interval_seconds"]), subtext="Minimum time between sends to the same destination. Different destinations are sent in parallel. 0 to disable."),
+            Input(key="send_budget_per_minute", text="Send Budget (per Minute)", default=str(DEFAULT_SETTINGS["send_budget_per_minute"]), subtext="Shared limit for live forwarding and backfills. Live messages always go first. 0 for no limit."),
+            Input(key="queue_high_water_mark", text="Queue High-Water Mark", default=str(DEFAULT_SETTINGS["queue_high_water_mark"]), subtext="Maximum messages held in memory. Extra messages are parked on disk and fetched again when the queue drains."),
             Input(key="deduplication_window_seconds", text="Deduplication Window (Seconds)", default=str(DEFAULT_SETTINGS["deduplication_window_seconds"]), subtext="Time window to ignore duplicate notifications from the client."),
             Input(key="min_msg_length", text="Minimum Message Length", default=str(DEFAULT_SETTINGS["min_msg_length"]), subtext="For text-only messages."),
             Input(key="max_msg_length", text="Maximum Message Length", default=str(DEFAULT_SETTINGS["max_msg_length"]), subtext="For text-only messages."),
             Input(key="antispam_delay_seconds", text="Anti-Spam Delay (Seconds)", default=str(DEFAULT_SETTINGS["antispam_delay_seconds"]), subtext="Minimum time between forwards from the same user. 0 to disable."),
-            Input(key=GLOBAL_KEYWORD_PATTERN, text="Global Keyword/Regex Filter (optional)", default="", subtext="Apply this filter to all rules that enable 'use global regex'."),
+            Input(key="content_dedup_window_seconds", text="Content Dedup Window (Seconds)", default=str(DEFAULT_SETTINGS["content_dedup_window_seconds"]), subtext="Skip the same photo, file or text sent to a destination again within this window. 0 to disable."),
+            Input(key=GLOBAL_KEYWORD_PATTERN, text="Global Keyword/Regex Filter (optional)", default="", subtext="Apply this filter to all rules that enable 'use global regex'.", on_change=self._validate_global_pattern),
+            Input(key="regex_timeout_ms", text="Regex Time Limit (ms)", default=str(DEFAULT_SETTINGS["regex_timeout_ms"]), subtext=f"A pattern that runs longer {REGEX_TIMEOUT_DISABLE_THRESHOLD} times is switched off, which pauses its rules until you edit it. 0 to disable."),
+            Text(
+                text=f"Keyword Matching: {TEXT_NORMALIZATION_MODES[self.text_normalization]}",
+                icon="msg_edit", on_click=lambda v: self._cycle_text_normalization()
+            ),
+            Text(
+                text=f"Sync Edits & Deletions: {'On' if self.sync_edits_deletes else 'Off'}",
+                icon="msg_retry", on_click=lambda v: self._toggle_edit_sync()
+            ),
+            Input(key="id_map_max_entries", text="Sync Memory (Messages)", default=str(DEFAULT_SETTINGS["id_map_max_entries"]), subtext="How many recent forwarded messages can still be edited or deleted with their source. 0 for no limit."),
             Divider(),
             Header(text="Global Actions"),
             Text(text="Fwd Unread (All Rules)", icon="msg_unread", accent=True, on_click=lambda v: self._forward_unread_all_rules()),
             Text(text="Fwd Last X Days (All Rules)", icon="msg_calendar", accent=True, on_click=lambda v: self._forward_historical_all_rules()),
+            Text(text="Dry Run Unread (All Rules)", icon="msg_stats", accent=True, on_click=lambda v: self._dry_run_all_rules(None)),
+            Text(
+                text=f"Live Dry Run: {'On – nothing is sent' if self.dry_run_live else 'Off'}",
+                icon="msg_info", accent=True, on_click=lambda v: self._toggle_live_dry_run()
+            ),
+            Divider(),
+            Header(text="Statistics"),
+            Text(text=self._get_queue_status_text(), icon="msg_stats"),
+            Text(text=self._get_latency_summary_text(), icon="msg_recent"),
+            Text(text=self._get_counter_summary_text(), icon="msg_forward"),
+            Text(text="Export Statistics (JSON)", icon="msg_copy", accent=True, on_click=lambda v: self._export_statistics()),
+            Text(text="Reset Statistics", icon="msg_delete", accent=True, on_click=lambda v: self._reset_statistics()),
+            Text(text=f"Failed Sends ({len(self.dead_letters)})", icon="msg_info", accent=True, on_click=lambda v: self._show_dead_letters()),
+            Text(text=f"Background Jobs ({len(self.async_core.jobs)})", icon="msg_recent", accent=True, on_click=lambda v: self._show_background_jobs()),
+            Text(
+                text=f"Stop Trace Recording ({self.trace_recorder.batches_written} batches)" if self.trace_recorder else "Record Notification Trace",
+                icon="msg_video", accent=True,
+                on_click=lambda v: self._toggle_trace_recording()
+            ),
             Divider(),
             Header(text="Active Forwarding Rules")
         ]
         if not self.forwarding_rules:
             settings_ui.append(Text(text="No rules configured. Set one from any chat's menu.", icon="msg_info"))
         else:
-            sorted_rules = sorted(self.forwarding_rules.items(), key=lambda item: self._get_chat_name(item[0]).lower())
-            for source_id, rule_data in sorted_rules:
-                source_name = self._get_chat_name(source_id)
-                dest_name = self._get_chat_name(rule_data.get("destination", 0)) if rule_data.get("destination") else "Not Set"
-                style = "(Copy)"
-                settings_ui.append(Text(
-                    text=f"From: {source_name}\nTo: {dest_name} {style}",
-                    icon="msg_edit",
-                    on_click=lambda v, sid=source_id: self._show_rule_action_dialog(sid)
-                ))
+            settings_ui.extend(self._build_rule_browser())
+        settings_ui.append(Text(text="Import Rules", icon="msg_add", accent=True, on_click=lambda v: self._show_rules_import_dialog()))
+        if self.forwarding_rules:
+            settings_ui.append(Text(text="Export Rules", icon="msg_copy", accent=True, on_click=lambda v: self._show_rules_export_dialog()))
         settings_ui.append(Divider())
         settings_ui.extend([
             Header(text="About & Support"),
@@ -1266,6 +3581,13 @@ class AutoForwarderPlugin(BasePlugin):
             source_name = self._get_chat_name(current_chat_id)
             run_on_ui_thread(lambda: self._show_destination_input_dialog(current_chat_id, source_name))
 
+    def _start_job(self, kind, chat_id, label, job_factory):
+        """Starts a background job, or tells the user that the same job is already queued or running."""
+        job, started = self.async_core.start_job(kind, chat_id, label, job_factory)
+        if not started:
+            BulletinHelper.show_info(f"Already running: {job.describe()}", get_last_fragment())
+        return started
+
     def _on_process_unread_click(self, context):
         """Handles clicks on the 'Process Unread Messages' menu item."""
         current_chat_id = context.get("dialog_id")
@@ -1277,16 +3599,15 @@ class AutoForwarderPlugin(BasePlugin):
             BulletinHelper.show_error("No forwarding rule configured for this chat.", get_last_fragment())
             return
         
-        BulletinHelper.show_info("Processing unread messages...", get_last_fragment())
-        
-        def process():
-            result = self._process_unread_messages(current_chat_id)
+        async def process(job):
+            result = await self._process_unread_messages(current_chat_id, job)
             if result["success"]:
                 BulletinHelper.show_info(f"Processed {result['processed']} unread messages!", get_last_fragment())
             else:
                 BulletinHelper.show_error(f"Error: {result['error']}", get_last_fragment())
         
-        threading.Thread(target=process, daemon=True).start()
+        if self._start_job("unread", current_chat_id, f"Unread: {self._get_chat_name(current_chat_id)}", process):
+            BulletinHelper.show_info("Processing unread messages...", get_last_fragment())
 
     def _on_process_historical_click(self, context):
         """Handles clicks on the 'Process Messages from Date' menu item."""
@@ -1323,20 +3644,26 @@ class AutoForwarderPlugin(BasePlugin):
                 days_str = days_input.getText().toString()
                 days = self._clamp_historical_days(int(days_str))
                 
-                BulletinHelper.show_info(f"Processing last {days} days...", get_last_fragment())
-                
-                def process():
-                    result = self._process_historical_messages(current_chat_id, days)
+                async def process(job):
+                    result = await self._process_historical_messages(current_chat_id, days, job)
                     if result["success"]:
                         BulletinHelper.show_info(f"Processed {result['processed']} messages from last {days} days!", get_last_fragment())
                     else:
                         BulletinHelper.show_error(f"Error: {result['error']}", get_last_fragment())
                 
-                threading.Thread(target=process, daemon=True).start()
+                if self._start_job("historical", current_chat_id, f"Last {days} days: {self._get_chat_name(current_chat_id)}", process):
+                    BulletinHelper.show_info(f"Processing last {days} days...", get_last_fragment())
+            except ValueError:
+                BulletinHelper.show_error("Please enter a valid number.", get_last_fragment())
+        
+        def on_dry_run(d, w):
+            try:
+                self._dry_run_all_rules(self._clamp_historical_days(int(days_input.getText().toString())), chat_ids=[current_chat_id])
             except ValueError:
                 BulletinHelper.show_error("Please enter a valid number.", get_last_fragment())
         
         builder.set_positive_button("Proceed", on_proceed)
+        builder.set_neutral_button("Dry Run", on_dry_run)
         builder.set_negative_button("Cancel", None)
         run_on_ui_thread(builder.show)
 
@@ -1397,6 +3724,13 @@ class AutoForwarderPlugin(BasePlugin):
             input_field.setLayoutParams(input_field_params)
             main_layout.addView(input_field)
 
+            extra_destinations_input = EditText(activity)
+            extra_destinations_input.setHint("More Destinations: ID or ID:TopicID, CSV (optional)")
+            extra_destinations_input.setTextColor(Theme.getColor(Theme.key_dialogTextBlack))
+            extra_destinations_input.setHintTextColor(Theme.getColor(Theme.key_dialogTextHint))
+            extra_destinations_input.setLayoutParams(input_field_params)
+            main_layout.addView(extra_destinations_input)
+
             keyword_filter_input = EditText(activity)
             keyword_filter_input.setHint("Keyword/Regex Filter (optional)")
             keyword_filter_input.setTextColor(Theme.getColor(Theme.key_dialogTextBlack))
@@ -1422,6 +3756,11 @@ class AutoForwarderPlugin(BasePlugin):
             drop_author_checkbox.setTextColor(Theme.getColor(Theme.key_dialogTextBlack)); drop_author_checkbox.setButtonTintList(checkbox_tint_list)
             drop_author_checkbox.setLayoutParams(checkbox_params); main_layout.addView(drop_author_checkbox)
     
+            native_forward_checkbox = CheckBox(activity)
+            native_forward_checkbox.setText("Native Forward (batched, keeps albums)")
+            native_forward_checkbox.setTextColor(Theme.getColor(Theme.key_dialogTextBlack)); native_forward_checkbox.setButtonTintList(checkbox_tint_list)
+            native_forward_checkbox.setLayoutParams(checkbox_params); main_layout.addView(native_forward_checkbox)
+    
             quote_replies_checkbox = CheckBox(activity)
             quote_replies_checkbox.setText("Quote Replies")
             quote_replies_checkbox.setTextColor(Theme.getColor(Theme.key_dialogTextBlack)); quote_replies_checkbox.setButtonTintList(checkbox_tint_list)
@@ -1505,6 +3844,9 @@ class AutoForwarderPlugin(BasePlugin):
                 dest_entity = self._get_chat_entity(existing_rule.get("destination", 0))
                 input_field.setText(f"@{dest_entity.username}" if dest_entity and hasattr(dest_entity, 'username') and dest_entity.username else str(existing_rule.get("destination", 0)))
     
+                extra_destinations = self._get_rule_destinations(existing_rule)[1:]
+                extra_destinations_input.setText(", ".join(f"{d}:{t}" if t > 0 else str(d) for d, t in extra_destinations))
+    
                 existing_topic_id = existing_rule.get("destination_topic_id", 0)
                 if existing_topic_id > 0:
                     forward_to_topic_checkbox.setChecked(True)
@@ -1514,11 +3856,12 @@ class AutoForwarderPlugin(BasePlugin):
                 keyword_filter_input.setText(existing_rule.get("keyword_pattern", "")); author_filter_input.setText(existing_rule.get("author_filter", ""))
                 use_global_regex_checkbox.setChecked(existing_rule.get("use_global_regex", False))
                 drop_author_checkbox.setChecked(existing_rule.get("drop_author", True)); quote_replies_checkbox.setChecked(existing_rule.get("quote_replies", True))
+                native_forward_checkbox.setChecked(existing_rule.get("native_forward", False))
                 forward_users_checkbox.setChecked(existing_rule.get("forward_users", True)); forward_bots_checkbox.setChecked(existing_rule.get("forward_bots", True))
                 forward_outgoing_checkbox.setChecked(existing_rule.get("forward_outgoing", True))
                 for key, cb in filter_checkboxes.items(): cb.setChecked(existing_rule.get("filters", {}).get(key, True))
             else:
-                drop_author_checkbox.setChecked(False); quote_replies_checkbox.setChecked(True)
+                drop_author_checkbox.setChecked(False); quote_replies_checkbox.setChecked(True); native_forward_checkbox.setChecked(False)
                 forward_users_checkbox.setChecked(True); forward_bots_checkbox.setChecked(True); forward_outgoing_checkbox.setChecked(True)
                 for cb in filter_checkboxes.values(): cb.setChecked(True)
     
@@ -1537,7 +3880,8 @@ class AutoForwarderPlugin(BasePlugin):
                     drop_author_checkbox.isChecked(), quote_replies_checkbox.isChecked(),
                     forward_to_topic_checkbox.isChecked(), topic_id,
                     forward_users_checkbox.isChecked(), forward_bots_checkbox.isChecked(),
-                    forward_outgoing_checkbox.isChecked(), filter_settings)
+                    forward_outgoing_checkbox.isChecked(), filter_settings,
+                    native_forward_checkbox.isChecked(), extra_destinations_input.getText().toString())
     
             builder.set_positive_button("Set", on_set_click)
             builder.set_negative_button("Cancel", lambda d, w: d.dismiss())
@@ -1545,8 +3889,10 @@ class AutoForwarderPlugin(BasePlugin):
     
             all_ui_elements = {
                 'input_field': input_field, 'keyword_filter_input': keyword_filter_input,
+                'extra_destinations_input': extra_destinations_input,
                 'use_global_regex_checkbox': use_global_regex_checkbox,
                 'drop_author_checkbox': drop_author_checkbox, 'quote_replies_checkbox': quote_replies_checkbox,
+                'native_forward_checkbox': native_forward_checkbox,
                 'forward_to_topic_checkbox': forward_to_topic_checkbox, 'topic_id_input': topic_id_input,
                 'author_filter_input': author_filter_input, 'forward_users_checkbox': forward_users_checkbox,
                 'forward_bots_checkbox': forward_bots_checkbox, 'forward_outgoing_checkbox': forward_outgoing_checkbox,
@@ -1566,18 +3912,25 @@ class AutoForwarderPlugin(BasePlugin):
         builder.set_message("Click 'Proceed', then go to your desired destination chat (or topic) and REPLY to ANY message with the exact word 'set'. The reply will be auto-deleted.")
         
         def on_proceed(b, w):
+            try:
+                extra_destinations = self._parse_extra_destinations(ui_elements['extra_destinations_input'].getText().toString())
+            except ValueError as e:
+                BulletinHelper.show_error(str(e), get_last_fragment())
+                return
             rule_settings = {
                 "keyword_pattern": ui_elements['keyword_filter_input'].getText().toString(),
                 "author_filter": ui_elements['author_filter_input'].getText().toString(),
                 "use_global_regex": ui_elements['use_global_regex_checkbox'].isChecked(),
                 "drop_author": ui_elements['drop_author_checkbox'].isChecked(),
                 "quote_replies": ui_elements['quote_replies_checkbox'].isChecked(),
+                "native_forward": ui_elements['native_forward_checkbox'].isChecked(),
                 "forward_to_topic": ui_elements['forward_to_topic_checkbox'].isChecked(),
                 "destination_topic_id": 0,
                 "forward_users": ui_elements['forward_users_checkbox'].isChecked(),
                 "forward_bots": ui_elements['forward_bots_checkbox'].isChecked(),
                 "forward_outgoing": ui_elements['forward_outgoing_checkbox'].isChecked(),
-                "filter_settings": {key: cb.isChecked() for key, cb in ui_elements['filter_checkboxes'].items()}
+                "filter_settings": {key: cb.isChecked() for key, cb in ui_elements['filter_checkboxes'].items()},
+                "extra_destinations": extra_destinations
             }
             
             self._start_reply_listening(source_id, source_name, rule_settings)
@@ -1675,22 +4028,36 @@ class AutoForwarderPlugin(BasePlugin):
     def _process_destination_input(self, source_id, source_name, user_input, *args):
         """Processes the destination provided manually in the settings dialog."""
         (keyword_pattern, author_filter, use_global_regex, drop_author, quote_replies, forward_to_topic, 
-         topic_id, forward_users, forward_bots, forward_outgoing, filter_settings) = args
+         topic_id, forward_users, forward_bots, forward_outgoing, filter_settings, native_forward, extra_destinations_input) = args
 
         cleaned_input = (user_input or "").strip()
         if not cleaned_input: 
             BulletinHelper.show_error("Destination cannot be empty.")
             return
 
+        try:
+            extra_destinations = self._parse_extra_destinations(extra_destinations_input)
+        except ValueError as e:
+            BulletinHelper.show_error(str(e), get_last_fragment())
+            return
+
+        regex_risk = find_regex_risk((keyword_pattern or "").strip())
+        if regex_risk and not regex_engine:
+            BulletinHelper.show_error(f"Keyword regex rejected ({regex_risk}): patterns like (a+)+ can freeze forwarding. Please simplify it.", get_last_fragment())
+            return
+        if regex_risk:
+            BulletinHelper.show_info(f"Keyword regex has a {regex_risk}; it will be switched off if it gets too slow.", get_last_fragment())
+
         rule_settings = {
             "keyword_pattern": keyword_pattern, "author_filter": author_filter, "use_global_regex": use_global_regex,
             "drop_author": drop_author, "quote_replies": quote_replies, "forward_to_topic": forward_to_topic, 
             "destination_topic_id": topic_id, "forward_users": forward_users, "forward_bots": forward_bots, 
-            "forward_outgoing": forward_outgoing, "filter_settings": filter_settings
+            "forward_outgoing": forward_outgoing, "filter_settings": filter_settings, "native_forward": native_forward,
+            "extra_destinations": extra_destinations
         }
 
         if "/joinchat/" in cleaned_input or "/+" in cleaned_input:
-            self._resolve_as_invite_link(cleaned_input, source_id, source_name, rule_settings)
+            self.async_core.submit(self._resolve_as_invite_link(cleaned_input, source_id, source_name, rule_settings))
             return
         
         try:
@@ -1699,48 +4066,58 @@ class AutoForwarderPlugin(BasePlugin):
             if cached_entity:
                 self._finalize_rule(source_id, source_name, self._get_id_for_storage(cached_entity), self._get_entity_name(cached_entity), rule_settings)
                 return
-            self._resolve_by_id_shotgun(input_as_int, source_id, source_name, rule_settings)
+            self.async_core.submit(self._resolve_by_id_shotgun(input_as_int, source_id, source_name, rule_settings))
         except ValueError:
-            self._resolve_as_username(cleaned_input, source_id, source_name, rule_settings)
+            self.async_core.submit(self._resolve_as_username(cleaned_input, source_id, source_name, rule_settings))
 
-    def _resolve_as_invite_link(self, cleaned_input, source_id, source_name, rule_settings):
+    def _parse_extra_destinations(self, text):
+        """
+        Parses the 'More Destinations' field ("ID" or "ID:TopicID", comma separated) into
+        destination dicts. Each chat must already be known to the client.
+        """
+        destinations = []
+        for token in (text or "").split(','):
+            token = token.strip()
+            if not token: continue
+            id_part, _, topic_part = token.partition(':')
+            try:
+                input_id = int(id_part.strip())
+                topic_id = int(topic_part.strip()) if topic_part.strip() else 0
+            except ValueError:
+                raise ValueError(f"Invalid destination '{token}'. Use ID or ID:TopicID.")
+            entity = self._get_chat_entity_from_input_id(input_id)
+            if not entity:
+                raise ValueError(f"Destination {input_id} not found. Open that chat once, then try again.")
+            destinations.append({"id": self._get_id_for_storage(entity), "topic_id": topic_id})
+        return destinations
+
+    async def _resolve_as_invite_link(self, cleaned_input, source_id, source_name, rule_settings):
         """Resolves a destination using a t.me/joinchat/... or t.me/+... link."""
         try:
             hash_val = cleaned_input.split("/")[-1]
             req = TLRPC.TL_messages_checkChatInvite(); req.hash = hash_val
-            
-            def on_check_invite(response, error):
-                if error or not response or not hasattr(response, 'chat'):
-                    error_text = getattr(error, 'text', 'Invalid or expired link')
-                    BulletinHelper.show_error(f"Failed to resolve link: {error_text}", get_last_fragment())
-                    return
-                dest_entity = response.chat
-                if dest_entity:
-                    get_messages_controller().putChat(dest_entity, False)
-                    dest_id = self._get_id_for_storage(dest_entity)
-                    self._finalize_rule(source_id, source_name, dest_id, self._get_entity_name(dest_entity), rule_settings)
-            
-            send_request(req, RequestCallback(on_check_invite))
+            response = await self.async_core.request(req)
+        except RequestError as e:
+            BulletinHelper.show_error(f"Failed to resolve link: {e.error.text if e.error else 'Invalid or expired link'}", get_last_fragment())
+            return
+        except asyncio.TimeoutError:
+            BulletinHelper.show_error("Failed to resolve link: request timed out.", get_last_fragment())
+            return
         except Exception as e:
             log(f"[{self.id}] Failed to process invite link: {e}")
+            return
+
+        dest_entity = getattr(response, 'chat', None)
+        if not dest_entity:
+            BulletinHelper.show_error("Failed to resolve link: Invalid or expired link", get_last_fragment())
+            return
+        get_messages_controller().putChat(dest_entity, False)
+        dest_id = self._get_id_for_storage(dest_entity)
+        self._finalize_rule(source_id, source_name, dest_id, self._get_entity_name(dest_entity), rule_settings)
 
-    def _resolve_by_id_shotgun(self, input_as_int, source_id, source_name, rule_settings):
+    async def _resolve_by_id_shotgun(self, input_as_int, source_id, source_name, rule_settings):
         """Resolves a numeric ID that is not in the local cache by making a network request."""
         log(f"[{self.id}] ID {input_as_int} not in cache. Attempting network lookup.")
-        
-        def on_get_chats_complete(response, error):
-            if error or not response or not hasattr(response, 'chats') or response.chats.isEmpty():
-                error_text = getattr(error, 'text', 'Not found')
-                BulletinHelper.show_error(f"Could not find chat by ID: {input_as_int}. Reason: {error_text}", get_last_fragment())
-                return
-            
-            dest_entity = response.chats.get(0)
-            if dest_entity:
-                get_messages_controller().putChat(dest_entity, True)
-                dest_id = self._get_id_for_storage(dest_entity)
-                self._finalize_rule(source_id, source_name, dest_id, self._get_entity_name(dest_entity), rule_settings)
-            else:
-                BulletinHelper.show_error(f"Could not find chat by ID: {input_as_int}", get_last_fragment())
 
         req = TLRPC.TL_messages_getChats()
         id_list = ArrayList()
@@ -1752,38 +4129,55 @@ class AutoForwarderPlugin(BasePlugin):
         possible_ids.add(-abs(input_as_int))
         id_list.addAll(possible_ids)
         req.id = id_list
-        send_request(req, RequestCallback(on_get_chats_complete))
+        try:
+            response = await self.async_core.request(req)
+        except RequestError as e:
+            BulletinHelper.show_error(f"Could not find chat by ID: {input_as_int}. Reason: {e.error.text if e.error else 'Not found'}", get_last_fragment())
+            return
+        except asyncio.TimeoutError:
+            BulletinHelper.show_error(f"Could not find chat by ID: {input_as_int}. Reason: request timed out", get_last_fragment())
+            return
 
-    def _resolve_as_username(self, username, source_id, source_name, rule_settings):
+        chats = getattr(response, 'chats', None)
+        dest_entity = chats.get(0) if chats and not chats.isEmpty() else None
+        if dest_entity:
+            get_messages_controller().putChat(dest_entity, True)
+            dest_id = self._get_id_for_storage(dest_entity)
+            self._finalize_rule(source_id, source_name, dest_id, self._get_entity_name(dest_entity), rule_settings)
+        else:
+            BulletinHelper.show_error(f"Could not find chat by ID: {input_as_int}", get_last_fragment())
+
+    async def _resolve_as_username(self, username, source_id, source_name, rule_settings):
         """Resolver for public links (t.me/...) and @usernames."""
         log(f"[{self.id}] Resolving '{username}' as a username/public link.")
-        
-        def on_resolve_complete(response, error):
-            if error or not response:
-                error_text = getattr(error, 'text', 'Not found')
-                BulletinHelper.show_error(f"Could not resolve '{username}': {error_text}", get_last_fragment())
-                return
-            
-            dest_entity = None
-            if hasattr(response, 'chats') and response.chats and not response.chats.isEmpty():
-                dest_entity = response.chats.get(0)
-                get_messages_controller().putChats(response.chats, False)
-            elif hasattr(response, 'users') and response.users and not response.users.isEmpty():
-                dest_entity = response.users.get(0)
-                get_messages_controller().putUsers(response.users, False)
-            
-            if dest_entity:
-                dest_id = self._get_id_for_storage(dest_entity)
-                self._finalize_rule(source_id, source_name, dest_id, self._get_entity_name(dest_entity), rule_settings)
-            else:
-                BulletinHelper.show_error(f"Could not resolve '{username}'.", get_last_fragment())
-        
+
         try:
             req = TLRPC.TL_contacts_resolveUsername()
             req.username = username.replace("@", "").split("/")[-1]
-            send_request(req, RequestCallback(on_resolve_complete))
+            response = await self.async_core.request(req)
+        except RequestError as e:
+            BulletinHelper.show_error(f"Could not resolve '{username}': {e.error.text if e.error else 'Not found'}", get_last_fragment())
+            return
+        except asyncio.TimeoutError:
+            BulletinHelper.show_error(f"Could not resolve '{username}': request timed out", get_last_fragment())
+            return
         except Exception:
             log(f"[{self.id}] ERROR resolving username: {traceback.format_exc()}")
+            return
+
+        dest_entity = None
+        if hasattr(response, 'chats') and response.chats and not response.chats.isEmpty():
+            dest_entity = response.chats.get(0)
+            get_messages_controller().putChats(response.chats, False)
+        elif hasattr(response, 'users') and response.users and not response.users.isEmpty():
+            dest_entity = response.users.get(0)
+            get_messages_controller().putUsers(response.users, False)
+
+        if dest_entity:
+            dest_id = self._get_id_for_storage(dest_entity)
+            self._finalize_rule(source_id, source_name, dest_id, self._get_entity_name(dest_entity), rule_settings)
+        else:
+            BulletinHelper.show_error(f"Could not resolve '{username}'.", get_last_fragment())
 
     def _finalize_rule(self, source_id, source_name, destination_id, dest_name, rule_settings):
         """Saves the final, resolved rule to storage and notifies the user."""
@@ -1797,8 +4191,11 @@ class AutoForwarderPlugin(BasePlugin):
         rule_data = {
             "destination": destination_id,
             "enabled": True,
+            # A new rule belongs to the account it was set up in; a modified one keeps its account.
+            "account": rule_settings.get("account", self._get_source_account(source_id)),
             "drop_author": rule_settings["drop_author"],
             "quote_replies": rule_settings["quote_replies"],
+            "native_forward": rule_settings.get("native_forward", False),
             "destination_topic_id": topic_id,
             "keyword_pattern": rule_settings["keyword_pattern"],
             "use_global_regex": rule_settings.get("use_global_regex", False),
@@ -1808,7 +4205,12 @@ class AutoForwarderPlugin(BasePlugin):
             "forward_outgoing": rule_settings["forward_outgoing"],
             "filters": rule_settings["filter_settings"]
         }
-        log(f"[{self.id}] Finalizing rule. Saving topic ID: {topic_id}")
+        destinations = [{"id": destination_id, "topic_id": topic_id}]
+        for extra in rule_settings.get("extra_destinations", []):
+            if all(extra["id"] != d["id"] for d in destinations):
+                destinations.append(extra)
+        rule_data["destinations"] = destinations
+        log(f"[{self.id}] Finalizing rule. Saving topic ID: {topic_id}, destinations: {len(destinations)}")
     
         self.forwarding_rules[source_id] = rule_data
         self._save_forwarding_rules()
@@ -1842,15 +4244,17 @@ class AutoForwarderPlugin(BasePlugin):
             BulletinHelper.show_error("No rules configured.", get_last_fragment())
             return
         
-        BulletinHelper.show_info("Processing unread messages for all rules...", get_last_fragment())
-        
-        def process_all():
+        async def process_all(job):
             total_processed = 0
             errors = []
             
-            for chat_id in self.forwarding_rules.keys():
+            for chat_id in list(self.forwarding_rules.keys()):
+                # A chat with its own unread job running is left to that job.
+                if self.async_core.find_job("unread", chat_id, exact=True):
+                    continue
+                job.note = self._get_chat_name(chat_id)
                 try:
-                    result = self._process_unread_messages(chat_id)
+                    result = await self._process_unread_messages(chat_id, job)
                     if result["success"]:
                         total_processed += result["processed"]
                     else:
@@ -1866,7 +4270,8 @@ class AutoForwarderPlugin(BasePlugin):
             else:
                 BulletinHelper.show_info(f"Successfully processed {total_processed} unread messages!", get_last_fragment())
         
-        threading.Thread(target=process_all, daemon=True).start()
+        if self._start_job("unread", None, "Unread: all rules", process_all):
+            BulletinHelper.show_info("Processing unread messages for all rules...", get_last_fragment())
 
     def _forward_historical_all_rules(self):
         """Prompts for days and processes historical messages for all configured rules."""
@@ -1898,15 +4303,16 @@ class AutoForwarderPlugin(BasePlugin):
                 days_str = days_input.getText().toString()
                 days = self._clamp_historical_days(int(days_str))
                 
-                BulletinHelper.show_info(f"Processing last {days} days for all rules...", get_last_fragment())
-                
-                def process_all():
+                async def process_all(job):
                     total_processed = 0
                     errors = []
                     
-                    for chat_id in self.forwarding_rules.keys():
+                    for chat_id in list(self.forwarding_rules.keys()):
+                        if self.async_core.find_job("historical", chat_id, exact=True):
+                            continue
+                        job.note = self._get_chat_name(chat_id)
                         try:
-                            result = self._process_historical_messages(chat_id, days)
+                            result = await self._process_historical_messages(chat_id, days, job)
                             if result["success"]:
                                 total_processed += result["processed"]
                             else:
@@ -1922,14 +4328,607 @@ class AutoForwarderPlugin(BasePlugin):
                     else:
                         BulletinHelper.show_info(f"Successfully processed {total_processed} messages from last {days} days!", get_last_fragment())
                 
-                threading.Thread(target=process_all, daemon=True).start()
+                if self._start_job("historical", None, f"Last {days} days: all rules", process_all):
+                    BulletinHelper.show_info(f"Processing last {days} days for all rules...", get_last_fragment())
+            except ValueError:
+                BulletinHelper.show_error("Please enter a valid number.", get_last_fragment())
+        
+        def on_dry_run(d, w):
+            try:
+                self._dry_run_all_rules(self._clamp_historical_days(int(days_input.getText().toString())))
             except ValueError:
                 BulletinHelper.show_error("Please enter a valid number.", get_last_fragment())
         
         builder.set_positive_button("Proceed", on_proceed)
+        builder.set_neutral_button("Dry Run", on_dry_run)
+        builder.set_negative_button("Cancel", None)
+        run_on_ui_thread(builder.show)
+
+    def _dry_run_all_rules(self, days, chat_ids=None):
+        """Runs a backfill dry run (unread when days is None) for the given chats or all rules and shows the report."""
+        chat_ids = list(chat_ids or self.forwarding_rules.keys())
+        if not chat_ids:
+            BulletinHelper.show_error("No rules configured.", get_last_fragment())
+            return
+        scope = "unread messages" if days is None else f"last {days} days"
+
+        async def dry_run(job, chat_id):
+            try:
+                return await self._dry_run_backfill(chat_id, days)
+            except asyncio.TimeoutError:
+                return {"chat_id": chat_id, "error": "Timed out fetching messages"}
+            except Exception as e:
+                log(f"[{self.id}] ERROR in dry run for {chat_id}: {traceback.format_exc()}")
+                return {"chat_id": chat_id, "error": str(e)}
+            finally:
+                job.done += 1
+
+        async def process_all(job):
+            # Nothing is sent, so all chats are scanned at once.
+            job.total = len(chat_ids)
+            reports = await asyncio.gather(*(dry_run(job, chat_id) for chat_id in chat_ids))
+            run_on_ui_thread(lambda: self._show_dry_run_report(reports, scope))
+
+        job_chat_id = chat_ids[0] if len(chat_ids) == 1 else None
+        label = f"Dry run ({scope}): {self._get_chat_name(job_chat_id) if job_chat_id is not None else 'all rules'}"
+        if self._start_job("dry_run", job_chat_id, label, process_all):
+            BulletinHelper.show_info(f"Dry run: checking {scope}...", get_last_fragment())
+
+    def _format_duration(self, seconds):
+        """Formats seconds as a short human-readable duration."""
+        seconds = int(round(seconds))
+        if seconds < 60: return f"{seconds}s"
+        if seconds < 3600: return f"{seconds // 60}m {seconds % 60}s"
+        return f"{seconds // 3600}h {seconds % 3600 // 60}m"
+
+    def _show_dry_run_report(self, reports, scope):
+        """Shows the result of a dry run, with an option to copy the full report as JSON."""
+        activity = get_last_fragment().getParentActivity()
+        if not activity: return
+        lines, outcome_totals = [], {}
+        total_send, total_requests = 0, 0
+        total_seconds = 0.0
+        for report in reports:
+            name = self._get_chat_name(report["chat_id"])
+            if report.get("error"):
+                lines.append(f"• {name}: {report['error']}")
+                continue
+            lines.append(f"• {name}: {report['would_send']} of {report['scanned']} would be sent (~{self._format_duration(report['estimated_seconds'])})")
+            total_send += report["would_send"]
+            total_requests += report["send_requests"]
+            total_seconds += report["estimated_seconds"]
+            for outcome, count in report["outcomes"].items():
+                if outcome != "would_send":
+                    outcome_totals[outcome] = outcome_totals.get(outcome, 0) + count
+        lines.append("")
+        lines.append(f"Total: {total_send} messages, {total_requests} send requests, ~{self._format_duration(total_seconds)} at current limits.")
+        if outcome_totals:
+            lines.append("Filtered out: " + ", ".join(f"{outcome.replace('dropped_', '').replace('_', ' ')} {count}" for outcome, count in sorted(outcome_totals.items(), key=lambda item: -item[1])))
+
+        builder = AlertDialogBuilder(activity)
+        builder.set_title(f"Dry Run – {scope}")
+        builder.set_message("\n".join(lines))
+        builder.set_positive_button("Close", lambda b, w: b.dismiss())
+        builder.set_neutral_button("Copy Report", lambda b, w: self._copy_to_clipboard(json.dumps(reports, indent=2), "Dry run report", toast_text="Dry run report copied to clipboard!"))
+        builder.show()
+
+    def _toggle_live_dry_run(self):
+        """Switches live dry-run mode: rules keep running but nothing is sent; would-be sends are counted in Statistics."""
+        self.dry_run_live = not self.dry_run_live
+        self.set_setting(DRY_RUN_LIVE_KEY, "1" if self.dry_run_live else "0")
+        if self.dry_run_live:
+            BulletinHelper.show_info("Live dry run on. Nothing will be forwarded until it is turned off.", get_last_fragment())
+        else:
+            BulletinHelper.show_success("Live dry run off. Forwarding resumed.", get_last_fragment())
+        self._refresh_settings_ui()
+
+    def _cycle_text_normalization(self):
+        """Switches to the next keyword matching mode; keyword lists are rebuilt for it on the next message."""
+        modes = list(TEXT_NORMALIZATION_MODES)
+        self.text_normalization = modes[(modes.index(self.text_normalization) + 1) % len(modes)]
+        self.set_setting(TEXT_NORMALIZATION_KEY, self.text_normalization)
+        BulletinHelper.show_info(f"Keyword matching: {TEXT_NORMALIZATION_MODES[self.text_normalization]}.", get_last_fragment())
+        self._refresh_settings_ui()
+
+    # --- Rule Browser ---
+    def _build_rule_browser(self):
+        """
+        The rule list of the settings screen: a search row, one page of rules and paging rows.
+        Names come from the rule index, so only the rows of the current page are formatted.
+        """
+        matches = self._get_rule_search_matches()
+        page_count = max(1, -(-len(matches) // self.RULES_PAGE_SIZE))
+        self.rule_page = min(self.rule_page, page_count - 1)
+        search_text = f"Search: \"{self.rule_search}\" ({len(matches)} of {len(self.forwarding_rules)})" if self.rule_search else f"Search Rules ({len(self.forwarding_rules)})"
+        items = [Text(text=search_text, icon="msg_search", accent=True, on_click=lambda v: self._show_rule_search_dialog())]
+        if not matches:
+            items.append(Text(text="No rules match your search.", icon="msg_info"))
+        start = self.rule_page * self.RULES_PAGE_SIZE
+        for _, source_id, _ in matches[start:start + self.RULES_PAGE_SIZE]:
+            items.append(Text(
+                text=self._get_rule_row_text(source_id),
+                icon="msg_edit",
+                on_click=lambda v, sid=source_id: self._show_rule_action_dialog(sid)
+            ))
+        if self.rule_page > 0:
+            items.append(Text(text=f"Previous Page ({self.rule_page} of {page_count})", icon="msg_arrow_back", accent=True, on_click=lambda v: self._turn_rule_page(-1)))
+        if self.rule_page < page_count - 1:
+            items.append(Text(text=f"Next Page ({self.rule_page + 2} of {page_count})", icon="msg_arrow_forward", accent=True, on_click=lambda v: self._turn_rule_page(1)))
+        return items
+
+    def _get_rule_row_text(self, source_id):
+        """The two-line summary of a rule: source, destinations, style and status."""
+        rule_data = self.forwarding_rules[source_id]
+        account = self._get_rule_account(rule_data)
+        source_name = self._get_cached_chat_name(source_id, account)
+        dest_name = self._get_cached_chat_name(rule_data["destination"], account) if rule_data.get("destination") else "Not Set"
+        extra_count = len(self._get_rule_destinations(rule_data)) - 1
+        if extra_count > 0: dest_name += f" (+{extra_count})"
+        style = "(Native Fwd)" if rule_data.get("native_forward", False) else "(Copy)"
+        if len(self.observed_accounts) > 1:
+            style += f" • Account {account + 1}"
+        status = [] if rule_data.get("enabled", False) else ["Off"]
+        if self._is_rule_paused_by_regex(source_id, rule_data):
+            status.insert(0, "⚠ Paused: keyword filter too slow")
+        last_forwarded = self.metrics.last_forwarded.get(source_id)
+        if last_forwarded:
+            status.append(f"last sent {self._format_duration(time.time() - last_forwarded)} ago")
+        counters = self.metrics.rule_counters.get(source_id)
+        if counters and counters[COUNTER_SEND_ERRORS]:
+            status.append(f"{counters[COUNTER_SEND_ERRORS]} errors")
+        return f"From: {source_name}\nTo: {dest_name} {style}" + (f"\n{' • '.join(status)}" if status else "")
+
+    def _is_rule_paused_by_regex(self, source_id, rule_data):
+        """True if the rule's own keyword filter, or the global one it uses, was switched off for being too slow."""
+        if self._is_keyword_pattern_disabled(source_id, rule_data.get("keyword_pattern", "").strip()):
+            return True
+        return rule_data.get("use_global_regex", False) and self._is_keyword_pattern_disabled(GLOBAL_KEYWORD_PATTERN, self.get_setting(GLOBAL_KEYWORD_PATTERN, "").strip())
+
+    def _get_cached_chat_name(self, chat_id, account=None):
+        """_get_chat_name, remembered per account. Chats the client does not know yet are looked up again next time."""
+        key = (account, chat_id)
+        name = self.chat_name_cache.get(key)
+        if name is None:
+            entity = self._get_chat_entity(chat_id, account)
+            name = self._get_entity_name(entity)
+            if entity:
+                self.chat_name_cache.put(key, name)
+        return name
+
+    def _get_rule_index(self):
+        """
+        (sort key, source ID, search text) per rule, sorted by source name. The search text holds
+        the source and destination names and IDs. Rebuilt after the rules are reloaded.
+        """
+        if self.rule_index is None:
+            index = []
+            for source_id, rule in self.forwarding_rules.items():
+                account = self._get_rule_account(rule)
+                source_name = self._get_cached_chat_name(source_id, account)
+                search_parts = [source_name, str(source_id)]
+                for chat_id, _ in self._get_rule_destinations(rule):
+                    search_parts.extend((self._get_cached_chat_name(chat_id, account), str(chat_id)))
+                index.append((source_name.lower(), source_id, " ".join(search_parts).casefold()))
+            index.sort()
+            self.rule_index = index
+        return self.rule_index
+
+    def _get_rule_search_matches(self):
+        """
+        The index entries matching every word of the search. A search that extends the previous
+        one only narrows the previous matches, so typing more letters does not rescan all rules.
+        """
+        query = self.rule_search.casefold()
+        if not query:
+            return self._get_rule_index()
+        previous = self.rule_search_matches
+        candidates = previous[1] if previous and query.startswith(previous[0]) else self._get_rule_index()
+        words = query.split()
+        matches = [entry for entry in candidates if all(word in entry[2] for word in words)]
+        self.rule_search_matches = (query, matches)
+        return matches
+
+    def _show_rule_search_dialog(self):
+        """Asks for a name or ID to filter the rule list by."""
+        activity = get_last_fragment().getParentActivity()
+        if not activity: return
+        builder = AlertDialogBuilder(activity)
+        builder.set_title("Search Rules")
+        builder.set_message("Source or destination name or ID. All words must match.")
+
+        search_input = EditText(activity)
+        search_input.setText(self.rule_search)
+        search_input.setTextColor(Theme.getColor(Theme.key_dialogTextBlack))
+        frame = FrameLayout(activity)
+        margin_px = int(TypedValue.applyDimension(TypedValue.COMPLEX_UNIT_DIP, 20, activity.getResources().getDisplayMetrics()))
+        frame.setPadding(margin_px, margin_px // 2, margin_px, margin_px // 2)
+        frame.addView(search_input)
+        builder.set_view(frame)
+
+        builder.set_positive_button("Search", lambda b, w: self._set_rule_search(search_input.getText().toString()))
+        builder.set_neutral_button("Clear", lambda b, w: self._set_rule_search(""))
+        builder.set_negative_button("Cancel", None)
+        run_on_ui_thread(builder.show)
+
+    def _set_rule_search(self, query):
+        self.rule_search = (query or "").strip()
+        self.rule_page = 0
+        self._refresh_settings_ui()
+
+    def _turn_rule_page(self, step):
+        self.rule_page = max(0, self.rule_page + step)
+        self._refresh_settings_ui()
+
+    # --- Rule Import and Export ---
+    def _show_rules_export_dialog(self):
+        """Offers the rules as JSON or CSV on the clipboard."""
+        activity = get_last_fragment().getParentActivity()
+        if not activity: return
+        builder = AlertDialogBuilder(activity)
+        builder.set_title(f"Export Rules ({len(self.forwarding_rules)})")
+        builder.set_message("Copies all rules to the clipboard. Chats with a public username are exported with it, so the rules can be imported on another device.")
+        builder.set_positive_button("JSON", lambda b, w: self._copy_to_clipboard(self._export_rules_json(), "Rules", toast_text="Rules copied to clipboard!"))
+        builder.set_neutral_button("CSV", lambda b, w: self._copy_to_clipboard(self._export_rules_csv(), "Rules", toast_text="Rules copied to clipboard!"))
+        builder.set_negative_button("Cancel", None)
+        run_on_ui_thread(builder.show)
+
+    def _get_exported_rules(self):
+        """The rules as plain dicts: source and destinations by ID (and username, if public) plus their options."""
+        exported = []
+        for source_id, rule in self.forwarding_rules.items():
+            account = self._get_rule_account(rule)
+            entry = {"source": self._get_peer_reference(source_id, account)}
+            entry["destinations"] = [dict(self._get_peer_reference(chat_id, account), topic_id=topic_id) for chat_id, topic_id in self._get_rule_destinations(rule)]
+            for key, default in RULE_OPTION_DEFAULTS.items():
+                entry[key] = rule.get(key, default)
+            entry["filters"] = dict(rule.get("filters", {}))
+            exported.append(entry)
+        return exported
+
+    def _get_peer_reference(self, chat_id, account=None):
+        entity = self._get_chat_entity(chat_id, account)
+        username = getattr(entity, 'username', None) if entity else None
+        return {"id": chat_id, "username": username or None}
+
+    def _export_rules_json(self):
+        return json.dumps({"format": RULES_EXPORT_FORMAT, "version": RULES_EXPORT_VERSION, "rules": self._get_exported_rules()}, indent=2, ensure_ascii=False)
+
+    def _export_rules_csv(self):
+        """
+        One rule per line. Chats are written as @username when public, otherwise as ID; destinations
+        are separated by ';' with an optional ':TopicID'. blocked_content lists the content types turned off.
+        """
+        output = io.StringIO()
+        writer = csv.writer(output)
+        writer.writerow(RULES_CSV_COLUMNS)
+        peer = lambda ref: f"@{ref['username']}" if ref["username"] else str(ref["id"])
+        for entry in self._get_exported_rules():
+            destinations = ";".join(peer(d) + (f":{d['topic_id']}" if d["topic_id"] else "") for d in entry["destinations"])
+            options = [int(value) if isinstance(value, bool) else value for value in (entry[key] for key in RULE_OPTION_DEFAULTS)]
+            blocked = ";".join(key for key, allowed in entry["filters"].items() if not allowed)
+            writer.writerow([peer(entry["source"]), destinations] + options + [blocked])
+        return output.getvalue()
+
+    def _show_rules_import_dialog(self):
+        """Asks for exported rules (JSON or CSV) and imports them in the background."""
+        activity = get_last_fragment().getParentActivity()
+        if not activity: return
+        builder = AlertDialogBuilder(activity)
+        builder.set_title("Import Rules")
+        builder.set_message("Paste rules exported as JSON or CSV. A rule for a source that already has one replaces it.")
+
+        rules_input = EditText(activity)
+        rules_input.setHint("Exported rules")
+        rules_input.setMinLines(4)
+        rules_input.setMaxLines(10)
+        rules_input.setTextColor(Theme.getColor(Theme.key_dialogTextBlack))
+        rules_input.setHintTextColor(Theme.getColor(Theme.key_dialogTextHint))
+        frame = FrameLayout(activity)
+        margin_px = int(TypedValue.applyDimension(TypedValue.COMPLEX_UNIT_DIP, 20, activity.getResources().getDisplayMetrics()))
+        frame.setPadding(margin_px, margin_px // 2, margin_px, margin_px // 2)
+        frame.addView(rules_input)
+        builder.set_view(frame)
+
+        builder.set_positive_button("Import", lambda b, w: self._import_rules(rules_input.getText().toString()))
         builder.set_negative_button("Cancel", None)
         run_on_ui_thread(builder.show)
 
+    def _import_rules(self, text):
+        """Parses exported rules and resolves and saves them as a background job."""
+        try:
+            entries = self._parse_rules_import(text)
+        except ValueError as e:
+            BulletinHelper.show_error(str(e), get_last_fragment())
+            return
+        if not entries:
+            BulletinHelper.show_error("No rules found.", get_last_fragment())
+            return
+
+        async def process(job):
+            imported, errors = await self._apply_rules_import(entries, job)
+            if errors:
+                BulletinHelper.show_error(f"Imported {imported} of {len(entries)} rules. " + "; ".join(errors[:3]), get_last_fragment())
+            else:
+                BulletinHelper.show_success(f"Imported {imported} rules.", get_last_fragment())
+            self._refresh_settings_ui()
+
+        if self._start_job("rule_import", None, f"Import {len(entries)} rules", process):
+            BulletinHelper.show_info(f"Importing {len(entries)} rules...", get_last_fragment())
+
+    def _parse_rules_import(self, text):
+        """
+        Parses exported rules into entries of peer references ({"id", "username", "invite"}),
+        (reference, topic ID) destinations and options. Raises ValueError with a message for the user.
+        """
+        text = (text or "").strip()
+        if text.startswith(("{", "[")):
+            try:
+                data = json.loads(text)
+            except ValueError as e:
+                raise ValueError(f"Invalid JSON: {e}")
+            rows = data.get("rules") if isinstance(data, dict) else data
+            if not isinstance(rows, list):
+                raise ValueError("Invalid JSON: expected a list of rules.")
+        else:
+            rows = list(csv.DictReader(io.StringIO(text)))
+            if rows and not {"source", "destinations"} <= set(rows[0]):
+                raise ValueError("Invalid CSV: the first line must name the columns, including source and destinations.")
+
+        entries = []
+        for line, row in enumerate(rows, 1):
+            if not isinstance(row, dict):
+                raise ValueError(f"Rule {line}: expected an object.")
+            try:
+                entries.append(self._parse_import_row(row))
+            except (ValueError, TypeError) as e:
+                raise ValueError(f"Rule {line}: {e}")
+        return entries
+
+    def _parse_import_row(self, row):
+        destinations = row.get("destinations")
+        if isinstance(destinations, str):
+            destinations = [token.strip() for token in destinations.split(";") if token.strip()]
+        parsed_destinations = []
+        for destination in destinations or []:
+            topic_id = 0
+            if isinstance(destination, dict):
+                topic_id = int(destination.get("topic_id") or 0)
+            else:
+                destination = str(destination)
+                head, _, tail = destination.rpartition(":")
+                if head and tail.strip().isdigit():
+                    destination, topic_id = head, int(tail)
+            parsed_destinations.append((self._parse_peer_reference(destination), topic_id))
+        if not parsed_destinations:
+            raise ValueError("no destinations")
+
+        options = {}
+        for key, default in RULE_OPTION_DEFAULTS.items():
+            value = row.get(key)
+            if value is None or value == "":
+                options[key] = default
+            elif isinstance(default, bool):
+                options[key] = value if isinstance(value, bool) else str(value).strip().lower() in ("1", "true", "yes", "on")
+            else:
+                options[key] = str(value)
+        filters = row.get("filters")
+        if not isinstance(filters, dict):
+            blocked = {token.strip() for token in (row.get("blocked_content") or "").split(";") if token.strip()}
+            unknown = blocked - set(FILTER_TYPES)
+            if unknown:
+                raise ValueError(f"unknown content type '{sorted(unknown)[0]}'")
+            filters = {key: key not in blocked for key in FILTER_TYPES}
+        regex_risk = find_regex_risk(options["keyword_pattern"].strip())
+        if regex_risk and not regex_engine:
+            raise ValueError(f"keyword regex rejected ({regex_risk})")
+        return {"source": self._parse_peer_reference(row.get("source")), "destinations": parsed_destinations,
+                "options": options, "filters": {key: bool(value) for key, value in filters.items()}}
+
+    def _parse_peer_reference(self, value):
+        """Turns an exported chat (an ID, @username, t.me link, invite link or {"id", "username"}) into a peer reference."""
+        chat_id, username, invite = None, None, None
+        if isinstance(value, dict):
+            chat_id = int(value["id"]) if value.get("id") else None
+            username = (value.get("username") or "").lstrip("@") or None
+        elif isinstance(value, int) and not isinstance(value, bool):
+            chat_id = value
+        else:
+            value = str(value or "").strip()
+            if "/joinchat/" in value or "/+" in value:
+                invite = value.split("/")[-1].lstrip("+")
+            else:
+                try:
+                    chat_id = int(value)
+                except ValueError:
+                    username = value.replace("@", "").split("/")[-1] or None
+        if not (chat_id or username or invite):
+            raise ValueError(f"invalid chat '{value}'")
+        return {"id": chat_id, "username": username, "invite": invite}
+
+    async def _apply_rules_import(self, entries, job=None):
+        """Resolves every chat of the entries in batches and saves the rules. Returns (imported count, error messages)."""
+        account = self._get_current_account_safely()
+        references = [entry["source"] for entry in entries] + [ref for entry in entries for ref, _ in entry["destinations"]]
+        if job:
+            job.total = len(entries)
+            job.note = f"resolving {len(references)} chats"
+        resolved = await self._resolve_peer_references(references, account)
+
+        def describe(ref):
+            return f"@{ref['username']}" if ref["username"] else str(ref["id"] or "invite link")
+
+        imported, errors = 0, []
+        for entry in entries:
+            if job:
+                job.done += 1
+            source = resolved.get(self._get_reference_key(entry["source"]))
+            if not source:
+                errors.append(f"{describe(entry['source'])}: not found")
+                continue
+            destinations, missing = [], None
+            for ref, topic_id in entry["destinations"]:
+                entity = resolved.get(self._get_reference_key(ref))
+                if not entity:
+                    missing = ref
+                    break
+                destination_id = self._get_id_for_storage(entity)
+                if all(destination_id != d["id"] for d in destinations):
+                    destinations.append({"id": destination_id, "topic_id": topic_id})
+            if missing:
+                errors.append(f"{describe(entry['source'])}: destination {describe(missing)} not found")
+                continue
+            rule = dict(entry["options"])
+            rule.update({"account": account, "destination": destinations[0]["id"], "destination_topic_id": destinations[0]["topic_id"],
+                         "destinations": destinations, "filters": entry["filters"]})
+            self.forwarding_rules[self._get_id_for_storage(source)] = rule
+            imported += 1
+        if imported:
+            self._save_forwarding_rules()
+        log(f"[{self.id}] Imported {imported} of {len(entries)} rules; {len(errors)} failed.")
+        return imported, errors
+
+    def _get_reference_key(self, ref):
+        return (ref["id"], ref["username"], ref["invite"])
+
+    async def _resolve_peer_references(self, references, account):
+        """
+        Resolves peer references to entities with as few requests as possible: IDs the client
+        knows are taken from its cache, the other IDs are looked up together in batched
+        getChats/channels.getChannels/users.getUsers requests, and only what is left is
+        resolved by username or invite link, a few at a time. Returns {reference key: entity}.
+        """
+        resolved, pending = {}, {}
+        for ref in references:
+            key = self._get_reference_key(ref)
+            if key in resolved or key in pending:
+                continue
+            entity = self._find_cached_entity(ref["id"], account) if ref["id"] else None
+            if entity:
+                resolved[key] = entity
+            else:
+                pending[key] = ref
+
+        unknown_ids = sorted({ref["id"] for ref in pending.values() if ref["id"]})
+        if unknown_ids:
+            await self._fetch_entities_by_ids(unknown_ids, account)
+            for key, ref in list(pending.items()):
+                entity = self._find_cached_entity(ref["id"], account) if ref["id"] else None
+                if entity:
+                    resolved[key] = entity
+                    del pending[key]
+
+        semaphore = asyncio.Semaphore(IMPORT_RESOLVE_CONCURRENCY)
+
+        async def resolve(key, ref):
+            async with semaphore:
+                entity = await self._resolve_reference_online(ref, account)
+                # Keeps the rate of username lookups well below what triggers FLOOD_WAIT.
+                await asyncio.sleep(IMPORT_RESOLVE_INTERVAL_SECONDS)
+            if entity:
+                resolved[key] = entity
+
+        await asyncio.gather(*(resolve(key, ref) for key, ref in pending.items() if ref["username"] or ref["invite"]))
+        return resolved
+
+    def _find_cached_entity(self, input_id, account=None):
+        """Looks up an exported or typed chat ID (with or without the -100 prefix) in the client's cache."""
+        controller = self._get_messages_controller(account)
+        if input_id > 0:
+            entity = controller.getUser(input_id)
+            if entity: return entity
+        return controller.getChat(self._sanitize_chat_id_for_request(input_id))
+
+    async def _fetch_entities_by_ids(self, chat_ids, account):
+        """
+        Fetches unknown chats and users in batches and puts them into the client's cache. User
+        IDs only go to users.getUsers; a chat ID does not tell a basic group from a channel, so
+        chat IDs go to both messages.getChats and channels.getChannels.
+        """
+        chat_short_ids = [self._sanitize_chat_id_for_request(chat_id) for chat_id in chat_ids if chat_id < 0]
+        ids_by_kind = {"users": [chat_id for chat_id in chat_ids if chat_id > 0], "chats": chat_short_ids, "channels": chat_short_ids}
+        batches = []
+        for kind, ids in ids_by_kind.items():
+            ids = sorted(set(ids))
+            batches.extend((kind, ids[start:start + IMPORT_BATCH_SIZE]) for start in range(0, len(ids), IMPORT_BATCH_SIZE))
+        await asyncio.gather(*(self._fetch_entity_batch(kind, ids, account) for kind, ids in batches))
+
+    async def _fetch_entity_batch(self, kind, ids, account):
+        """
+        Fetches one batch of IDs. A rejected batch is split in half and the halves are retried one
+        after another, paced like username lookups, so an invalid ID only loses itself without
+        setting off a burst of requests.
+        """
+        req = self._build_entities_request(kind, ids)
+        try:
+            response = await self.async_core.request(req, account=account)
+        except RequestError as e:
+            if len(ids) > 1:
+                middle = len(ids) // 2
+                for half in (ids[:middle], ids[middle:]):
+                    await asyncio.sleep(IMPORT_RESOLVE_INTERVAL_SECONDS)
+                    await self._fetch_entity_batch(kind, half, account)
+            else:
+                log(f"[{self.id}] Could not look up {kind[:-1]} {ids[0]} during import: {getattr(e.error, 'text', e.error)}")
+            return
+        except asyncio.TimeoutError:
+            log(f"[{self.id}] {type(req).__name__} timed out during import; {len(ids)} ID(s) skipped.")
+            return
+        controller = self._get_messages_controller(account)
+        if kind == "users":
+            # users.getUsers answers with a Vector, whose items are in `objects`.
+            users = getattr(response, 'objects', None)
+            if users and not users.isEmpty():
+                controller.putUsers(users, False)
+            return
+        chats = getattr(response, 'chats', None)
+        if chats and not chats.isEmpty():
+            controller.putChats(chats, False)
+
+    def _build_entities_request(self, kind, ids):
+        """Builds the users.getUsers, channels.getChannels or messages.getChats request for a batch of IDs."""
+        if kind == "users":
+            req = TLRPC.TL_users_getUsers()
+            req.id = ArrayList()
+            for user_id in ids:
+                input_user = TLRPC.TL_inputUser(); input_user.user_id, input_user.access_hash = user_id, 0
+                req.id.add(input_user)
+        elif kind == "channels":
+            req = TLRPC.TL_channels_getChannels()
+            req.id = ArrayList()
+            for channel_id in ids:
+                input_channel = TLRPC.TL_inputChannel(); input_channel.channel_id, input_channel.access_hash = channel_id, 0
+                req.id.add(input_channel)
+        else:
+            req = TLRPC.TL_messages_getChats()
+            req.id = ArrayList()
+            for chat_id in ids: req.id.add(Long(chat_id))
+        return req
+
+    async def _resolve_reference_online(self, ref, account):
+        """Resolves one peer reference by invite link or username. Returns the entity or None."""
+        try:
+            if ref["invite"]:
+                req = TLRPC.TL_messages_checkChatInvite(); req.hash = ref["invite"]
+                response = await self.async_core.request(req, account=account)
+                entity = getattr(response, 'chat', None)
+                if entity:
+                    self._get_messages_controller(account).putChat(entity, False)
+                return entity
+            req = TLRPC.TL_contacts_resolveUsername(); req.username = ref["username"]
+            response = await self.async_core.request(req, account=account)
+        except (RequestError, asyncio.TimeoutError) as e:
+            log(f"[{self.id}] Could not resolve {ref}: {getattr(getattr(e, 'error', None), 'text', None) or 'timed out'}")
+            return None
+        controller = self._get_messages_controller(account)
+        if getattr(response, 'chats', None) and not response.chats.isEmpty():
+            controller.putChats(response.chats, False)
+            if getattr(response, 'users', None): controller.putUsers(response.users, False)
+            return response.chats.get(0)
+        if getattr(response, 'users', None) and not response.users.isEmpty():
+            controller.putUsers(response.users, False)
+            return response.users.get(0)
+        return None
+
     # --- Telegram API Utilities ---
     def _delete_message_by_id(self, chat_id, message_id):
         """Reliably deletes a single message by its ID."""
@@ -1967,60 +4966,180 @@ class AutoForwarderPlugin(BasePlugin):
             log(f"[{self.id}] ERROR: Could not get filename from doc attributes. Error: {e}")
         return None
 
-    def _get_author_type(self, message):
+    def _get_message_text(self, message_objects):
+        """Builds the MessageText shared by the keyword and length filters for one message or album."""
+        parts, length = [], 0
+        for msg_obj in message_objects:
+            msg = msg_obj.messageOwner
+            if not msg: continue
+            if msg.message:
+                parts.append(msg.message)
+                length += len(msg.message)
+            if msg_obj.isDocument():
+                parts.append(self._get_document_filename(getattr(msg.media, 'document', None)))
+        return MessageText(parts, self.text_normalization, length)
+
+    def _get_author_type(self, message, account=None):
         """Determines if a message was sent by a user, a bot, or is outgoing."""
         if message.out:
             return "outgoing"
-        author_entity = self._get_chat_entity(self._get_id_from_peer(message.from_id))
+        author_entity = self._get_chat_entity(self._get_id_from_peer(message.from_id), account)
         if author_entity and getattr(author_entity, 'bot', False):
             return "bot"
         return "user"
 
+    def _is_author_type_allowed(self, author_type, rule):
+        """Checks the rule's author type toggles (users, bots, outgoing)."""
+        if author_type == "outgoing": return rule.get("forward_outgoing", True)
+        if author_type == "bot": return rule.get("forward_bots", True)
+        return rule.get("forward_users", True)
+
+    def _get_media_kind(self, message_object):
+        """Classifies a message by the content type names used in rule filters."""
+        if message_object.isPhoto(): return "photos"
+        if message_object.isSticker(): return "stickers"
+        if message_object.isVoice(): return "voice"
+        if message_object.isRoundVideo(): return "video_messages"
+        if message_object.isGif(): return "gifs"
+        if message_object.isMusic(): return "audio"
+        if message_object.isVideo(): return "videos"
+        if message_object.isDocument(): return "documents"
+        return "text"
+
     def _is_message_allowed_by_filters(self, message_object, rule):
         """Checks if a message should be forwarded based on the rule's media filters."""
         filters = rule.get("filters", {})
         if not filters:
             return True
-        if message_object.isPhoto(): return filters.get("photos", True)
-        if message_object.isSticker(): return filters.get("stickers", True)
-        if message_object.isVoice(): return filters.get("voice", True)
-        if message_object.isRoundVideo(): return filters.get("video_messages", True)
-        if message_object.isGif(): return filters.get("gifs", True)
-        if message_object.isMusic(): return filters.get("audio", True)
-        if message_object.isVideo(): return filters.get("videos", True)
-        if message_object.isDocument(): return filters.get("documents", True)
-        return filters.get("text", True)
+        return filters.get(self._get_media_kind(message_object), True)
         
-    def _passes_keyword_filter(self, text_to_check, pattern):
-        """Checks if a given text matches a keyword or regex pattern."""
+    def _passes_keyword_filter(self, message_text, pattern, rule_key=None, scope=None):
+        """
+        Checks if a MessageText matches a keyword or regex pattern. Each match runs under the
+        regex time limit; `scope` (a source chat id or GLOBAL_KEYWORD_PATTERN) is charged for timeouts.
+        """
         if not pattern:
             return True
-        if not text_to_check:
+        if not message_text:
             return False
+        if self._is_keyword_pattern_disabled(scope, pattern):
+            return False
+        keywords = self._get_literal_keywords(pattern)
+        if keywords is not None:
+            return not keywords or pattern in self._get_keyword_hits(message_text, pattern)
+        compiled_regex = self._get_compiled_pattern(pattern)
+        if compiled_regex is None:
+            return normalize_text(pattern, message_text.mode) in message_text.folded
+        started = time.monotonic()
         try:
-            compiled_regex = re.compile(pattern, re.IGNORECASE)
-            if compiled_regex.search(text_to_check):
-                return True
-        except re.error:
-            if pattern.lower() in text_to_check.lower():
-                return True
-        return False
-
-    def _get_java_len(self, py_string: str) -> int:
-        """Gets the length of a Python string as Java would see it, crucial for entity offsets."""
-        if not py_string:
-            return 0
-        return JavaString(py_string).length()
+            if regex_engine and self.regex_timeout_seconds > 0:
+                found = compiled_regex.search(message_text.raw, timeout=self.regex_timeout_seconds) is not None
+            else:
+                found = compiled_regex.search(message_text.raw) is not None
+        except TimeoutError:
+            self._record_regex_timeout(rule_key, scope, pattern)
+            return False
+        if self.regex_timeout_seconds > 0 and time.monotonic() - started > self.regex_timeout_seconds:
+            # Without the regex module the match cannot be interrupted, but it still counts.
+            self._record_regex_timeout(rule_key, scope, pattern)
+        return found
+
+    def _get_literal_keywords(self, pattern):
+        """Cached extract_literal_keywords; an empty list means the pattern has no keywords."""
+        cache_key = ("literal", pattern)
+        if cache_key not in self.compiled_patterns:
+            self.compiled_patterns[cache_key] = extract_literal_keywords(pattern)
+        return self.compiled_patterns[cache_key]
+
+    def _get_keyword_hits(self, message_text, pattern):
+        """
+        Returns the keyword patterns found in the MessageText. All literal patterns of all rules and the
+        global filter share one automaton, so a message is scanned once for its rule and the global filter.
+        """
+        automaton = self.keyword_automaton
+        if pattern not in automaton.patterns or automaton.mode != message_text.mode:
+            automaton = self._rebuild_keyword_automaton(pattern)
+        last_text, last_automaton, last_hits = self.last_keyword_hits
+        if last_text is message_text and last_automaton is automaton:
+            return last_hits
+        hits = automaton.find_patterns(message_text.folded)
+        self.last_keyword_hits = (message_text, automaton, hits)
+        return hits
+
+    def _rebuild_keyword_automaton(self, extra_pattern=None):
+        """Builds the shared automaton from every literal keyword pattern currently in use."""
+        patterns = {rule.get("keyword_pattern", "").strip() for rule in list(self.forwarding_rules.values())}
+        patterns.add(self.get_setting(GLOBAL_KEYWORD_PATTERN, "").strip())
+        if extra_pattern: patterns.add(extra_pattern)
+        keywords_by_pattern = {}
+        for pattern in patterns:
+            if not pattern: continue
+            keywords = self._get_literal_keywords(pattern)
+            if not keywords: continue
+            normalized = [normalize_text(keyword, self.text_normalization) for keyword in keywords]
+            keywords_by_pattern[pattern] = [keyword for keyword in normalized if keyword]
+        self.keyword_automaton = KeywordAutomaton(keywords_by_pattern, self.text_normalization)
+        return self.keyword_automaton
+
+    def _get_compiled_pattern(self, pattern):
+        """Compiles and caches a keyword pattern. Returns None for invalid regexes (matched as plain text)."""
+        if pattern in self.compiled_patterns:
+            return self.compiled_patterns[pattern]
+        try:
+            engine = regex_engine or re
+            compiled_regex = engine.compile(pattern, engine.IGNORECASE)
+        except Exception:
+            compiled_regex = None
+        if len(self.compiled_patterns) > 256:
+            self.compiled_patterns.clear()
+        self.compiled_patterns[pattern] = compiled_regex
+        return compiled_regex
+
+    def _is_keyword_pattern_disabled(self, scope, pattern):
+        """A pattern switched off after repeated timeouts stays off, and fails every message, until it is edited."""
+        if scope is None:
+            return False
+        if scope == GLOBAL_KEYWORD_PATTERN:
+            return self.get_setting(GLOBAL_PATTERN_DISABLED_KEY, "") == pattern
+        rule = self.forwarding_rules.get(scope)
+        return bool(rule) and rule.get("disabled_keyword_pattern") == pattern
+
+    def _record_regex_timeout(self, rule_key, scope, pattern):
+        """Counts a regex timeout and switches the pattern off once it reaches the threshold."""
+        if rule_key is not None:
+            self.metrics.count(rule_key, COUNTER_REGEX_TIMEOUTS)
+        if scope is None:
+            return
+        timeout_key = (scope, pattern)
+        count = self.regex_timeouts.get(timeout_key, 0) + 1
+        self.regex_timeouts[timeout_key] = count
+        log(f"[{self.id}] Regex timeout {count}/{REGEX_TIMEOUT_DISABLE_THRESHOLD} for pattern {pattern!r} ({scope}).")
+        if count < REGEX_TIMEOUT_DISABLE_THRESHOLD:
+            return
+        self.regex_timeouts.pop(timeout_key, None)
+        # A switched-off filter lets nothing through, so its rules are paused rather than left unfiltered.
+        if scope == GLOBAL_KEYWORD_PATTERN:
+            self.set_setting(GLOBAL_PATTERN_DISABLED_KEY, pattern)
+            log(f"[{self.id}] Disabled slow regex {pattern!r} in the global filter.")
+            message = "The global keyword filter was too slow and has been switched off. Rules that use it are paused and forward nothing until you edit it."
+        else:
+            rule = self.forwarding_rules.get(scope)
+            if not rule: return
+            rule["disabled_keyword_pattern"] = pattern
+            self._save_forwarding_rules()
+            log(f"[{self.id}] Disabled slow regex {pattern!r} in the rule for {scope}.")
+            message = f"The keyword filter of the rule for '{self._get_chat_name(scope)}' was too slow and has been switched off. The rule is paused and forwards nothing until you edit it."
+        BulletinHelper.show_error(message, get_last_fragment())
 
     def _add_user_entities(self, entities: ArrayList, text: str, user_entity: TLRPC.TL_user, display_name: str):
         """Adds bold and clickable user link entities to a message."""
         if not all([entities is not None, text, user_entity, display_name]):
             return
         try:
-            offset = text.rfind(display_name)
+            offset = utf16_rfind(text, display_name)
             if offset == -1: return
 
-            length = self._get_java_len(display_name)
+            length = utf16_len(display_name)
             
             url_entity = TLRPC.TL_messageEntityTextUrl()
             url_entity.url = f"tg://user?id={user_entity.id}"
@@ -2061,14 +5180,9 @@ class AutoForwarderPlugin(BasePlugin):
         final_entities = ArrayList()
         if prefix_entities: final_entities.addAll(prefix_entities)
         if original_entities and not original_entities.isEmpty():
-            offset_shift = self._get_java_len(prefix_text) + 2 if prefix_text else 0
+            offset_shift = utf16_len(prefix_text) + 2 if prefix_text else 0
             for i in range(original_entities.size()):
-                old = original_entities.get(i)
-                new = type(old)()
-                new.offset, new.length = old.offset + offset_shift, old.length
-                if hasattr(old, 'url'): new.url = old.url
-                if hasattr(old, 'user_id'): new.user_id = old.user_id
-                final_entities.add(new)
+                final_entities.add(copy_entity(original_entities.get(i), offset_shift))
         return final_entities
 
     def _get_id_from_peer(self, peer):
@@ -2101,12 +5215,13 @@ class AutoForwarderPlugin(BasePlugin):
             except (ValueError, IndexError): pass
         return abs(input_id)
 
-    def _get_chat_entity(self, dialog_id):
-        """Gets a user or chat entity object from a dialog ID."""
+    def _get_chat_entity(self, dialog_id, account=None):
+        """Gets a user or chat entity object from a dialog ID, as known to the given account."""
         if not isinstance(dialog_id, int):
             try: dialog_id = int(dialog_id)
             except (ValueError, TypeError): return None
-        return get_messages_controller().getUser(dialog_id) if dialog_id > 0 else get_messages_controller().getChat(abs(dialog_id))
+        controller = self._get_messages_controller(account)
+        return controller.getUser(dialog_id) if dialog_id > 0 else controller.getChat(abs(dialog_id))
 
     def _get_entity_name(self, entity):
         """Gets a display-friendly name from a user or chat entity."""
@@ -2117,9 +5232,9 @@ class AutoForwarderPlugin(BasePlugin):
             return name if name else f"ID: {entity.id}"
         return f"ID: {getattr(entity, 'id', 'N/A')}"
 
-    def _get_chat_name(self, chat_id):
+    def _get_chat_name(self, chat_id, account=None):
         """Convenience function to get a chat name directly from a chat ID."""
-        return self._get_entity_name(self._get_chat_entity(int(chat_id)))
+        return self._get_entity_name(self._get_chat_entity(int(chat_id), account))
 
     def _get_original_author_details(self, fwd_header):
         """Extracts author details from a fwd_from header."""
@@ -2140,7 +5255,7 @@ class AutoForwarderPlugin(BasePlugin):
                 run_on_ui_thread(last_fragment.rebuildViews)
         except Exception: log(f"[{self.id}] ERROR during UI refresh: {traceback.format_exc()}")
 
-    def _copy_to_clipboard(self, text_to_copy: str, label: str):
+    def _copy_to_clipboard(self, text_to_copy: str, label: str, toast_text: str = None):
         """Copies text to the clipboard and shows a toast notification."""
         activity = get_last_fragment().getParentActivity()
         if not activity: return
@@ -2148,7 +5263,7 @@ class AutoForwarderPlugin(BasePlugin):
             clipboard = activity.getSystemService(Context.CLIPBOARD_SERVICE)
             clip = ClipData.newPlainText(label, text_to_copy)
             clipboard.setPrimaryClip(clip)
-            Toast.makeText(activity, f"{label} address copied to clipboard!", Toast.LENGTH_SHORT).show()
+            Toast.makeText(activity, toast_text or f"{label} address copied to clipboard!", Toast.LENGTH_SHORT).show()
         except Exception: log(f"[{self.id}] Failed to copy to clipboard: {traceback.format_exc()}")
 
     def _process_changelog_markdown(self, text):
@@ -2237,19 +5352,19 @@ class AutoForwarderPlugin(BasePlugin):
             log(f"[{self.id}] ERROR showing FAQ dialog: {traceback.format_exc()}")
 
     # --- Update Mechanism ---
-    def _updater_loop(self):
-        """A background thread that periodically checks for new plugin updates."""
+    async def _updater_loop(self):
+        """Periodically checks for new plugin updates until the async core stops."""
         log(f"[{self.id}] Updater loop started.")
-        time.sleep(60)
-        while not self.stop_updater_thread.is_set():
+        await asyncio.sleep(60)
+        while True:
             self.check_for_updates(is_manual=False)
-            self.stop_updater_thread.wait(self.UPDATE_INTERVAL_SECONDS)
-        log(f"[{self.id}] Updater loop finished.")
+            await asyncio.sleep(self.UPDATE_INTERVAL_SECONDS)
 
     def check_for_updates(self, is_manual=False):
         """Initiates an update check, optionally showing UI feedback."""
-        if is_manual: BulletinHelper.show_info("Checking for updates...", get_last_fragment())
-        threading.Thread(target=self._perform_update_check, args=[is_manual]).start()
+        job, started = self.async_core.start_blocking_job("update_check", None, "Update check", self._perform_update_check, is_manual)
+        if is_manual:
+            BulletinHelper.show_info("Checking for updates..." if started else "An update check is already running.", get_last_fragment())
 
     def _perform_update_check(self, is_manual):
         """Connects to the GitHub API to check for the latest release."""
@@ -2315,7 +5430,7 @@ class AutoForwarderPlugin(BasePlugin):
         scroller.addView(changelog_view)
         builder.set_view(scroller)
 
-        on_update_click = lambda b, w: threading.Thread(target=self._download_and_install, args=[download_url, version]).start()
+        on_update_click = lambda b, w: self.async_core.start_blocking_job("update_download", None, f"Update download v{version}", self._download_and_install, download_url, version)
         builder.set_positive_button("Update", on_update_click)
         builder.set_negative_button("Cancel", None)
         run_on_ui_thread(builder.show)
@@ -0,0 +1,114 @@
+"""
+Replays a notification trace recorded by the plugin (Settings > Statistics >
+Record Notification Trace) against the stub send layer.
+
+Every pseudonymous peer that had a rule while recording gets a synthetic rule, and
+each batch is re-posted through the NotificationCenter with the recorded spacing,
+so scheduling and timeout changes can be compared on identical traffic. An album
+counts as one delivered message, since only its caption carries a tag.
+
+    python benchmarks/replay_trace.py auto_forwarder_trace.jsonl
+    python benchmarks/replay_trace.py trace.jsonl --speed 10 --latency-ms 80
+    python benchmarks/replay_trace.py trace.jsonl --speed 0 --set sequential_delay_seconds=1.5
+"""
+import argparse
+import itertools
+import json
+import os
+import sys
+
+from run_benchmarks import DESTINATION_ID, Scenario, format_table, make_rule, run_scenario, tagged
+from stubs import make_document, make_message, make_message_object, make_photo, network, register_user
+
+PEER_BASE_ID = -1_000_000
+AUTHOR_BASE_ID = 500_000
+OWN_USER_ID = 1000
+
+# Trace media kinds (the plugin's filter names) mapped to stub document kinds.
+DOCUMENT_KINDS = {
+    "stickers": "sticker", "voice": "voice", "video_messages": "round", "gifs": "gif",
+    "audio": "audio", "videos": "video", "documents": "document",
+}
+
+
+def build_media(kind, media_id, complete):
+    if kind == "photos":
+        return make_photo(media_id, complete=complete)
+    if kind in DOCUMENT_KINDS:
+        return make_document(media_id, kind=DOCUMENT_KINDS[kind], complete=complete)
+    return None
+
+
+def load_scenario(path, speed, settings):
+    """Turns a trace file into a Scenario. A speed of 0 replays every batch back to back."""
+    scenario = Scenario(f"replay:{os.path.basename(path)}", {}, settings, wait_for_all=False)
+    unique_ids = itertools.count(1)
+    id_map, messages_by_id, last_message_in_chat = {}, {}, {}
+    previous_time = None
+    with open(path) as trace_file:
+        for line in trace_file:
+            entry = json.loads(line)
+            chat_id = None
+            batch = []
+            for item in entry["m"]:
+                chat_id = PEER_BASE_ID - item["p"]
+                if item["rule"] and chat_id not in scenario.rules:
+                    scenario.rules[chat_id] = make_rule(DESTINATION_ID)
+                author_id = OWN_USER_ID if item["o"] else AUTHOR_BASE_ID + item["a"]
+                register_user(author_id, f"Author {item['a']}")
+
+                # Re-notifications of the same (peer, id) must stay the same message.
+                key = (chat_id, item["id"])
+                message_id = id_map.get(key)
+                if message_id is None:
+                    message_id = id_map[key] = next(unique_ids)
+                # Every message carries its tag so sends can be matched; the rest pads to the recorded length.
+                text = tagged(message_id).ljust(item["n"], "x")
+                # The trace only records that a reply exists, so replies point at the chat's previous message.
+                reply_to_id = last_message_in_chat.get(chat_id, message_id) if item["r"] else None
+                message = make_message(
+                    chat_id, text=text, media=build_media(item["k"], message_id, item["c"]), grouped_id=item["g"],
+                    from_id=author_id, message_id=message_id, reply_to_id=reply_to_id, out=bool(item["o"]))
+                reply_message = messages_by_id.get(reply_to_id, message) if item["r"] == 2 else None
+                batch.append(make_message_object(message, reply_message=reply_message))
+                messages_by_id[message_id] = message
+                last_message_in_chat[chat_id] = message_id
+            if not batch:
+                continue
+            delay = 0.0
+            if previous_time is not None and speed > 0:
+                delay = max(0.0, (entry["t"] - previous_time) / speed)
+            previous_time = entry["t"]
+            scenario.add(chat_id, batch, delay=delay)
+    return scenario
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("trace", help="Trace file (JSON lines) recorded by the plugin.")
+    parser.add_argument("--speed", type=float, default=1.0, help="Replay speed factor; 0 posts all batches at once.")
+    parser.add_argument("--latency-ms", type=int, default=20, help="Fake server response latency.")
+    parser.add_argument("--flood-rate", type=float, default=0.0, help="Fraction of sends answered with FLOOD_WAIT.")
+    parser.add_argument("--set", action="append", metavar="KEY=VALUE", help="Override a plugin setting (repeatable).")
+    parser.add_argument("--settle", type=float, default=2.0, help="Stop after this many seconds without new sends.")
+    parser.add_argument("--timeout", type=float, default=600.0, help="Upper bound on the replay run time.")
+    parser.add_argument("--json", action="store_true", help="Print the result as JSON instead of a table.")
+    args = parser.parse_args(argv)
+    settings = {}
+    for pair in args.set or []:
+        key, separator, value = pair.partition("=")
+        if not key or not separator:
+            parser.error(f"--set expects KEY=VALUE, got {pair!r}")
+        settings[key] = value
+
+    network.latency_ms = args.latency_ms
+    network.flood_rate = args.flood_rate
+    scenario = load_scenario(args.trace, args.speed, settings)
+    scenario.settle_seconds = args.settle
+    result = run_scenario(scenario, args.timeout)
+    print(json.dumps(result, indent=2) if args.json else format_table([result]))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,311 @@
+"""
+Offline benchmarks for the Auto Forwarder plugin.
+
+Loads auto_forwarder.py against the pure-Python stand-ins in stubs.py and drives
+AutoForwarderPlugin with synthetic notification streams. For every scenario it
+reports throughput, end-to-end latency (notification to send request) and peak
+Python memory.
+
+    python benchmarks/run_benchmarks.py
+    python benchmarks/run_benchmarks.py --scenario albums --messages 2000 --latency-ms 50
+    python benchmarks/run_benchmarks.py --flood-rate 0.01 --output bench_output.txt
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import stubs
+
+stubs.install()
+
+import auto_forwarder  # noqa: E402
+from stubs import (make_document, make_message, make_message_object, make_photo, network,  # noqa: E402
+                   post_messages, register_chat, register_user)
+
+SOURCE_ID = -1001
+DESTINATION_ID = -2001
+AUTHOR_ID = 42
+TAG_RE = re.compile(r"\[m(\d+)\]")
+
+# Settings that remove deliberate pacing, so the numbers measure the plugin itself.
+UNPACED_SETTINGS = {
+    "sequential_delay_seconds": 0,
+    "antispam_delay_seconds": 0,
+    "send_budget_per_minute": 0,
+    "destination_interval_seconds": 0,
+}
+
+
+def make_rule(destination_id=DESTINATION_ID, **overrides):
+    rule = {
+        "destination": destination_id, "destination_topic_id": 0,
+        "destinations": [{"id": destination_id, "topic_id": 0}],
+        "enabled": True, "drop_author": True, "quote_replies": True, "native_forward": False,
+        "keyword_pattern": "", "use_global_regex": False, "author_filter": "",
+        "forward_users": True, "forward_bots": True, "forward_outgoing": True, "filters": {},
+    }
+    rule.update(overrides)
+    return rule
+
+
+def tagged(message_id, text=""):
+    """Message text carrying its own id, so the send request can be matched back to it."""
+    return f"[m{message_id}] {text}".strip()
+
+
+class Scenario:
+    """
+    A synthetic stream: a rule set plus a list of (delay_seconds, chat_id, [MessageObject]) batches.
+    `expected` holds the message ids that must be delivered. Without `wait_for_all` it is None and
+    the run ends once nothing new has been sent for `settle_seconds`.
+    """
+    def __init__(self, name, rules, settings=None, wait_for_all=True, settle_seconds=2.0):
+        self.name = name
+        self.rules = rules
+        self.settings = dict(UNPACED_SETTINGS, **(settings or {}))
+        self.batches = []
+        self.expected = set() if wait_for_all else None
+        self.settle_seconds = settle_seconds
+
+    def add(self, chat_id, message_objects, expected_ids=None, delay=0.0):
+        self.batches.append((delay, chat_id, message_objects))
+        if self.expected is None:
+            return
+        if expected_ids is None:
+            expected_ids = [obj.messageOwner.id for obj in message_objects]
+        self.expected.update(expected_ids)
+
+
+# --- Scenarios ---
+
+def scenario_text_burst(count):
+    scenario = Scenario("text_burst", {SOURCE_ID: make_rule()})
+    for start in range(0, count, 20):
+        batch = []
+        for _ in range(min(20, count - start)):
+            message = make_message(SOURCE_ID, from_id=AUTHOR_ID)
+            message.message = tagged(message.id, "burst message")
+            batch.append(make_message_object(message))
+        scenario.add(SOURCE_ID, batch)
+    return scenario
+
+
+def scenario_albums(count, album_size=5):
+    scenario = Scenario("albums", {SOURCE_ID: make_rule()}, {"album_timeout_ms": 200})
+    for album_index in range(max(1, count // album_size)):
+        grouped_id = 10_000 + album_index
+        items = [make_message(SOURCE_ID, media=make_photo(grouped_id * 10 + i), grouped_id=grouped_id, from_id=AUTHOR_ID)
+                 for i in range(album_size)]
+        items[0].message = tagged(items[0].id, "album caption")
+        # Albums arrive as one notification per item, like a real upload.
+        for item in items:
+            scenario.add(SOURCE_ID, [make_message_object(item)], expected_ids=[])
+        scenario.expected.add(items[0].id)
+    return scenario
+
+
+def scenario_media_deferrals(count):
+    """Media arrives without a file reference and is completed by a second notification."""
+    scenario = Scenario("media_deferrals", {SOURCE_ID: make_rule()}, {"deferral_timeout_ms": 2000})
+    for start in range(0, count, 10):
+        incomplete, complete = [], []
+        for _ in range(min(10, count - start)):
+            message = make_message(SOURCE_ID, media=make_document(0, complete=False), from_id=AUTHOR_ID)
+            message.message = tagged(message.id, "document")
+            message.media.document.id = message.id
+            incomplete.append(make_message_object(message))
+            ready = make_message(SOURCE_ID, text=message.message, media=make_document(message.id), from_id=AUTHOR_ID,
+                                 message_id=message.id)
+            complete.append(make_message_object(ready))
+        scenario.add(SOURCE_ID, incomplete, expected_ids=[])
+        scenario.add(SOURCE_ID, complete, delay=0.05)
+    return scenario
+
+
+def scenario_reply_threads(count):
+    scenario = Scenario("reply_threads", {SOURCE_ID: make_rule(quote_replies=True)})
+    root = make_message(SOURCE_ID, text="thread root " * 10, from_id=AUTHOR_ID)
+    previous = root
+    for start in range(0, count, 10):
+        batch = []
+        for _ in range(min(10, count - start)):
+            message = make_message(SOURCE_ID, from_id=AUTHOR_ID, reply_to_id=previous.id)
+            message.message = tagged(message.id, "reply")
+            batch.append(make_message_object(message, reply_message=previous))
+            previous = message
+        scenario.add(SOURCE_ID, batch)
+    return scenario
+
+
+def scenario_many_rules(count, rule_count=50):
+    sources = [SOURCE_ID - index for index in range(rule_count)]
+    rules = {source: make_rule(DESTINATION_ID - (index % 5)) for index, source in enumerate(sources)}
+    scenario = Scenario("many_rules", rules)
+    for index in range(count):
+        source = sources[index % rule_count]
+        message = make_message(source, from_id=AUTHOR_ID)
+        message.message = tagged(message.id, "fan-in")
+        scenario.add(source, [make_message_object(message)])
+    return scenario
+
+
+def scenario_busy_account(count, unrelated_chats=200):
+    """Mostly traffic from chats without a rule, as on an account with many active chats."""
+    scenario = Scenario("busy_account", {SOURCE_ID: make_rule()})
+    for index in range(count):
+        if index % 10 == 0:
+            message = make_message(SOURCE_ID, from_id=AUTHOR_ID)
+            message.message = tagged(message.id, "ruled")
+            scenario.add(SOURCE_ID, [make_message_object(message)])
+        else:
+            chat_id = SOURCE_ID - 1000 - (index % unrelated_chats)
+            scenario.add(chat_id, [make_message_object(make_message(chat_id, text="chatter", from_id=AUTHOR_ID))], expected_ids=[])
+    return scenario
+
+
+def scenario_native_forward(count):
+    scenario = Scenario("native_forward", {SOURCE_ID: make_rule(native_forward=True)}, {"forward_batch_window_ms": 100})
+    for start in range(0, count, 20):
+        batch = [make_message_object(make_message(SOURCE_ID, text="native", from_id=AUTHOR_ID))
+                 for _ in range(min(20, count - start))]
+        scenario.add(SOURCE_ID, batch)
+    return scenario
+
+
+SCENARIOS = {
+    "text_burst": scenario_text_burst,
+    "albums": scenario_albums,
+    "media_deferrals": scenario_media_deferrals,
+    "reply_threads": scenario_reply_threads,
+    "many_rules": scenario_many_rules,
+    "busy_account": scenario_busy_account,
+    "native_forward": scenario_native_forward,
+}
+
+
+# --- Runner ---
+
+def sent_message_ids(request):
+    """The source message ids a send request delivers."""
+    if type(request).__name__ == "TL_messages_forwardMessages":
+        return list(request.id)
+    texts = [getattr(request, "message", None)]
+    for item in getattr(request, "multi_media", None) or []:
+        texts.append(getattr(item, "message", None))
+    return [int(match) for text in texts if text for match in TAG_RE.findall(text)]
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def load_plugin(scenario):
+    for chat_id in set(scenario.rules) | {rule["destination"] for rule in scenario.rules.values()}:
+        register_chat(chat_id)
+    register_user(AUTHOR_ID, "Bench", "Author", "bench_author")
+    plugin = auto_forwarder.AutoForwarderPlugin()
+    plugin._settings.update({key: str(value) for key, value in scenario.settings.items()})
+    plugin._settings[auto_forwarder.FORWARDING_RULES_KEY] = json.dumps({str(k): v for k, v in scenario.rules.items()})
+    plugin.on_plugin_load()
+    return plugin
+
+
+def run_scenario(scenario, timeout_seconds):
+    network.reset()
+    tracemalloc.start()
+    plugin = load_plugin(scenario)
+    posted_at = {}
+    try:
+        started = time.monotonic()
+        for delay, chat_id, message_objects in scenario.batches:
+            if delay:
+                time.sleep(delay)
+            now = time.monotonic()
+            for message_object in message_objects:
+                posted_at.setdefault(message_object.messageOwner.id, now)
+            post_messages(chat_id, message_objects)
+
+        delivered_at = {}
+        last_change = time.monotonic()
+        deadline = last_change + timeout_seconds
+        while time.monotonic() < deadline:
+            with network.lock:
+                sent = list(network.sent)
+            for sent_time, request in sent:
+                for message_id in sent_message_ids(request):
+                    if message_id not in delivered_at:
+                        delivered_at[message_id] = sent_time
+                        last_change = time.monotonic()
+            if scenario.expected is None:
+                if time.monotonic() - last_change >= scenario.settle_seconds:
+                    break
+            elif scenario.expected.issubset(delivered_at):
+                break
+            time.sleep(0.01)
+        _, peak_bytes = tracemalloc.get_traced_memory()
+        totals = plugin.metrics.totals()
+    finally:
+        plugin.on_plugin_unload()
+        tracemalloc.stop()
+
+    expected = set(posted_at) if scenario.expected is None else scenario.expected
+    delivered = expected & set(delivered_at)
+    elapsed = (max(delivered_at[i] for i in delivered) - started) if delivered else 0.0
+    latencies = sorted((delivered_at[i] - posted_at[i]) * 1000.0 for i in delivered)
+    return {
+        "scenario": scenario.name,
+        "messages": sum(len(objs) for _, _, objs in scenario.batches),
+        "delivered": len(delivered),
+        "expected": len(scenario.expected) if scenario.expected is not None else None,
+        "dropped": sum(value for name, value in totals.items() if name.startswith("dropped_")),
+        "requests": len(network.sent),
+        "msgs_per_sec": round(len(delivered) / elapsed, 1) if elapsed > 0 else None,
+        "p50_ms": round(percentile(latencies, 0.50), 1) if latencies else None,
+        "p99_ms": round(percentile(latencies, 0.99), 1) if latencies else None,
+        "peak_kib": round(peak_bytes / 1024, 1),
+    }
+
+
+def format_table(results):
+    columns = ("scenario", "messages", "delivered", "expected", "dropped", "requests", "msgs_per_sec", "p50_ms", "p99_ms", "peak_kib")
+    rows = [[str(result[column]) if result[column] is not None else "-" for column in columns] for result in results]
+    widths = [max(len(column), *(len(row[i]) for row in rows)) for i, column in enumerate(columns)]
+    lines = ["  ".join(column.ljust(widths[i]) for i, column in enumerate(columns))]
+    lines += ["  ".join(value.ljust(widths[i]) for i, value in enumerate(row)) for row in rows]
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), action="append", help="Run only this scenario (repeatable).")
+    parser.add_argument("--messages", type=int, default=500, help="Messages per scenario.")
+    parser.add_argument("--latency-ms", type=int, default=20, help="Fake server response latency.")
+    parser.add_argument("--flood-rate", type=float, default=0.0, help="Fraction of sends answered with FLOOD_WAIT.")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Seconds to wait for delivery per scenario.")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON instead of a table.")
+    parser.add_argument("--output", help="Also write the report to this file.")
+    args = parser.parse_args(argv)
+
+    network.latency_ms = args.latency_ms
+    network.flood_rate = args.flood_rate
+    results = [run_scenario(SCENARIOS[name](args.messages), args.timeout) for name in (args.scenario or SCENARIOS)]
+    report = json.dumps(results, indent=2) if args.json else format_table(results)
+    print(report)
+    if args.output:
+        with open(args.output, "w") as output_file:
+            output_file.write(report + "\n")
+    return 0 if all(result["delivered"] == result["expected"] for result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
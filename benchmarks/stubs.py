@@ -0,0 +1,635 @@
+"""
+Pure-Python stand-ins for the Chaquopy, Android, Telegram and exteraGram modules
+imported by auto_forwarder.py, so the plugin can be loaded and driven off-device.
+
+Call install() before importing auto_forwarder. The fake network layer is exposed
+as `network` and can be configured with a per-request latency and FLOOD_WAIT
+injection rate. The make_* factories build TLRPC messages and MessageObjects, and
+post_messages() delivers them through the NotificationCenter like the client does.
+"""
+import itertools
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import types
+
+
+# --- Generic helpers ---
+
+class _AnythingMeta(type):
+    def __getattr__(cls, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return _Anything()
+
+
+class _Anything(metaclass=_AnythingMeta):
+    """An inert object that accepts any constructor args, attribute or call."""
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return _Anything()
+
+    def __call__(self, *args, **kwargs):
+        return _Anything()
+
+
+class _Kwargs:
+    """Records constructor keyword arguments as attributes (settings UI rows)."""
+    def __init__(self, *args, **kwargs):
+        self.args = args
+        self.__dict__.update(kwargs)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.__dict__})"
+
+
+def _module(name, **attrs):
+    module = types.ModuleType(name)
+    module.__dict__.update(attrs)
+    sys.modules[name] = module
+    parent, _, child = name.rpartition(".")
+    if parent:
+        if parent not in sys.modules:
+            _module(parent)
+        setattr(sys.modules[parent], child, module)
+    return module
+
+
+# --- java.* ---
+
+def dynamic_proxy(*interfaces):
+    class _Proxy:
+        def __init__(self, *args, **kwargs):
+            pass
+    return _Proxy
+
+
+class ArrayList(list):
+    def __init__(self, items=None):
+        super().__init__(items or [])
+
+    def size(self):
+        return len(self)
+
+    def get(self, index):
+        return self[index]
+
+    def add(self, item):
+        self.append(item)
+        return True
+
+    def addAll(self, items):
+        self.extend(items)
+        return True
+
+    def isEmpty(self):
+        return len(self) == 0
+
+    def clear(self):
+        del self[:]
+
+
+class HashSet(set):
+    def size(self):
+        return len(self)
+
+    def isEmpty(self):
+        return len(self) == 0
+
+
+class JavaString(str):
+    def length(self):
+        return len(self.encode("utf-16-le")) // 2
+
+
+def Integer(value):
+    return int(value)
+
+
+def Long(value):
+    return int(value)
+
+
+class File:
+    """java.io.File over os.path."""
+    def __init__(self, parent, name=None):
+        parent = parent.path if isinstance(parent, File) else str(parent)
+        self.path = os.path.join(parent, name) if name else parent
+
+    def mkdirs(self):
+        os.makedirs(self.path, exist_ok=True)
+        return True
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def delete(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        return True
+
+    def getAbsolutePath(self):
+        return os.path.abspath(self.path)
+
+
+class PluginsController:
+    """Keeps plugin data in a throwaway directory."""
+    pluginsDir = None
+    _instance = None
+
+    @classmethod
+    def getInstance(cls):
+        if cls._instance is None:
+            cls._instance = cls()
+            cls._instance.pluginsDir = File(tempfile.mkdtemp(prefix="af_plugins_"))
+        return cls._instance
+
+
+# --- android.os ---
+
+class Looper:
+    @staticmethod
+    def getMainLooper():
+        return None
+
+
+class Handler:
+    """Runs posted Runnables on timer threads, like the Android main Handler."""
+    def __init__(self, *args):
+        self._timers = {}
+        self._lock = threading.Lock()
+
+    def post(self, runnable):
+        return self.postDelayed(runnable, 0)
+
+    def postDelayed(self, runnable, delay_ms):
+        def fire():
+            with self._lock:
+                self._timers.pop(id(runnable), None)
+            runnable.run()
+        timer = threading.Timer(max(0, delay_ms) / 1000.0, fire)
+        timer.daemon = True
+        with self._lock:
+            self._timers[id(runnable)] = timer
+        timer.start()
+        return True
+
+    def removeCallbacks(self, runnable):
+        with self._lock:
+            timer = self._timers.pop(id(runnable), None)
+        if timer:
+            timer.cancel()
+
+    def removeCallbacksAndMessages(self, token):
+        with self._lock:
+            timers, self._timers = list(self._timers.values()), {}
+        for timer in timers:
+            timer.cancel()
+
+
+# --- org.telegram.tgnet.TLRPC ---
+
+class TLObject:
+    """Base for generated TLRPC classes: unknown attributes default to None."""
+    flags = 0
+
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return None
+
+    def __repr__(self):
+        fields = ", ".join(f"{k}={v!r}" for k, v in self.__dict__.items())
+        return f"{type(self).__name__}({fields})"
+
+
+_TL_BASES = {
+    "TL_peerUser": "Peer", "TL_peerChat": "Peer", "TL_peerChannel": "Peer",
+    "TL_messageMediaEmpty": "MessageMedia", "TL_messageMediaPhoto": "MessageMedia",
+    "TL_messageMediaDocument": "MessageMedia", "TL_messageMediaWebPage": "MessageMedia",
+    "TL_user": "User", "TL_chat": "Chat", "TL_channel": "Chat",
+    "TL_updates": "Updates", "TL_updatesCombined": "Updates", "TL_updateShortSentMessage": "Updates",
+}
+
+
+class _TLRPCMeta(type):
+    _lock = threading.RLock()
+
+    def __getattr__(cls, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        with _TLRPCMeta._lock:
+            if name not in cls.__dict__:
+                base_name = _TL_BASES.get(name)
+                base = getattr(cls, base_name) if base_name else TLObject
+                type.__setattr__(cls, name, type(name, (base,), {}))
+        return cls.__dict__[name]
+
+
+class TLRPC(metaclass=_TLRPCMeta):
+    pass
+
+
+# --- org.telegram.messenger ---
+
+class NotificationCenter:
+    didReceiveNewMessages = 1
+    messagesDidLoad = 2
+    replaceMessagesObjects = 3
+    messagesDeleted = 4
+    updateInterfaces = 5
+
+    class NotificationCenterDelegate:
+        pass
+
+    def __init__(self):
+        self.observers = {}
+
+    def addObserver(self, observer, notification_id):
+        self.observers.setdefault(notification_id, []).append(observer)
+
+    def removeObserver(self, observer, notification_id):
+        observers = self.observers.get(notification_id, [])
+        if observer in observers:
+            observers.remove(observer)
+
+    def postNotificationName(self, notification_id, account, *args):
+        for observer in list(self.observers.get(notification_id, [])):
+            observer.didReceivedNotification(notification_id, account, list(args))
+
+
+class MessageObject:
+    """Classifies media the way the client does, based on the stub attributes."""
+    def __init__(self, account, message, *flags):
+        self.currentAccount = account
+        self.messageOwner = message
+        self.replyMessageObject = None
+        self.messageText = message.message if message else None
+
+    def _doc_kind(self):
+        media = self.messageOwner.media
+        if not isinstance(media, TLRPC.TL_messageMediaDocument) or not media.document:
+            return None
+        return getattr(media.document, "kind", "document") or "document"
+
+    def isPhoto(self):
+        return isinstance(self.messageOwner.media, TLRPC.TL_messageMediaPhoto)
+
+    def isSticker(self):
+        return self._doc_kind() == "sticker"
+
+    def isVoice(self):
+        return self._doc_kind() == "voice"
+
+    def isRoundVideo(self):
+        return self._doc_kind() == "round"
+
+    def isGif(self):
+        return self._doc_kind() == "gif"
+
+    def isMusic(self):
+        return self._doc_kind() == "audio"
+
+    def isVideo(self):
+        return self._doc_kind() == "video"
+
+    def isDocument(self):
+        return self._doc_kind() is not None
+
+
+class ChatObject:
+    @staticmethod
+    def isChannel(chat):
+        return isinstance(chat, TLRPC.TL_channel)
+
+
+class Utilities:
+    class Callback:
+        pass
+
+
+# --- client_utils ---
+
+class FakeNetwork:
+    """
+    A fake connection layer. Each request is answered on a timer thread after
+    `latency_ms`; a `flood_rate` fraction of send requests fails with FLOOD_WAIT.
+    """
+    def __init__(self):
+        self.latency_ms = 20
+        self.flood_rate = 0.0
+        self.flood_seconds = 1
+        self.history = {}
+        self.sent = []
+        self.lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    def reset(self):
+        with self.lock:
+            self.sent = []
+            self.history = {}
+
+    def respond(self, req, callback):
+        response, error = self._handle(req)
+        delay = self.latency_ms / 1000.0
+        fn = getattr(callback, "fn", callback)
+        if delay <= 0:
+            fn(response, error)
+            return
+        timer = threading.Timer(delay, fn, args=(response, error))
+        timer.daemon = True
+        timer.start()
+
+    def _handle(self, req):
+        name = type(req).__name__
+        if name == "TL_messages_getHistory":
+            return self._get_history(req), None
+        if name in ("TL_messages_getMessages", "TL_channels_getMessages"):
+            wanted = {m.id for m in req.id}
+            found = [m for msgs in self.history.values() for m in msgs if m.id in wanted]
+            return TLRPC.TL_messages_messages(messages=ArrayList(found), chats=ArrayList(), users=ArrayList()), None
+        if name.startswith(("TL_messages_send", "TL_messages_forward")):
+            if self.flood_rate and random.random() < self.flood_rate:
+                return None, TLRPC.TL_error(code=420, text=f"FLOOD_WAIT_{self.flood_seconds}")
+            with self.lock:
+                self.sent.append((time.monotonic(), req))
+            updates = ArrayList()
+            random_ids = []
+            if getattr(req, "multi_media", None):
+                random_ids = [m.random_id for m in req.multi_media]
+            elif isinstance(getattr(req, "random_id", None), list):
+                random_ids = list(req.random_id)
+            elif getattr(req, "random_id", None) is not None:
+                random_ids = [req.random_id]
+            for random_id in random_ids:
+                updates.add(TLRPC.TL_updateMessageID(id=next(self._ids), random_id=random_id))
+            return TLRPC.TL_updates(updates=updates, users=ArrayList(), chats=ArrayList()), None
+        return TLRPC.TL_boolTrue(), None
+
+    def _get_history(self, req):
+        peer_id = getattr(req.peer, "peer_id", 0)
+        messages = sorted(self.history.get(peer_id, []), key=lambda m: -m.id)
+        if req.offset_id:
+            messages = [m for m in messages if m.id < req.offset_id]
+        return TLRPC.TL_messages_messages(messages=ArrayList(messages[:req.limit or 100]),
+                                          chats=ArrayList(), users=ArrayList())
+
+
+network = FakeNetwork()
+
+
+class RequestCallback:
+    def __init__(self, fn):
+        self.fn = fn
+
+
+def send_request(req, callback):
+    network.respond(req, callback)
+    return 1
+
+
+class FakeMessagesController:
+    def __init__(self):
+        self.users = {}
+        self.chats = {}
+        self.dialogs_dict = {}
+
+    def getInputPeer(self, peer_id):
+        return TLRPC.TL_inputPeer(peer_id=peer_id)
+
+    def getUser(self, user_id):
+        return self.users.get(user_id)
+
+    def getChat(self, chat_id):
+        return self.chats.get(chat_id)
+
+    def getInputChannel(self, channel_id):
+        return TLRPC.TL_inputChannel(channel_id=channel_id)
+
+    def getAllDialogs(self):
+        return ArrayList()
+
+    def putChat(self, chat, *args):
+        self.chats[chat.id] = chat
+
+    def putChats(self, chats, *args):
+        for chat in chats:
+            self.putChat(chat)
+
+    def putUsers(self, users, *args):
+        for user in users:
+            self.users[user.id] = user
+
+    def deleteMessages(self, *args):
+        pass
+
+
+class FakeUserConfig:
+    def __init__(self, account=0):
+        self.account = account
+        self.user = TLRPC.TL_user(id=1000, first_name="Me", last_name=None, username="me", bot=False)
+
+    def getClientUserId(self):
+        return self.user.id
+
+    def getCurrentUser(self):
+        return self.user
+
+    def getCurrentAccount(self):
+        return self.account
+
+    def isClientActivated(self):
+        return True
+
+
+class FakeAccountInstance:
+    def __init__(self):
+        self.notification_center = NotificationCenter()
+
+    def getNotificationCenter(self):
+        return self.notification_center
+
+
+messages_controller = FakeMessagesController()
+user_config = FakeUserConfig()
+account_instance = FakeAccountInstance()
+
+
+# --- Per-account access (account 0 is the current account) ---
+
+class ConnectionsManager:
+    """Every account's connection talks to the same fake network; sends are tagged with their account."""
+    _instances = {}
+
+    def __init__(self, account):
+        self.account = account
+
+    @classmethod
+    def getInstance(cls, account):
+        return cls._instances.setdefault(account, cls(account))
+
+    def sendRequest(self, req, callback):
+        req.sent_by_account = self.account
+        return send_request(req, callback)
+
+    def cancelRequest(self, token, notify):
+        pass
+
+
+class UserConfig:
+    MAX_ACCOUNT_COUNT = 1
+    _instances = {0: user_config}
+
+    @classmethod
+    def getInstance(cls, account):
+        return cls._instances.setdefault(account, FakeUserConfig(account))
+
+
+class MessagesController:
+    """All accounts share one entity cache, so chats registered once resolve for every account."""
+    @staticmethod
+    def getInstance(account):
+        return messages_controller
+
+
+class AccountInstance:
+    _instances = {0: account_instance}
+
+    @classmethod
+    def getInstance(cls, account):
+        return cls._instances.setdefault(account, FakeAccountInstance())
+
+
+# --- Message factories ---
+
+_message_ids = itertools.count(1)
+
+
+def register_chat(chat_id, title=None, username=None, megagroup=False):
+    """Adds a channel to the fake MessagesController. Takes the dialog id (e.g. -100)."""
+    channel_id = abs(chat_id)
+    chat = TLRPC.TL_channel(id=channel_id, title=title or f"Chat {channel_id}", username=username, megagroup=megagroup)
+    messages_controller.chats[channel_id] = chat
+    return chat
+
+
+def register_user(user_id, first_name="User", last_name=None, username=None, bot=False):
+    user = TLRPC.TL_user(id=user_id, first_name=first_name, last_name=last_name, username=username, bot=bot)
+    messages_controller.users[user_id] = user
+    return user
+
+
+def make_photo(photo_id, complete=True):
+    """A photo media; incomplete media has no file reference yet, which makes the plugin defer it."""
+    photo = TLRPC.TL_photo(id=photo_id, access_hash=1, file_reference=b"ref" if complete else None)
+    return TLRPC.TL_messageMediaPhoto(photo=photo)
+
+
+def make_document(document_id, kind="document", file_name=None, complete=True):
+    attributes = ArrayList()
+    if file_name:
+        attributes.add(TLRPC.TL_documentAttributeFilename(file_name=file_name))
+    document = TLRPC.TL_document(id=document_id, access_hash=1, file_reference=b"ref" if complete else None,
+                                 kind=kind, attributes=attributes, mime_type="application/octet-stream")
+    return TLRPC.TL_messageMediaDocument(document=document)
+
+
+def make_message(chat_id, text="", media=None, grouped_id=0, from_id=42, message_id=None, reply_to_id=None, out=False):
+    """Builds a TL_message posted in a channel identified by its dialog id."""
+    reply_to = TLRPC.TL_messageReplyHeader(reply_to_msg_id=reply_to_id) if reply_to_id else None
+    return TLRPC.TL_message(
+        id=message_id or next(_message_ids), date=int(time.time()), message=text, out=out,
+        peer_id=TLRPC.TL_peerChannel(channel_id=abs(chat_id)), from_id=TLRPC.TL_peerUser(user_id=from_id),
+        media=media, grouped_id=grouped_id, entities=ArrayList(), reply_to=reply_to, fwd_from=None,
+        random_id=0, dialog_id=chat_id)
+
+
+def make_message_object(message, reply_message=None, account=0):
+    message_object = MessageObject(account, message)
+    if reply_message is not None:
+        message_object.replyMessageObject = MessageObject(account, reply_message)
+    return message_object
+
+
+def post_messages(chat_id, message_objects, account=0):
+    """
+    Delivers a batch the way MessagesController does: one didReceiveNewMessages notification.
+    The messages are also kept in the fake server's history, so getMessages finds them later.
+    """
+    with network.lock:
+        history = network.history.setdefault(chat_id, [])
+        posted_ids = {obj.messageOwner.id for obj in message_objects}
+        history[:] = [message for message in history if message.id not in posted_ids]
+        history.extend(obj.messageOwner for obj in message_objects)
+    AccountInstance.getInstance(account).notification_center.postNotificationName(
+        NotificationCenter.didReceiveNewMessages, account, chat_id, ArrayList(message_objects))
+
+
+# --- base_plugin ---
+
+class BasePlugin:
+    def __init__(self):
+        self._settings = {}
+        self.menu_items = []
+
+    def get_setting(self, key, default=None):
+        return self._settings.get(key, default)
+
+    def set_setting(self, key, value):
+        self._settings[key] = value
+
+    def add_menu_item(self, item):
+        self.menu_items.append(item)
+
+
+# --- Installation ---
+
+def install():
+    """Registers all stand-in modules in sys.modules (idempotent)."""
+    if "client_utils" in sys.modules:
+        return
+    _module("java.chaquopy", dynamic_proxy=dynamic_proxy)
+    _module("java.lang", Runnable=object, String=JavaString, Integer=Integer, Long=Long)
+    _module("java.util", ArrayList=ArrayList, HashSet=HashSet, Scanner=_Anything)
+    _module("java.net", URL=_Anything, HttpURLConnection=_Anything)
+    _module("java.io", File=File, FileOutputStream=_Anything)
+    _module("base_plugin", BasePlugin=BasePlugin, MenuItemData=_Kwargs, MenuItemType=_Anything())
+    _module("ui.settings", Header=_Kwargs, Text=_Kwargs, Divider=_Kwargs, Input=_Kwargs, Switch=_Kwargs)
+    _module("ui.alert", AlertDialogBuilder=_Anything)
+    _module("ui.bulletin", BulletinHelper=_Anything())
+    _module("android_utils", log=lambda *args: None, run_on_ui_thread=lambda fn, *a: fn())
+    _module("android.widget", **{n: _Anything for n in (
+        "EditText", "FrameLayout", "CheckBox", "LinearLayout", "TextView", "Toast", "ScrollView", "CompoundButton")})
+    _module("android.text", InputType=_Anything(), Html=_Anything(), TextWatcher=object)
+    _module("android.text.method", LinkMovementMethod=_Anything())
+    _module("android.util", TypedValue=_Anything())
+    _module("android.view", View=_Anything, ViewGroup=_Anything())
+    _module("android.content.res", ColorStateList=_Anything)
+    _module("android.content", ClipData=_Anything(), ClipboardManager=_Anything, Context=_Anything(), Intent=_Anything)
+    _module("android.os", Handler=Handler, Looper=Looper)
+    _module("android.net", Uri=_Anything())
+    _module("android.graphics", Typeface=_Anything())
+    _module("org.telegram.messenger", NotificationCenter=NotificationCenter, MessageObject=MessageObject,
+            R=_Anything(), Utilities=Utilities, ChatObject=ChatObject, UserConfig=UserConfig, AccountInstance=AccountInstance,
+            MessagesController=MessagesController)
+    _module("org.telegram.tgnet", TLRPC=TLRPC, ConnectionsManager=ConnectionsManager)
+    _module("org.telegram.ui.ActionBar", Theme=_Anything())
+    _module("com.exteragram.messenger.plugins.ui", PluginSettingsActivity=_Anything)
+    _module("com.exteragram.messenger.plugins", PluginsController=PluginsController)
+    _module("client_utils",
+            get_messages_controller=lambda: messages_controller,
+            get_last_fragment=lambda: _Anything(),
+            get_account_instance=lambda: account_instance,
+            send_request=send_request,
+            RequestCallback=RequestCallback,
+            get_user_config=lambda: user_config)